@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+离线回放基准测试脚本
+
+record 模式在线获取全市场快照和若干股票的历史日线并写入存档；
+replay 模式从存档回放这些请求（可注入延迟和错误），在临时数据库上运行
+入库流水线，测量吞吐量和失败处理，不访问网络。
+
+用法:
+    python scripts/benchmark_replay.py record --archive data/replay --stocks 50
+    python scripts/benchmark_replay.py replay --archive data/replay --error-rate 0.05
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def record(archive: str, stocks: int, days: int) -> None:
+    """在线录制快照和历史日线请求"""
+    from trevanquant.data.source import AkshareSource, RecordingSource
+
+    print("=" * 50)
+    print(f"录制数据源响应到 {archive}")
+    print("=" * 50)
+
+    source = RecordingSource(AkshareSource(cached=False), archive)
+
+    spot = source.call('stock_zh_a_spot_em')
+    codes = spot['代码'].astype(str).str.zfill(6).tolist()[:stocks]
+    print(f"✓ 全市场快照: {len(spot)} 只股票")
+
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days)
+
+    errors = 0
+    for code in codes:
+        try:
+            source.call(
+                'stock_zh_a_hist',
+                symbol=code,
+                period='daily',
+                start_date=start_date.strftime('%Y%m%d'),
+                end_date=end_date.strftime('%Y%m%d'),
+                adjust=''
+            )
+        except Exception as e:
+            errors += 1
+            print(f"  {code} 获取失败（已录制异常）: {e}")
+
+    print(f"✓ 历史日线: {len(codes)} 只股票，失败 {errors}")
+
+
+def replay(archive: str, latency_scale: float, error_rate: float, seed: int, workers: int) -> bool:
+    """回放存档并运行入库流水线"""
+    from trevanquant.data.executor import FetchExecutor
+    from trevanquant.data.pipeline import IngestionPipeline, write_daily_data
+    from trevanquant.data.snapshot import HISTORY_COLUMNS, frame_to_rows, to_records
+    from trevanquant.data.retry import RetryPolicy
+    from trevanquant.data.source import ReplaySource, RetryingSource, set_data_source
+
+    print("=" * 50)
+    print(f"回放 {archive}（延迟系数 {latency_scale}，错误率 {error_rate}）")
+    print("=" * 50)
+
+    policy = RetryPolicy(base_delay=0.05, max_delay=1.0, seed=seed)
+    source = RetryingSource(
+        ReplaySource(archive, latency_scale=latency_scale, error_rate=error_rate, seed=seed),
+        policy
+    )
+    set_data_source(source)
+
+    with open(Path(archive) / 'index.jsonl', 'r', encoding='utf-8') as f:
+        requests = [
+            entry['kwargs'] for entry in map(json.loads, f)
+            if entry['name'] == 'stock_zh_a_hist'
+        ]
+    if not requests:
+        print("✗ 存档中没有历史日线请求")
+        return False
+
+    def fetch(index):
+        return source.call('stock_zh_a_hist', **requests[index])
+
+    def transform(index, df):
+        frame = frame_to_rows(df, HISTORY_COLUMNS).assign(stock_code=requests[index]['symbol'])
+        return to_records(frame)
+
+    executor = FetchExecutor(max_workers=workers, requests_per_second=1000, burst=workers)
+    pipeline = IngestionPipeline(fetch, transform, write_daily_data, fetch_executor=executor)
+
+    start = time.perf_counter()
+    result = pipeline.run_sync(range(len(requests)))
+    duration = time.perf_counter() - start
+
+    latency = result['latency']
+    print(f"✓ 请求数: {len(requests)}，成功 {result['success_count']}，失败 {result['error_count']}")
+    print(f"  写入行数: {result['rows_written']}")
+    print(f"  耗时: {duration:.2f} 秒，吞吐 {len(requests) / duration:.1f} 请求/秒")
+    print(
+        f"  请求耗时: p50={latency['p50'] * 1000:.0f}ms p90={latency['p90'] * 1000:.0f}ms "
+        f"p99={latency['p99'] * 1000:.0f}ms"
+    )
+    retry = policy.stats()
+    print(f"  重试 {retry['retries']} 次，重试耗尽 {retry['failures']} 次，不可重试 {retry['fatal']} 次")
+    return True
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='TrevanQuant 离线回放基准测试')
+    parser.add_argument('mode', choices=['record', 'replay'], help='录制或回放')
+    parser.add_argument('--archive', required=True, help='存档目录')
+    parser.add_argument('--stocks', type=int, default=50, help='录制的股票数')
+    parser.add_argument('--days', type=int, default=365, help='录制的历史天数')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='回放延迟系数')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='回放注入错误的概率')
+    parser.add_argument('--seed', type=int, default=0, help='错误注入的随机数种子')
+    parser.add_argument('--workers', type=int, default=8, help='并发获取线程数')
+    args = parser.parse_args()
+
+    if args.mode == 'record':
+        record(args.archive, args.stocks, args.days)
+        return
+
+    # 回放写入临时数据库、列式存储和分区目录，不影响正式数据
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{tmp}/benchmark.db"
+        os.environ['DATABASE_BAR_STORE_PATH'] = f"{tmp}/bars"
+        os.environ['DATABASE_PARTITION_DIR'] = f"{tmp}/partitions"
+        passed = replay(args.archive, args.latency_scale, args.error_rate, args.seed, args.workers)
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
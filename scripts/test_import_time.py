@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+导入耗时测试脚本
+
+在独立的子进程中测量模块导入耗时，确保命令行入口（status、健康检查等）
+不会在导入阶段建立数据库连接、加载配置或打开日志文件。
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 项目根目录
+project_root = Path(__file__).parent.parent
+
+# 各模块导入耗时预算（秒）
+IMPORT_BUDGETS = {
+    'trevanquant.scheduler.runner': 0.5,
+    'trevanquant.database.connection': 1.0,
+}
+
+# 每个模块重复测量次数，取中位数
+REPEAT = 5
+
+
+def measure_import(module: str) -> float:
+    """在新的Python进程中测量导入模块的耗时"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [str(project_root / 'src'), str(project_root), env.get('PYTHONPATH', '')]
+    )
+
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - start)"
+    )
+
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_budgets() -> bool:
+    """测试各模块导入耗时是否在预算内"""
+    print("=" * 50)
+    print("测试模块导入耗时")
+    print("=" * 50)
+
+    all_passed = True
+
+    for module, budget in IMPORT_BUDGETS.items():
+        try:
+            timings = [measure_import(module) for _ in range(REPEAT)]
+        except subprocess.CalledProcessError as e:
+            print(f"✗ {module}: 导入失败\n{e.stderr}")
+            all_passed = False
+            continue
+
+        median = statistics.median(timings)
+        passed = median <= budget
+        all_passed = all_passed and passed
+
+        mark = '✓' if passed else '✗'
+        print(f"{mark} {module}: {median * 1000:.0f} ms (预算 {budget * 1000:.0f} ms)")
+
+    return all_passed
+
+
+def test_no_side_effects() -> bool:
+    """测试导入后未初始化数据库引擎，也未创建数据库文件和日志文件"""
+    print("\n" + "=" * 50)
+    print("测试导入无副作用")
+    print("=" * 50)
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [str(project_root / 'src'), str(project_root), env.get('PYTHONPATH', '')]
+    )
+
+    code = (
+        "import trevanquant.scheduler.runner, trevanquant.database.connection as c; "
+        "print(c.db_manager._initialized)"
+    )
+
+    # 在空的临时目录中运行，数据库指向该目录，日志文件按相对路径也落在该目录
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / 'side_effects.db'
+        log_file = Path(tmp) / 'logs' / 'app.log'
+        env['DATABASE_URL'] = f"sqlite:///{db_file}"
+
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            env=env,
+            cwd=tmp,
+            capture_output=True,
+            text=True
+        )
+        duration = time.perf_counter() - start
+
+        created = [path.name for path in (db_file, log_file) if path.exists()]
+
+    if result.returncode != 0:
+        print(f"✗ 导入失败\n{result.stderr}")
+        return False
+
+    initialized = result.stdout.strip().splitlines()[-1] == 'True'
+    if initialized:
+        print("✗ 导入时已初始化数据库引擎")
+        return False
+
+    if created:
+        print(f"✗ 导入时创建了文件: {', '.join(created)}")
+        return False
+
+    print(f"✓ 导入时未初始化数据库引擎，未创建数据库和日志文件（进程总耗时 {duration:.2f} 秒）")
+    return True
+
+
+def main():
+    """主函数"""
+    print("TrevanQuant 导入耗时测试")
+    print("=" * 50)
+
+    passed = test_import_budgets()
+    passed = test_no_side_effects() and passed
+
+    print("\n" + "=" * 50)
+    print("测试完成!" if passed else "测试未通过!")
+    print("=" * 50)
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
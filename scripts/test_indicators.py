@@ -57,14 +57,9 @@ def create_sample_daily_data():
         })
 
     # 保存到数据库
+    # batch_upsert 覆盖已存在的同日数据，并同步更新市场统计和列式存储
     with db_manager.session_scope() as session:
-        # 删除已存在的数据
-        daily_data_crud.get_by_stock(session, '000001')
-        for record in daily_data_crud.get_by_stock(session, '000001'):
-            daily_data_crud.delete(session, record)
-
-        # 批量创建新数据
-        daily_data_crud.create_batch(session, data)
+        daily_data_crud.batch_upsert(session, data)
 
     print(f"✓ 创建了 {len(data)} 条示例日线数据")
 
@@ -77,23 +72,16 @@ def test_technical_indicators():
 
     # 获取数据
     with db_manager.session_scope() as session:
-        daily_data = daily_data_crud.get_by_stock(session, '000001')
-
-        if not daily_data:
-            print("✗ 没有找到日线数据")
-            return
-
-        # 在会话内转换为DataFrame
-        df = pd.DataFrame([{
-            'trade_date': d.trade_date,
-            'open_price': d.open_price,
-            'high_price': d.high_price,
-            'low_price': d.low_price,
-            'close_price': d.close_price,
-            'volume': d.volume
-        } for d in daily_data])
-
-    df = df.sort_values('trade_date').reset_index(drop=True)
+        df = daily_data_crud.get_frame(
+            session, '000001',
+            columns=['open_price', 'high_price', 'low_price', 'close_price', 'volume']
+        )
+
+    if df.empty:
+        print("✗ 没有找到日线数据")
+        return
+
+    df = df.drop(columns='stock_code').reset_index()
 
     print(f"使用 {len(df)} 条数据测试技术指标")
 
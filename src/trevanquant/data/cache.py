@@ -0,0 +1,364 @@
+"""
+数据源响应磁盘缓存
+以 (接口函数, 规范化参数) 的哈希为键，压缩存储在本地磁盘；
+已结束交易日的不复权历史数据永不过期，包含当天的数据和空响应短时间过期，总大小超限时按LRU淘汰
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+import zlib
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 各接口的缓存时间（秒），None 表示永不过期
+ENDPOINT_TTLS: Dict[str, Optional[float]] = {
+    'stock_zh_a_spot_em': 60,
+    'stock_info_a_code_name': 24 * 3600,
+    'tool_trade_date_hist_sina': 24 * 3600,
+}
+
+# 未配置的接口默认缓存时间（秒）
+DEFAULT_TTL = 3600
+
+# 请求范围包含今天或响应为空时的缓存时间（秒）
+RECENT_TTL = 300
+
+# 表示请求截止日期的参数名
+END_DATE_ARGS = ('end_date', 'date', 'trade_date')
+
+# 表示复权方式的参数名；复权价格随除权除息事件整体重算，历史数据也会变化
+ADJUST_ARG = 'adjust'
+
+
+def _is_empty(value: Any) -> bool:
+    """响应是否为空（None、空表或空序列）"""
+    if value is None:
+        return True
+    empty = getattr(value, 'empty', None)
+    if isinstance(empty, bool):
+        return empty
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    """解析 YYYYMMDD / YYYY-MM-DD 字符串或日期对象"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        text = value.replace('-', '')
+        if len(text) == 8 and text.isdigit():
+            return date(int(text[:4]), int(text[4:6]), int(text[6:]))
+    return None
+
+
+class ResponseCache:
+    """
+    内容寻址的响应缓存
+
+    文件布局: {root}/{键前两位}/{键}.bin，内容为 zlib 压缩的 pickle (过期时间, 响应)。
+    文件修改时间记录最近访问时间，用于LRU淘汰。
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        max_bytes: int = 1024 * 1024 * 1024,
+        endpoint_ttls: Optional[Dict[str, Optional[float]]] = None,
+        compress_level: int = 6
+    ):
+        """
+        初始化缓存
+
+        Args:
+            root: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+            endpoint_ttls: 覆盖默认的各接口缓存时间
+            compress_level: zlib 压缩级别
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.endpoint_ttls = dict(ENDPOINT_TTLS, **(endpoint_ttls or {}))
+        self.compress_level = compress_level
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._total_bytes = sum(path.stat().st_size for path in self.root.glob('*/*.bin'))
+
+    # ------------------------------------------------------------------
+    # 键与过期策略
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def normalize_args(func: Callable, args: tuple, kwargs: dict) -> Dict[str, Any]:
+        """按函数签名将位置参数和默认值统一为关键字参数"""
+        try:
+            bound = inspect.signature(func).bind(*args, **kwargs)
+        except (TypeError, ValueError):
+            return {'args': list(args), **kwargs}
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    def make_key(self, func: Callable, args: tuple = (), kwargs: Optional[dict] = None) -> str:
+        """计算缓存键"""
+        payload = json.dumps(
+            {
+                'func': f"{func.__module__}.{getattr(func, '__qualname__', func.__name__)}",
+                'args': self.normalize_args(func, args, kwargs or {})
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def ttl_for(
+        self,
+        func: Callable,
+        arguments: Dict[str, Any],
+        value: Any = None
+    ) -> Optional[float]:
+        """
+        计算缓存时间
+
+        空响应可能是上游临时故障或数据尚未发布，使用 RECENT_TTL。
+        请求带截止日期时：包含今天的使用 RECENT_TTL；截止日期早于今天的视为已结束的
+        历史数据，不复权时永不过期，前复权/后复权（adjust='qfq'/'hfq'）的价格会随
+        新的除权除息变化，按接口配置。其他请求按接口配置。
+        """
+        if _is_empty(value):
+            return RECENT_TTL
+
+        endpoint_ttl = self.endpoint_ttls.get(func.__name__, DEFAULT_TTL)
+        for name in END_DATE_ARGS:
+            end_date = _parse_date(arguments.get(name))
+            if end_date is not None:
+                if end_date >= date.today():
+                    return RECENT_TTL
+                return endpoint_ttl if arguments.get(ADJUST_ARG) else None
+
+        return endpoint_ttl
+
+    def _path(self, key: str) -> Path:
+        """缓存文件路径"""
+        return self.root / key[:2] / f"{key}.bin"
+
+    # ------------------------------------------------------------------
+    # 读写
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> tuple:
+        """
+        读取缓存
+
+        Returns:
+            tuple: (是否命中, 响应)
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires_at, value = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return False, None
+        except Exception as e:
+            logger.warning(f"缓存文件损坏，已删除: {path.name}: {e}")
+            self._remove(path)
+            return False, None
+
+        if expires_at is not None and expires_at < time.time():
+            self._remove(path)
+            return False, None
+
+        # 更新访问时间供LRU使用
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        """写入缓存，ttl 为 None 时永不过期"""
+        expires_at = None if ttl is None else time.time() + ttl
+        data = zlib.compress(
+            pickle.dumps((expires_at, value), protocol=pickle.HIGHEST_PROTOCOL),
+            self.compress_level
+        )
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        previous = path.stat().st_size if path.exists() else 0
+
+        # 临时文件名在进程和线程间唯一，多个进程共用缓存目录时互不覆盖
+        tmp = tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False)
+        try:
+            with tmp:
+                tmp.write(data)
+            os.replace(tmp.name, path)
+        except BaseException:
+            Path(tmp.name).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            self.stores += 1
+            self._total_bytes += len(data) - previous
+            over_limit = self._total_bytes > self.max_bytes
+
+        if over_limit:
+            self.evict()
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        先查缓存，未命中时调用接口并缓存结果
+
+        Args:
+            func: 数据源接口函数
+            *args, **kwargs: 接口参数
+
+        Returns:
+            Any: 接口响应
+        """
+        key = self.make_key(func, args, kwargs)
+        hit, value = self.get(key)
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            return value
+
+        value = func(*args, **kwargs)
+        self.set(key, value, self.ttl_for(func, self.normalize_args(func, args, kwargs), value))
+        return value
+
+    def wrap(self, func: Callable) -> Callable:
+        """返回经过缓存的接口函数"""
+        def cached(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+
+        cached.__name__ = func.__name__
+        cached.__wrapped__ = func
+        return cached
+
+    # ------------------------------------------------------------------
+    # 淘汰与统计
+    # ------------------------------------------------------------------
+
+    def _remove(self, path: Path) -> None:
+        """删除缓存文件并更新总大小"""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._total_bytes -= size
+
+    def evict(self, target_ratio: float = 0.9) -> int:
+        """
+        按最近访问时间淘汰，直到总大小低于上限的 target_ratio
+
+        Returns:
+            int: 删除的文件数
+        """
+        files = []
+        for path in self.root.glob('*/*.bin'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        with self._lock:
+            self._total_bytes = sum(size for _, size, _ in files)
+
+        target = self.max_bytes * target_ratio
+        removed = 0
+        for _, _, path in files:
+            if self._total_bytes <= target:
+                break
+            self._remove(path)
+            removed += 1
+
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        """清空缓存"""
+        for path in self.root.glob('*/*.bin'):
+            self._remove(path)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            Dict[str, Any]: 命中、未命中、写入、淘汰次数，命中率和当前总大小
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'total_bytes': self._total_bytes
+            }
+
+
+# 全局响应缓存实例，按 DataConfig.cache_dir 延迟创建
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    获取配置的响应缓存
+
+    Returns:
+        Optional[ResponseCache]: 未配置 cache_dir 时为None
+    """
+    global _response_cache
+
+    if _response_cache is None:
+        config = get_config().data
+        if not config.cache_dir:
+            return None
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    config.cache_dir, max_bytes=config.cache_max_mb * 1024 * 1024
+                )
+
+    return _response_cache
+
+
+def cached_call(func: Callable, *args, **kwargs) -> Any:
+    """经响应缓存调用数据源接口，未配置缓存时直接调用"""
+    cache = get_response_cache()
+    if cache is None:
+        return func(*args, **kwargs)
+    return cache.call(func, *args, **kwargs)
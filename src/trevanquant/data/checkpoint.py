@@ -0,0 +1,193 @@
+"""
+可恢复的同步检查点
+按 (阶段, 股票) 记录已完成的工作单元，分批写入数据库；
+同步中断后以相同参数再次运行时沿用未完成的任务，跳过已完成的单元
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SyncCheckpoint:
+    """
+    同步检查点
+
+    用法:
+        run_key = SyncCheckpoint.make_key(end_date=end_date, days_back=days_back)
+        with SyncCheckpoint('full_sync', run_key=run_key) as checkpoint:
+            for code in checkpoint.pending('daily_data', stock_codes):
+                ...
+                checkpoint.mark_done('daily_data', code)
+
+    正常结束时任务日志标记为 SUCCESS 并清理检查点；抛出异常时写入已完成的单元，
+    日志标记为 FAILED，下次以相同 run_key 运行同一数据类型时从断点继续；
+    run_key 不同时已完成的单元对本次参数不成立，重新开始。
+    """
+
+    def __init__(
+        self,
+        data_type: str = 'full_sync',
+        flush_size: int = 100,
+        resume_within: timedelta = timedelta(hours=24),
+        run_key: str = ''
+    ):
+        """
+        初始化检查点
+
+        Args:
+            data_type: 同步任务的数据类型，对应 DataUpdateLog.data_type
+            flush_size: 累计多少个完成单元写入一次数据库
+            resume_within: 只恢复在此时间内开始的未完成任务，更早的任务重新开始
+            run_key: 同步参数标识（见 make_key），只恢复参数相同的任务
+        """
+        self.data_type = data_type
+        self.flush_size = flush_size
+        self.resume_within = resume_within
+        self.run_key = run_key
+
+        self.run_id: Optional[int] = None
+        self.resumed = False
+        self.records_count = 0
+
+        self._lock = threading.Lock()
+        self._completed: Set[Tuple[str, str]] = set()
+        self._buffer: List[Tuple[str, str]] = []
+
+    @staticmethod
+    def make_key(**params: Any) -> str:
+        """由同步参数（如 end_date、days_back）生成 run_key"""
+        return ';'.join(f"{name}={params[name]}" for name in sorted(params))
+
+    def begin(self) -> int:
+        """
+        开始或恢复同步任务
+
+        Returns:
+            int: 任务ID（DataUpdateLog.id）
+        """
+        from ..database.connection import db_manager
+        from ..database.crud import sync_checkpoint_crud, update_log_crud
+
+        with db_manager.session_scope() as session:
+            latest = update_log_crud.get_latest_by_type(session, self.data_type)
+
+            resumable = (
+                latest is not None
+                and latest.status in ('RUNNING', 'FAILED')
+                and latest.start_time >= datetime.now() - self.resume_within
+            )
+            if resumable and sync_checkpoint_crud.get_run_keys(session, latest.id) - {self.run_key}:
+                # 参数不同：已完成的单元对本次不成立，放弃旧任务的检查点
+                logger.info(f"同步任务 {self.data_type}#{latest.id} 的参数与本次不同，重新开始")
+                sync_checkpoint_crud.clear(session, latest.id)
+                if latest.status == 'RUNNING':
+                    update_log_crud.update(session, latest, {
+                        'status': 'FAILED',
+                        'end_time': datetime.now(),
+                        'error_message': '同步参数变化，未恢复'
+                    })
+                resumable = False
+
+            if resumable:
+                self.run_id = latest.id
+                self.resumed = True
+                self._completed = sync_checkpoint_crud.get_completed(
+                    session, latest.id, self.run_key
+                )
+                update_log_crud.update(session, latest, {'status': 'RUNNING', 'end_time': None})
+                logger.info(
+                    f"恢复同步任务 {self.data_type}#{self.run_id}: "
+                    f"已完成 {len(self._completed)} 个工作单元"
+                )
+            else:
+                self.run_id = update_log_crud.create_log(session, self.data_type).id
+                self.resumed = False
+                self._completed = set()
+                logger.info(f"开始同步任务 {self.data_type}#{self.run_id}")
+
+        return self.run_id
+
+    def is_done(self, phase: str, stock_code: str) -> bool:
+        """工作单元是否已完成"""
+        return (phase, stock_code) in self._completed
+
+    def pending(self, phase: str, stock_codes: Iterable[str]) -> List[str]:
+        """过滤掉本阶段已完成的股票"""
+        codes = list(stock_codes)
+        remaining = [code for code in codes if (phase, code) not in self._completed]
+        if len(remaining) < len(codes):
+            logger.info(f"阶段 {phase}: 跳过已完成的 {len(codes) - len(remaining)} 只股票")
+        return remaining
+
+    def mark_done(self, phase: str, stock_code: str, records: int = 0) -> None:
+        """记录工作单元完成，累计到 flush_size 时写入数据库（线程安全）"""
+        with self._lock:
+            unit = (phase, stock_code)
+            if unit in self._completed:
+                return
+            self._completed.add(unit)
+            self._buffer.append(unit)
+            self.records_count += records
+            should_flush = len(self._buffer) >= self.flush_size
+
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        """将缓冲的完成单元写入数据库"""
+        from ..database.connection import db_manager
+        from ..database.crud import sync_checkpoint_crud
+
+        with self._lock:
+            units, self._buffer = self._buffer, []
+
+        if not units:
+            return 0
+
+        with db_manager.session_scope() as session:
+            return sync_checkpoint_crud.mark_completed(
+                session, self.run_id, units, self.run_key
+            )
+
+    def finish(self, status: str = 'SUCCESS', error_message: Optional[str] = None) -> None:
+        """
+        结束同步任务
+
+        Args:
+            status: SUCCESS 时清理检查点；其他状态保留检查点供下次恢复
+            error_message: 错误信息
+        """
+        from ..database.connection import db_manager
+        from ..database.crud import sync_checkpoint_crud, update_log_crud
+
+        self.flush()
+
+        with db_manager.session_scope() as session:
+            log = update_log_crud.get(session, self.run_id)
+            if log is not None:
+                update_log_crud.update(session, log, {
+                    'status': status,
+                    'end_time': datetime.now(),
+                    'records_count': (log.records_count or 0) + self.records_count,
+                    'error_message': error_message
+                })
+            if status == 'SUCCESS':
+                sync_checkpoint_crud.clear(session, self.run_id)
+
+        self.records_count = 0
+
+    def __enter__(self) -> 'SyncCheckpoint':
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        if exc is None:
+            self.finish('SUCCESS')
+        else:
+            self.finish('FAILED', str(exc))
+        return False
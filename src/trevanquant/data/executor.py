@@ -0,0 +1,263 @@
+"""
+并发数据获取执行器
+固定大小的工作线程池加共享令牌桶限速，吞吐量由请求频率预算决定而不是串行延迟
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """线程安全的令牌桶限速器"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数（即每秒请求数）
+            burst: 桶容量，允许的瞬时突发请求数
+        """
+        if rate <= 0:
+            raise ValueError("rate 必须大于0")
+
+        self.rate = rate
+        self.burst = max(burst, 1)
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        """按流逝时间补充令牌"""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        获取令牌，不足时阻塞等待
+
+        Returns:
+            float: 等待的秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+class LatencyStats:
+    """请求耗时统计，保留最近的若干次样本计算分位数"""
+
+    def __init__(self, max_samples: int = 10000):
+        """
+        初始化统计
+
+        Args:
+            max_samples: 保留的样本数上限
+        """
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.errors = 0
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        """记录一次请求耗时"""
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            if error:
+                self.errors += 1
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self._samples.clear()
+            self.count = 0
+            self.errors = 0
+
+    def percentile(self, q: float) -> float:
+        """最近样本耗时的 q 分位数（秒），无样本时为0"""
+        with self._lock:
+            samples = np.array(self._samples, dtype=np.float64)
+        return float(np.percentile(samples, q)) if len(samples) else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """
+        获取统计摘要
+
+        Returns:
+            Dict[str, float]: 请求数、失败数以及 p50/p90/p99/max 耗时（秒）
+        """
+        with self._lock:
+            samples = np.array(self._samples, dtype=np.float64)
+            count, errors = self.count, self.errors
+
+        if len(samples) == 0:
+            return {'count': count, 'errors': errors, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+
+        p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+        return {
+            'count': count,
+            'errors': errors,
+            'p50': float(p50),
+            'p90': float(p90),
+            'p99': float(p99),
+            'max': float(samples.max())
+        }
+
+
+class FetchExecutor:
+    """
+    并发数据获取执行器
+
+    所有调用共享同一个令牌桶，多个批次同时运行时总请求频率仍受限。
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+        burst: Optional[int] = None
+    ):
+        """
+        初始化执行器
+
+        Args:
+            max_workers: 工作线程数，默认 DataConfig.max_workers
+            requests_per_second: 每秒请求数上限，默认 DataConfig.requests_per_second；
+                为0时按 1 / DataConfig.request_delay 计算
+            burst: 突发请求数，默认 DataConfig.request_burst
+        """
+        config = get_config().data
+
+        if requests_per_second is None:
+            requests_per_second = config.requests_per_second
+        if not requests_per_second:
+            requests_per_second = 1.0 / config.request_delay if config.request_delay > 0 else 1000.0
+
+        self.max_workers = max_workers or config.max_workers
+        self.limiter = TokenBucket(requests_per_second, burst or config.request_burst)
+        self.stats = LatencyStats()
+
+    def call(self, fetch: Callable[..., Any], *args, **kwargs) -> Any:
+        """限速后执行一次请求并记录耗时"""
+        self.limiter.acquire()
+
+        start = time.perf_counter()
+        try:
+            result = fetch(*args, **kwargs)
+        except Exception:
+            self.stats.record(time.perf_counter() - start, error=True)
+            raise
+
+        self.stats.record(time.perf_counter() - start)
+        return result
+
+    def iter_results(
+        self,
+        fetch: Callable[[Any], Any],
+        items: Iterable[Hashable]
+    ) -> Iterator[Tuple[Hashable, Any, Optional[Exception]]]:
+        """
+        并发获取数据，按完成顺序逐个返回
+
+        Args:
+            fetch: 获取单个条目的函数，如按股票代码获取日线
+            items: 条目列表
+
+        Yields:
+            Tuple: (条目, 结果, 异常)，成功时异常为None
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch') as pool:
+            futures = {pool.submit(self.call, fetch, item): item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+
+    def run(self, fetch: Callable[[Any], Any], items: Iterable[Hashable]) -> Dict[str, Any]:
+        """
+        并发获取全部条目
+
+        Args:
+            fetch: 获取单个条目的函数
+            items: 条目列表
+
+        Returns:
+            Dict[str, Any]: results（条目到结果）、errors（条目到异常信息）、
+                duration（总耗时秒数）、latency（本批次的耗时分位数）
+        """
+        batch_stats = LatencyStats()
+        results, errors = {}, {}
+
+        start = time.perf_counter()
+
+        def timed(item):
+            item_start = time.perf_counter()
+            try:
+                result = fetch(item)
+            except Exception:
+                batch_stats.record(time.perf_counter() - item_start, error=True)
+                raise
+            batch_stats.record(time.perf_counter() - item_start)
+            return result
+
+        for item, result, error in self.iter_results(timed, items):
+            if error is None:
+                results[item] = result
+            else:
+                errors[item] = str(error)
+                logger.warning(f"获取 {item} 失败: {error}")
+
+        duration = time.perf_counter() - start
+        latency = batch_stats.summary()
+        logger.info(
+            f"并发获取完成: 成功 {len(results)}，失败 {len(errors)}，耗时 {duration:.1f}秒，"
+            f"p50={latency['p50'] * 1000:.0f}ms p90={latency['p90'] * 1000:.0f}ms "
+            f"p99={latency['p99'] * 1000:.0f}ms"
+        )
+
+        return {
+            'results': results,
+            'errors': errors,
+            'duration': duration,
+            'latency': latency
+        }
+
+
+# 全局执行器实例，按 DataConfig 延迟创建，所有数据获取共享同一限速预算
+_fetch_executor: Optional[FetchExecutor] = None
+_fetch_executor_lock = threading.Lock()
+
+
+def get_fetch_executor() -> FetchExecutor:
+    """获取全局数据获取执行器"""
+    global _fetch_executor
+
+    if _fetch_executor is None:
+        with _fetch_executor_lock:
+            if _fetch_executor is None:
+                _fetch_executor = FetchExecutor()
+
+    return _fetch_executor
@@ -0,0 +1,264 @@
+"""
+asyncio 数据入库流水线
+获取、转换、写库三个阶段通过有界队列衔接：网络等待、DataFrame 解析和数据库写入相互重叠，
+队列长度由 DataConfig.batch_size 决定，内存占用有上限
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+from .executor import FetchExecutor, get_fetch_executor
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 队列结束标记
+_DONE = object()
+
+
+def write_daily_data(rows: List[dict]) -> Dict[str, int]:
+    """默认写库函数：批量写入日线数据"""
+    from ..database.connection import db_manager
+    from ..database.crud import daily_data_crud
+
+    with db_manager.session_scope() as session:
+        return daily_data_crud.batch_upsert(session, rows)
+
+
+class IngestionPipeline:
+    """
+    数据入库流水线
+
+    阶段:
+        获取  并发协程，每个请求经 FetchExecutor 限速后在线程中执行
+        转换  在执行器中运行的CPU任务，将原始数据转换为行字典列表
+        写库  单个协程按 batch_size 攒批，在专用线程中顺序写入
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Hashable], Any],
+        transform: Callable[[Hashable, Any], List[dict]],
+        write: Callable[[List[dict]], Any] = write_daily_data,
+        fetch_executor: Optional[FetchExecutor] = None,
+        transform_executor: Optional[Executor] = None,
+        transform_workers: int = 2,
+        batch_size: Optional[int] = None
+    ):
+        """
+        初始化流水线
+
+        Args:
+            fetch: 获取单个条目原始数据的函数（如按股票代码获取日线DataFrame）
+            transform: 将 (条目, 原始数据) 转换为行字典列表的函数
+            write: 写入一批行的函数，默认写入 daily_data
+            fetch_executor: 限速执行器，默认全局执行器
+            transform_executor: 转换阶段使用的执行器，默认事件循环的线程池；
+                转换开销大时可传入 ProcessPoolExecutor（函数需可序列化）
+            transform_workers: 同时进行的转换任务数
+            batch_size: 每次写库的行数和队列长度，默认 DataConfig.batch_size
+        """
+        self.fetch = fetch
+        self.transform = transform
+        self.write = write
+        self.fetch_executor = fetch_executor or get_fetch_executor()
+        self.transform_executor = transform_executor
+        self.transform_workers = max(transform_workers, 1)
+        self.batch_size = batch_size or get_config().data.batch_size
+
+    async def run(self, items: Iterable[Hashable]) -> Dict[str, Any]:
+        """
+        运行流水线
+
+        Args:
+            items: 待处理条目（如股票代码列表）
+
+        Returns:
+            Dict[str, Any]: success_count、error_count、errors（条目到错误信息）、
+                rows_written、write_results、duration 和执行器累计的获取耗时分位数 latency
+        """
+        start = time.perf_counter()
+
+        pending: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            pending.put_nowait(item)
+        total = pending.qsize()
+
+        raw_queue: asyncio.Queue = asyncio.Queue(maxsize=self.batch_size)
+        rows_queue: asyncio.Queue = asyncio.Queue(maxsize=self.batch_size)
+
+        result = {
+            'success_count': 0,
+            'error_count': 0,
+            'errors': {},
+            'rows_written': 0,
+            'write_results': []
+        }
+
+        fetch_pool = ThreadPoolExecutor(
+            max_workers=self.fetch_executor.max_workers, thread_name_prefix='pipeline-fetch'
+        )
+        write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline-write')
+
+        try:
+            upstream = asyncio.create_task(
+                self._upstream(pending, raw_queue, rows_queue, fetch_pool, result)
+            )
+            writer = asyncio.create_task(self._write_worker(rows_queue, write_pool, result))
+
+            await asyncio.wait([upstream, writer], return_when=asyncio.FIRST_EXCEPTION)
+
+            # 写库失败时停止上游，避免阻塞在已满的队列上
+            if writer.done() and writer.exception() is not None:
+                upstream.cancel()
+                await asyncio.gather(upstream, return_exceptions=True)
+                raise writer.exception()
+
+            # 获取或转换阶段失败时停止写库协程，否则它会一直等待结束标记
+            if upstream.done() and upstream.exception() is not None:
+                writer.cancel()
+                await asyncio.gather(writer, return_exceptions=True)
+                raise upstream.exception()
+
+            await upstream
+            await writer
+        finally:
+            fetch_pool.shutdown(wait=False)
+            write_pool.shutdown(wait=True)
+
+        result['duration'] = time.perf_counter() - start
+        result['latency'] = self.fetch_executor.stats.summary()
+
+        logger.info(
+            f"流水线完成: {total} 个条目，成功 {result['success_count']}，"
+            f"失败 {result['error_count']}，写入 {result['rows_written']} 行，"
+            f"耗时 {result['duration']:.1f}秒"
+        )
+        return result
+
+    def run_sync(self, items: Iterable[Hashable]) -> Dict[str, Any]:
+        """在新的事件循环中运行流水线（供同步代码调用）"""
+        return asyncio.run(self.run(items))
+
+    async def _upstream(
+        self,
+        pending: asyncio.Queue,
+        raw_queue: asyncio.Queue,
+        rows_queue: asyncio.Queue,
+        fetch_pool: Executor,
+        result: Dict[str, Any]
+    ) -> None:
+        """运行获取和转换阶段，结束后通知写库协程"""
+        fetchers = [
+            asyncio.create_task(self._fetch_worker(pending, raw_queue, fetch_pool, result))
+            for _ in range(self.fetch_executor.max_workers)
+        ]
+        transformers = [
+            asyncio.create_task(self._transform_worker(raw_queue, rows_queue, result))
+            for _ in range(self.transform_workers)
+        ]
+
+        try:
+            await asyncio.gather(*fetchers)
+            for _ in transformers:
+                await raw_queue.put(_DONE)
+            await asyncio.gather(*transformers)
+            await rows_queue.put(_DONE)
+        except BaseException:
+            # 被取消或某个协程失败时，停止其余的获取和转换协程
+            for task in fetchers + transformers:
+                task.cancel()
+            await asyncio.gather(*fetchers, *transformers, return_exceptions=True)
+            raise
+
+    async def _fetch_worker(
+        self,
+        pending: asyncio.Queue,
+        raw_queue: asyncio.Queue,
+        fetch_pool: Executor,
+        result: Dict[str, Any]
+    ) -> None:
+        """获取协程：取出条目，限速获取后放入原始数据队列"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            try:
+                item = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                raw = await loop.run_in_executor(
+                    fetch_pool, self.fetch_executor.call, self.fetch, item
+                )
+            except Exception as e:
+                self._record_error(result, item, e)
+                continue
+
+            # 队列已满时在此等待，获取速度受下游处理速度约束
+            await raw_queue.put((item, raw))
+
+    async def _transform_worker(
+        self,
+        raw_queue: asyncio.Queue,
+        rows_queue: asyncio.Queue,
+        result: Dict[str, Any]
+    ) -> None:
+        """转换协程：在执行器中将原始数据转换为行"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            entry = await raw_queue.get()
+            if entry is _DONE:
+                return
+
+            item, raw = entry
+            try:
+                rows = await loop.run_in_executor(self.transform_executor, self.transform, item, raw)
+            except Exception as e:
+                self._record_error(result, item, e)
+                continue
+
+            result['success_count'] += 1
+            if rows:
+                await rows_queue.put(rows)
+
+    async def _write_worker(
+        self,
+        rows_queue: asyncio.Queue,
+        write_pool: Executor,
+        result: Dict[str, Any]
+    ) -> None:
+        """写库协程：攒够 batch_size 行后写入一次"""
+        loop = asyncio.get_running_loop()
+        buffer: List[dict] = []
+
+        async def flush():
+            if not buffer:
+                return
+            batch = list(buffer)
+            buffer.clear()
+            result['write_results'].append(
+                await loop.run_in_executor(write_pool, self.write, batch)
+            )
+            result['rows_written'] += len(batch)
+
+        while True:
+            rows = await rows_queue.get()
+            if rows is _DONE:
+                await flush()
+                return
+
+            buffer.extend(rows)
+            if len(buffer) >= self.batch_size:
+                await flush()
+
+    @staticmethod
+    def _record_error(result: Dict[str, Any], item: Hashable, error: Exception) -> None:
+        """记录单个条目的失败"""
+        result['error_count'] += 1
+        result['errors'][item] = str(error)
+        logger.warning(f"处理 {item} 失败: {error}")
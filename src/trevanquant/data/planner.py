@@ -0,0 +1,245 @@
+"""
+增量同步计划
+一次分组查询得到每只股票已存储的日期范围，与交易日历比对后
+给出每只股票需要获取的最小日期区间，区间相同的股票归为一组；
+已确认没有数据的区间（停牌等）记录在 no_data_ranges 中，不再重复请求
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 日期区间 (开始日期, 结束日期)，均为交易日且包含两端
+DateRange = Tuple[date, date]
+
+
+class SyncPlanner:
+    """增量同步计划生成器"""
+
+    def __init__(self, history_days: int = 250):
+        """
+        初始化计划生成器
+
+        Args:
+            history_days: 没有任何数据的股票回填的交易日数
+        """
+        self.history_days = history_days
+
+    def plan(
+        self,
+        end_date: Optional[date] = None,
+        stock_codes: Optional[Sequence[str]] = None,
+        include_gaps: bool = True
+    ) -> Dict[str, Any]:
+        """
+        生成同步计划（只读，不发起任何请求）
+
+        Args:
+            end_date: 同步截止日期，默认不晚于今天的最近交易日
+            stock_codes: 参与同步的股票，默认 stocks 表中未退市的全部股票
+            include_gaps: 是否补齐已存储范围内缺失的交易日，可关闭以只同步尾部；
+                无论是否开启，已记录为无数据的交易日都不会再请求
+
+        Returns:
+            Dict[str, Any]:
+                end_date        同步截止日期
+                total_stocks    参与同步的股票数
+                up_to_date      无需同步的股票数
+                gap_stocks      存在内部缺口的股票数
+                requests        按每只股票每个区间一次请求计算的请求数
+                trading_days    需要获取的股票交易日数
+                groups          [{'ranges': [(开始, 结束), ...], 'stock_codes': [...]}]，
+                                按股票数降序
+        """
+        from ..database.calendar import trading_calendar
+        from ..database.connection import db_manager
+        from ..database.crud import daily_data_crud, no_data_range_crud
+        from ..database.stock_cache import stock_metadata_cache
+
+        end_date = trading_calendar.nth_trading_day_back(end_date or date.today(), 0)
+        history_start = trading_calendar.days_back_start(self.history_days, end_date)
+
+        with db_manager.session_scope(readonly=True) as session:
+            if stock_codes is None:
+                stock_codes = [
+                    code for code, info in stock_metadata_cache.all(session).items()
+                    if not info['is_delisted']
+                ]
+            coverage = daily_data_crud.get_coverage(session, stock_codes)
+
+            # 行数少于区间内交易日数的股票存在内部缺口，再查询其具体日期
+            gap_codes = [
+                code for code, (first, last, rows) in coverage.items()
+                if include_gaps and rows < trading_calendar.trading_days_between(first, last)
+            ]
+            stored_dates = daily_data_crud.get_trade_dates(session, gap_codes)
+            no_data = no_data_range_crud.get_ranges(session, stock_codes)
+
+        plans: Dict[str, List[DateRange]] = {}
+        for code in stock_codes:
+            if code not in coverage:
+                ranges = [(history_start, end_date)]
+            else:
+                first, last, _ = coverage[code]
+                ranges = []
+                if code in stored_dates:
+                    ranges += self._gap_ranges(
+                        trading_calendar.trading_days(first, last), stored_dates[code]
+                    )
+                if last < end_date:
+                    ranges.append((trading_calendar.next_trading_day(last), end_date))
+
+            if ranges and code in no_data:
+                ranges = self._exclude_ranges(ranges, no_data[code])
+
+            if ranges:
+                plans[code] = ranges
+
+        groups: Dict[Tuple[DateRange, ...], List[str]] = {}
+        for code, ranges in plans.items():
+            groups.setdefault(tuple(ranges), []).append(code)
+
+        result = {
+            'end_date': end_date,
+            'total_stocks': len(stock_codes),
+            'up_to_date': len(stock_codes) - len(plans),
+            'gap_stocks': len(stored_dates),
+            'requests': sum(len(ranges) for ranges in plans.values()),
+            'trading_days': sum(
+                trading_calendar.trading_days_between(start, end)
+                for ranges in plans.values() for start, end in ranges
+            ),
+            'groups': [
+                {'ranges': list(ranges), 'stock_codes': sorted(codes)}
+                for ranges, codes in sorted(groups.items(), key=lambda item: -len(item[1]))
+            ]
+        }
+
+        logger.info(
+            f"同步计划: {result['total_stocks']} 只股票，{result['up_to_date']} 只无需同步，"
+            f"{result['requests']} 次请求，{result['trading_days']} 个股票交易日，"
+            f"{len(result['groups'])} 组"
+        )
+        return result
+
+    @staticmethod
+    def _gap_ranges(trading_days: List[date], stored: List[date]) -> List[DateRange]:
+        """已存储范围内缺失的交易日，合并为连续区间"""
+        stored = set(stored)
+        ranges: List[DateRange] = []
+        start = previous = None
+
+        for day in trading_days:
+            if day in stored:
+                if start is not None:
+                    ranges.append((start, previous))
+                    start = None
+                continue
+            if start is None:
+                start = day
+            previous = day
+
+        if start is not None:
+            ranges.append((start, previous))
+        return ranges
+
+    @staticmethod
+    def _exclude_ranges(
+        ranges: List[DateRange],
+        excluded: List[DateRange]
+    ) -> List[DateRange]:
+        """
+        从计划区间中去掉已记录为无数据的交易日
+
+        无数据区间两端对齐到交易日并排序合并后，与计划区间一次归并扫描。
+        """
+        from ..database.calendar import trading_calendar
+
+        merged: List[DateRange] = []
+        for low, high in sorted(excluded):
+            # 不含交易日的区间（如只覆盖周末）不影响计划
+            low = trading_calendar.next_trading_day(low - timedelta(days=1))
+            high = trading_calendar.nth_trading_day_back(high, 0)
+            if low > high:
+                continue
+            if merged and low <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+            else:
+                merged.append((low, high))
+
+        result: List[DateRange] = []
+        index = 0
+        for start, end in sorted(ranges):
+            # 跳过在本区间之前结束的无数据区间
+            while index < len(merged) and merged[index][1] < start:
+                index += 1
+
+            position = index
+            while position < len(merged) and merged[position][0] <= end and start <= end:
+                low, high = merged[position]
+                if low > start:
+                    result.append((start, trading_calendar.prev_trading_day(low)))
+                start = trading_calendar.next_trading_day(high)
+                position += 1
+
+            if start <= end:
+                result.append((start, end))
+        return result
+
+    def record_fetch(
+        self,
+        stock_code: str,
+        start_date: date,
+        end_date: date,
+        trade_dates: Iterable[date]
+    ) -> int:
+        """
+        记录一次区间请求的结果：区间内没有返回数据的交易日记为无数据，
+        此后的同步计划不再请求这些交易日
+
+        由获取线程调用（见 fetch_daily_bars），在独立连接上写入，不占用当前线程的写会话。
+
+        Args:
+            stock_code: 股票代码
+            start_date: 请求的开始日期
+            end_date: 请求的结束日期
+            trade_dates: 请求返回的交易日期
+
+        Returns:
+            int: 记录的无数据区间数
+        """
+        from ..database.calendar import trading_calendar
+        from ..database.connection import db_manager
+        from ..database.crud import no_data_range_crud
+
+        missing = self._gap_ranges(
+            trading_calendar.trading_days(start_date, end_date), list(trade_dates)
+        )
+        if not missing:
+            return 0
+
+        with db_manager.isolated_session() as session:
+            no_data_range_crud.record(session, [(stock_code, start, end) for start, end in missing])
+        return len(missing)
+
+    @staticmethod
+    def describe(plan: Dict[str, Any], max_groups: int = 10) -> List[str]:
+        """将同步计划格式化为文本行"""
+        lines = [
+            f"截止日期: {plan['end_date']}",
+            f"股票数: {plan['total_stocks']}（无需同步 {plan['up_to_date']}，存在缺口 {plan['gap_stocks']}）",
+            f"请求数: {plan['requests']}，股票交易日数: {plan['trading_days']}",
+        ]
+        for group in plan['groups'][:max_groups]:
+            ranges = ', '.join(f"{start}~{end}" for start, end in group['ranges'])
+            lines.append(f"  {len(group['stock_codes'])} 只股票: {ranges}")
+        if len(plan['groups']) > max_groups:
+            lines.append(f"  ... 其余 {len(plan['groups']) - max_groups} 组")
+        return lines
+
+
+# 创建全局同步计划生成器实例
+sync_planner = SyncPlanner()
@@ -0,0 +1,364 @@
+"""
+多数据源对冲请求
+同一数据集配置多个提供方：首选提供方超过其 p95 耗时仍未返回时，向下一个提供方
+发出对冲请求，取先成功的结果；失败时立即切换；错误率过高的提供方自动降级。
+各提供方只请求一次，重试在整轮对冲之外进行
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .executor import LatencyStats, TokenBucket, get_fetch_executor
+from .retry import get_retry_policy
+from .snapshot import HISTORY_COLUMNS, frame_to_rows
+from .source import get_data_source
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Provider:
+    """数据提供方及其耗时、错误率统计"""
+
+    def __init__(self, name: str, fetch: Callable[..., Any], window: int = 50):
+        """
+        初始化提供方
+
+        Args:
+            name: 提供方名称
+            fetch: 获取函数，各提供方参数一致、返回格式一致
+            window: 计算错误率的最近请求数
+        """
+        self.name = name
+        self.fetch = fetch
+        self.window = window
+        self.latency = LatencyStats(max_samples=1000)
+        # 只含成功请求的耗时，用于对冲等待时间；快速失败的请求会压低分位数
+        self.success_latency = LatencyStats(max_samples=1000)
+        self.demoted_until = 0.0
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)
+
+    def record(self, seconds: float, error: bool) -> None:
+        """记录一次请求结果"""
+        self.latency.record(seconds, error=error)
+        if not error:
+            self.success_latency.record(seconds)
+        with self._lock:
+            self._outcomes.append(error)
+
+    def error_rate(self) -> float:
+        """最近请求的错误率"""
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return sum(self._outcomes) / len(self._outcomes)
+
+    def samples(self) -> int:
+        """最近请求数"""
+        with self._lock:
+            return len(self._outcomes)
+
+    @property
+    def demoted(self) -> bool:
+        """是否处于降级期"""
+        return time.monotonic() < self.demoted_until
+
+
+class HedgedFetcher:
+    """多提供方对冲请求"""
+
+    def __init__(
+        self,
+        providers: List[Provider],
+        hedge_quantile: float = 95,
+        min_samples: int = 20,
+        default_hedge_delay: float = 3.0,
+        min_hedge_delay: float = 0.1,
+        demote_error_rate: float = 0.5,
+        demote_seconds: float = 300,
+        max_workers: int = 16,
+        limiter: Optional[TokenBucket] = None
+    ):
+        """
+        初始化对冲请求
+
+        Args:
+            providers: 提供方列表，按优先级排列
+            hedge_quantile: 首选提供方耗时超过该分位数时发出对冲请求
+            min_samples: 样本数不足时使用 default_hedge_delay
+            default_hedge_delay: 默认对冲等待秒数
+            min_hedge_delay: 对冲等待秒数下限
+            demote_error_rate: 最近错误率超过该值时降级
+            demote_seconds: 降级持续秒数，期间排在其他提供方之后
+            max_workers: 发出请求的线程数
+            limiter: 对冲和切换发出的额外请求从此令牌桶取令牌，
+                首个请求由调用方限速
+        """
+        if not providers:
+            raise ValueError("至少需要一个提供方")
+
+        self.providers = providers
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.demote_error_rate = demote_error_rate
+        self.demote_seconds = demote_seconds
+        self.limiter = limiter
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedged')
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def ranked(self) -> List[Provider]:
+        """按优先级排列的提供方，降级中的排在最后"""
+        return sorted(self.providers, key=lambda provider: provider.demoted)
+
+    def hedge_delay(self, provider: Provider) -> float:
+        """提供方的对冲等待秒数，按其成功请求耗时的分位数计算"""
+        if provider.success_latency.count < self.min_samples:
+            return self.default_hedge_delay
+        return max(provider.success_latency.percentile(self.hedge_quantile), self.min_hedge_delay)
+
+    def _submit(self, provider: Provider, args: tuple, kwargs: dict) -> Future:
+        """在线程中调用提供方并记录结果"""
+        def run():
+            start = time.perf_counter()
+            try:
+                result = provider.fetch(*args, **kwargs)
+            except Exception:
+                provider.record(time.perf_counter() - start, error=True)
+                self._check_demotion(provider)
+                raise
+            provider.record(time.perf_counter() - start, error=False)
+            return result
+
+        return self._pool.submit(run)
+
+    def _check_demotion(self, provider: Provider) -> None:
+        """错误率过高时降级提供方"""
+        if (
+            not provider.demoted
+            and provider.samples() >= min(self.min_samples, provider.window)
+            and provider.error_rate() > self.demote_error_rate
+        ):
+            provider.demoted_until = time.monotonic() + self.demote_seconds
+            logger.warning(
+                f"数据提供方 {provider.name} 错误率 {provider.error_rate():.0%}，"
+                f"降级 {self.demote_seconds:.0f} 秒"
+            )
+
+    def fetch(self, *args, **kwargs) -> Any:
+        """
+        获取数据
+
+        首选提供方在对冲等待时间内未返回时，再向下一个提供方发出请求，
+        取先成功的结果；某个请求失败时立即向下一个提供方发出请求。
+
+        Returns:
+            Any: 先成功返回的结果
+
+        Raises:
+            Exception: 所有提供方均失败时抛出最后一个错误
+        """
+        queue = self.ranked()
+        running: Dict[Future, Provider] = {}
+        launched = 0
+        last_error: Optional[Exception] = None
+
+        def launch() -> bool:
+            nonlocal launched
+            if not queue:
+                return False
+            provider = queue.pop(0)
+            # 对冲和切换的额外请求与其他请求共用全局限速
+            if launched and self.limiter is not None:
+                self.limiter.acquire()
+            launched += 1
+            running[self._submit(provider, args, kwargs)] = provider
+            return True
+
+        launch()
+        primary = next(iter(running))
+
+        while running:
+            timeout = None
+            if queue and len(running) == 1:
+                provider = next(iter(running.values()))
+                timeout = self.hedge_delay(provider)
+
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # 超过对冲等待时间：向下一个提供方发出对冲请求
+                self.hedges += 1
+                launch()
+                continue
+
+            for future in done:
+                provider = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"数据提供方 {provider.name} 请求失败: {e}")
+                    if not running and launch():
+                        self.failovers += 1
+                    continue
+
+                if future is not primary:
+                    self.hedge_wins += 1
+                return result
+
+        raise last_error if last_error else RuntimeError("没有可用的数据提供方")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取统计
+
+        Returns:
+            Dict[str, Any]: 对冲次数、对冲胜出次数、切换次数及各提供方的耗时和错误率
+        """
+        return {
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'failovers': self.failovers,
+            'providers': {
+                provider.name: dict(
+                    provider.latency.summary(),
+                    error_rate=provider.error_rate(),
+                    demoted=provider.demoted
+                )
+                for provider in self.providers
+            }
+        }
+
+
+# ----------------------------------------------------------------------
+# A股日线提供方，均返回 daily_data 字段的 DataFrame
+# ----------------------------------------------------------------------
+
+# 新浪日线（akshare stock_zh_a_daily）列名到 daily_data 字段的映射
+SINA_COLUMNS = {
+    'date': 'trade_date',
+    'open': 'open_price',
+    'high': 'high_price',
+    'low': 'low_price',
+    'close': 'close_price',
+    'volume': 'volume',
+    'amount': 'amount',
+    'turnover': 'turnover_rate',
+}
+
+# 新浪日线向前多取的自然日数
+SINA_LOOKBACK_DAYS = 10
+
+
+def exchange_symbol(stock_code: str) -> str:
+    """带交易所前缀的代码，如 sz000001"""
+    if stock_code.startswith(('6', '9')):
+        return f'sh{stock_code}'
+    if stock_code.startswith(('4', '8')):
+        return f'bj{stock_code}'
+    return f'sz{stock_code}'
+
+
+def eastmoney_daily(stock_code: str, start_date: date, end_date: date) -> pd.DataFrame:
+    """东方财富日线（akshare stock_zh_a_hist），单次请求，失败由对冲请求切换"""
+    df = get_data_source().attempt(
+        'stock_zh_a_hist',
+        symbol=stock_code,
+        period='daily',
+        start_date=start_date.strftime('%Y%m%d'),
+        end_date=end_date.strftime('%Y%m%d'),
+        adjust=''
+    )
+    return frame_to_rows(df, HISTORY_COLUMNS)
+
+
+def sina_daily(stock_code: str, start_date: date, end_date: date) -> pd.DataFrame:
+    """新浪日线（akshare stock_zh_a_daily），单次请求，单位换算为与东方财富一致"""
+    # 多取几天，使首日也能由前一交易日收盘价算出涨跌幅
+    df = get_data_source().attempt(
+        'stock_zh_a_daily',
+        symbol=exchange_symbol(stock_code),
+        start_date=(start_date - timedelta(days=SINA_LOOKBACK_DAYS)).strftime('%Y%m%d'),
+        end_date=end_date.strftime('%Y%m%d'),
+        adjust=''
+    )
+    frame = frame_to_rows(df, SINA_COLUMNS).sort_values('trade_date')
+
+    # 新浪成交量单位为股、换手率为小数，统一为手和百分比
+    frame = frame.assign(
+        volume=frame['volume'] / 100,
+        turnover_rate=frame['turnover_rate'] * 100,
+        change_amount=frame['close_price'].diff(),
+        change_percent=frame['close_price'].pct_change() * 100
+    )
+    return frame[frame['trade_date'] >= start_date]
+
+
+# 可配置的日线提供方
+DAILY_PROVIDERS: Dict[str, Callable[[str, date, date], pd.DataFrame]] = {
+    'eastmoney': eastmoney_daily,
+    'sina': sina_daily,
+}
+
+# 全局日线对冲请求实例，按 DataConfig.history_providers 延迟创建
+_daily_bars_fetcher: Optional[HedgedFetcher] = None
+_daily_bars_fetcher_lock = threading.Lock()
+
+
+def get_daily_bars_fetcher() -> HedgedFetcher:
+    """获取全局日线对冲请求实例"""
+    global _daily_bars_fetcher
+
+    if _daily_bars_fetcher is None:
+        with _daily_bars_fetcher_lock:
+            if _daily_bars_fetcher is None:
+                config = get_config().data
+                names = [name.strip() for name in config.history_providers.split(',') if name.strip()]
+                unknown = [name for name in names if name not in DAILY_PROVIDERS]
+                if unknown:
+                    raise ValueError(f"未知的日线提供方: {', '.join(unknown)}")
+                _daily_bars_fetcher = HedgedFetcher(
+                    [Provider(name, DAILY_PROVIDERS[name]) for name in names],
+                    hedge_quantile=config.hedge_quantile,
+                    max_workers=config.max_workers * 2,
+                    limiter=get_fetch_executor().limiter
+                )
+
+    return _daily_bars_fetcher
+
+
+def fetch_daily_bars(stock_code: str, start_date: date, end_date: date) -> pd.DataFrame:
+    """
+    获取个股日线（daily_data 字段），多提供方对冲
+
+    一轮对冲中每个提供方只请求一次，全部失败时按全局重试策略退避后重试整轮。
+    请求成功后，区间内今天之前没有返回数据的交易日（停牌等）记为无数据，
+    增量同步计划不再请求；今天的数据可能尚未发布，不记录。
+    """
+    from .planner import sync_planner
+
+    frame = get_retry_policy().call(
+        'daily_bars', get_daily_bars_fetcher().fetch, stock_code, start_date, end_date
+    )
+
+    last_day = min(end_date, date.today() - timedelta(days=1))
+    if start_date <= last_day:
+        try:
+            sync_planner.record_fetch(stock_code, start_date, last_day, frame['trade_date'])
+        except Exception as e:
+            logger.warning(f"记录 {stock_code} 无数据区间失败: {e}")
+    return frame
@@ -0,0 +1,449 @@
+"""
+请求重试与熔断
+指数退避加随机抖动重试可恢复的错误，不可恢复的错误立即抛出；
+每个接口一个熔断器，近期错误率过高时熔断，冷却后放行探测请求，
+熔断与恢复记录到 DataUpdateLog
+"""
+
+import queue
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 熔断器状态
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# 可恢复的 HTTP 状态码：限流和服务端错误
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(ConnectionError):
+    """熔断期间拒绝的请求"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    判断错误是否可重试
+
+    网络错误、超时、限流和服务端错误可重试；参数错误、解析错误、
+    客户端错误（4xx）和熔断拒绝不重试。
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+
+    try:
+        import requests
+    except ImportError:
+        requests = None
+
+    if requests is not None:
+        if isinstance(error, requests.HTTPError):
+            response = error.response
+            return response is None or response.status_code in RETRYABLE_STATUS
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+class CircuitBreaker:
+    """
+    按错误率熔断
+
+    closed: 正常放行，统计最近 window 次请求的错误率，超过 error_rate 时熔断；
+    open: 拒绝请求，open_seconds 后转为 half_open；
+    half_open: 只放行 half_open_probes 个探测请求，成功则恢复，失败则重新熔断。
+    只有可重试的错误计入错误率，参数错误等不代表上游故障。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        error_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        open_seconds: float = 30,
+        half_open_probes: int = 1
+    ):
+        """
+        初始化熔断器
+
+        Args:
+            name: 接口名
+            error_rate: 熔断的错误率阈值
+            window: 统计错误率的最近请求数
+            min_calls: 最近请求数不足时不熔断
+            open_seconds: 熔断持续秒数
+            half_open_probes: 半开状态同时放行的探测请求数
+        """
+        self.name = name
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)
+        self._probes = 0
+        self._opened_at = 0.0
+        self.state = CLOSED
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        self.logged_open = False
+
+    def before_call(self) -> None:
+        """请求前检查，熔断期间抛出 CircuitOpenError"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} 已熔断: {self.last_error}")
+                self.state = HALF_OPEN
+                self._probes = 0
+                logger.info(f"接口 {self.name} 熔断冷却结束，放行探测请求")
+
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} 正在探测恢复")
+                self._probes += 1
+
+    def record_success(self) -> bool:
+        """
+        记录成功
+
+        Returns:
+            bool: 是否由此从半开恢复为正常
+        """
+        with self._lock:
+            self._outcomes.append(False)
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._outcomes.clear()
+                return True
+            return False
+
+    def record_failure(self, error: BaseException) -> bool:
+        """
+        记录可重试的失败
+
+        Returns:
+            bool: 是否由此进入熔断
+        """
+        with self._lock:
+            self._outcomes.append(True)
+            self.last_error = f"{type(error).__name__}: {error}"
+
+            if self.state == HALF_OPEN:
+                self._trip()
+                return True
+
+            if (
+                self.state == CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and sum(self._outcomes) / len(self._outcomes) > self.error_rate
+            ):
+                self._trip()
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        """探测请求因不可重试的错误结束时，归还探测名额"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _trip(self) -> None:
+        """进入熔断（调用方持有锁）"""
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    重试与熔断策略
+
+    用法:
+        retry_policy.call('stock_zh_a_hist', ak.stock_zh_a_hist, symbol='000001')
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        deadline: float = 30.0,
+        error_rate: float = 0.5,
+        open_seconds: float = 30,
+        record_events: bool = True,
+        seed: Optional[int] = None
+    ):
+        """
+        初始化策略
+
+        Args:
+            max_retries: 最大重试次数（不含首次请求）
+            base_delay: 退避基数（秒），第 n 次重试前等待 [0, base_delay * 2^n) 内的随机时间
+            max_delay: 单次等待上限（秒）
+            deadline: 单个请求含重试的总时限（秒），剩余时间不足以等待时不再重试
+            error_rate: 熔断的错误率阈值
+            open_seconds: 熔断持续秒数
+            record_events: 是否将熔断与恢复写入 DataUpdateLog（由后台线程在独立连接上写入，
+                不占用调用方的会话和事务，也不让获取线程等待写连接）
+            seed: 抖动的随机数种子
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.error_rate = error_rate
+        self.open_seconds = open_seconds
+        self.record_events = record_events
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._events: "queue.Queue[tuple]" = queue.Queue()
+        self._event_thread: Optional[threading.Thread] = None
+        self._event_logs: Dict[str, int] = {}
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.fatal = 0
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        """获取接口的熔断器"""
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    name, error_rate=self.error_rate, open_seconds=self.open_seconds
+                )
+                self._breakers[name] = breaker
+            return breaker
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待秒数（full jitter）"""
+        cap = min(self.max_delay, self.base_delay * (2 ** attempt))
+        with self._lock:
+            return self._random.uniform(0, cap)
+
+    def call(self, name: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        按策略调用接口
+
+        Args:
+            name: 接口名，每个接口独立熔断
+            func: 实际请求函数
+            *args, **kwargs: 请求参数
+
+        Returns:
+            Any: 接口响应
+
+        Raises:
+            CircuitOpenError: 接口熔断中
+            Exception: 不可重试的错误或重试耗尽后的最后一个错误
+        """
+        breaker = self.breaker(name)
+        start = time.monotonic()
+
+        with self._lock:
+            self.calls += 1
+
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    breaker.release_probe()
+                    with self._lock:
+                        self.fatal += 1
+                    raise
+
+                if breaker.record_failure(e):
+                    self._on_open(breaker)
+
+                delay = self.backoff(attempt)
+                if (
+                    attempt >= self.max_retries
+                    or breaker.state != CLOSED
+                    or time.monotonic() - start + delay > self.deadline
+                ):
+                    with self._lock:
+                        self.failures += 1
+                    raise
+
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                logger.debug(f"接口 {name} 第 {attempt} 次重试（{delay:.2f} 秒后）: {e}")
+                time.sleep(delay)
+                continue
+
+            if breaker.record_success():
+                self._on_close(breaker)
+            return result
+
+    def attempt(self, name: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        单次请求：经过熔断器并计入错误率，但不重试
+
+        用于调用方自行切换数据源的场景（如多提供方对冲），
+        失败时应立即交给下一个提供方，而不是先等完整的重试周期。
+
+        Args:
+            name: 接口名
+            func: 实际请求函数
+            *args, **kwargs: 请求参数
+
+        Returns:
+            Any: 接口响应
+
+        Raises:
+            CircuitOpenError: 接口熔断中
+            Exception: 请求的错误
+        """
+        breaker = self.breaker(name)
+
+        with self._lock:
+            self.calls += 1
+
+        breaker.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.release_probe()
+                with self._lock:
+                    self.fatal += 1
+                raise
+
+            if breaker.record_failure(e):
+                self._on_open(breaker)
+            with self._lock:
+                self.failures += 1
+            raise
+
+        if breaker.record_success():
+            self._on_close(breaker)
+        return result
+
+    def _on_open(self, breaker: CircuitBreaker) -> None:
+        """熔断时记录日志；半开探测失败重新熔断时不重复记录"""
+        logger.warning(
+            f"接口 {breaker.name} 错误率过高，熔断 {breaker.open_seconds:g} 秒: {breaker.last_error}"
+        )
+        if breaker.logged_open:
+            return
+        breaker.logged_open = True
+        self._record_event('open', breaker.name, breaker.last_error)
+
+    def _on_close(self, breaker: CircuitBreaker) -> None:
+        """恢复时记录日志：熔断期间被拒绝的请求数写入 records_count"""
+        logger.info(f"接口 {breaker.name} 已恢复，熔断期间拒绝 {breaker.rejected} 个请求")
+        rejected, breaker.rejected = breaker.rejected, 0
+        if breaker.logged_open:
+            breaker.logged_open = False
+            self._record_event('close', breaker.name, rejected)
+
+    def _record_event(self, kind: str, name: str, detail: Any) -> None:
+        """将熔断事件交给后台线程写入 DataUpdateLog"""
+        if not self.record_events:
+            return
+
+        with self._lock:
+            if self._event_thread is None:
+                self._event_thread = threading.Thread(
+                    target=self._write_events, name='circuit-events', daemon=True
+                )
+                self._event_thread.start()
+        self._events.put((kind, name, detail))
+
+    def _write_events(self) -> None:
+        """后台线程：按顺序写入熔断事件"""
+        from ..database.connection import db_manager
+        from ..database.crud import update_log_crud
+
+        while True:
+            kind, name, detail = self._events.get()
+            try:
+                with db_manager.isolated_session() as session:
+                    if kind == 'open':
+                        log = update_log_crud.create_log(session, f"circuit:{name}", status="FAILED")
+                        update_log_crud.update(session, log, {'error_message': detail})
+                        self._event_logs[name] = log.id
+                    else:
+                        log_id = self._event_logs.pop(name, None)
+                        log = update_log_crud.get(session, log_id) if log_id is not None else None
+                        if log is not None:
+                            update_log_crud.update(session, log, {
+                                'status': 'SUCCESS',
+                                'end_time': datetime.now(),
+                                'records_count': detail
+                            })
+            except Exception as e:
+                logger.warning(f"记录熔断日志失败（{kind} {name}）: {e}")
+            finally:
+                self._events.task_done()
+
+    def flush_events(self) -> None:
+        """等待已产生的熔断事件写入完成"""
+        self._events.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取统计
+
+        Returns:
+            Dict[str, Any]: 请求、重试、失败、不可重试错误次数及各接口熔断器状态
+        """
+        with self._lock:
+            breakers = dict(self._breakers)
+            summary = {
+                'calls': self.calls,
+                'retries': self.retries,
+                'failures': self.failures,
+                'fatal': self.fatal,
+            }
+        summary['circuits'] = {
+            name: {'state': breaker.state, 'rejected': breaker.rejected}
+            for name, breaker in breakers.items()
+        }
+        return summary
+
+
+# 全局重试策略实例，按 DataConfig 延迟创建
+_retry_policy: Optional[RetryPolicy] = None
+_retry_policy_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """获取全局重试策略"""
+    global _retry_policy
+
+    if _retry_policy is None:
+        with _retry_policy_lock:
+            if _retry_policy is None:
+                config = get_config().data
+                _retry_policy = RetryPolicy(
+                    max_retries=config.max_retries,
+                    base_delay=config.request_delay,
+                    max_delay=config.timeout,
+                    deadline=config.timeout,
+                    error_rate=config.circuit_error_rate,
+                    open_seconds=config.circuit_open_seconds
+                )
+
+    return _retry_policy
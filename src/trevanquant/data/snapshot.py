@@ -0,0 +1,249 @@
+"""
+全市场收盘快照入库
+收盘后一次请求获取全市场行情表，向量化转换为 daily_data 行；
+快照中缺失的股票才逐只获取历史日线补齐
+"""
+
+from datetime import date, datetime, time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .executor import FetchExecutor, get_fetch_executor
+from .source import get_data_source
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 全市场实时行情表（akshare stock_zh_a_spot_em）列名到 daily_data 字段的映射
+SPOT_COLUMNS = {
+    '代码': 'stock_code',
+    '今开': 'open_price',
+    '最高': 'high_price',
+    '最低': 'low_price',
+    '最新价': 'close_price',
+    '成交量': 'volume',
+    '成交额': 'amount',
+    '涨跌额': 'change_amount',
+    '涨跌幅': 'change_percent',
+    '换手率': 'turnover_rate',
+}
+
+# 个股历史日线（akshare stock_zh_a_hist）列名到 daily_data 字段的映射
+HISTORY_COLUMNS = {
+    '日期': 'trade_date',
+    '开盘': 'open_price',
+    '最高': 'high_price',
+    '最低': 'low_price',
+    '收盘': 'close_price',
+    '成交量': 'volume',
+    '成交额': 'amount',
+    '涨跌额': 'change_amount',
+    '涨跌幅': 'change_percent',
+    '换手率': 'turnover_rate',
+}
+
+# A股收盘时间，此后行情表的最新价即当日收盘价
+MARKET_CLOSE = time(15, 0)
+
+# daily_data 中不允许为空的数值字段
+REQUIRED_FIELDS = ('open_price', 'high_price', 'low_price', 'close_price', 'volume')
+
+
+def fetch_spot() -> pd.DataFrame:
+    """获取全市场实时行情表"""
+    return get_data_source().call('stock_zh_a_spot_em')
+
+
+def fetch_history(stock_code: str, start_date: date, end_date: date) -> pd.DataFrame:
+    """获取个股历史日线（不复权，daily_data 字段），多个提供方对冲请求"""
+    from .providers import fetch_daily_bars
+    return fetch_daily_bars(stock_code, start_date, end_date)
+
+
+def frame_to_rows(df: pd.DataFrame, columns: Dict[str, str]) -> pd.DataFrame:
+    """
+    将行情表向量化转换为 daily_data 字段
+
+    按列整体转换数值类型，不逐行处理。
+
+    Args:
+        df: 原始行情表
+        columns: 列名映射
+
+    Returns:
+        pd.DataFrame: 只包含 daily_data 字段的数据，必填字段缺失的行（如停牌）已剔除；
+            原始表缺少必填列（如接口返回空表）时为只有列名的空表
+    """
+    if df is None:
+        df = pd.DataFrame()
+
+    frame = df[[name for name in columns if name in df.columns]].rename(columns=columns)
+    if any(name not in frame.columns for name in REQUIRED_FIELDS):
+        return pd.DataFrame(columns=list(dict.fromkeys(columns.values())))
+
+    numeric = [name for name in frame.columns if name not in ('stock_code', 'trade_date')]
+    frame[numeric] = frame[numeric].apply(pd.to_numeric, errors='coerce')
+
+    if 'stock_code' in frame.columns:
+        frame['stock_code'] = frame['stock_code'].astype(str).str.zfill(6)
+    if 'trade_date' in frame.columns:
+        frame['trade_date'] = pd.to_datetime(frame['trade_date']).dt.date
+
+    valid = frame[list(REQUIRED_FIELDS)].notna().all(axis=1) & (frame['volume'] > 0)
+    return frame[valid]
+
+
+def to_records(frame: pd.DataFrame) -> List[dict]:
+    """转换为字典列表，NaN 转为 None"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+class MarketSnapshotLoader:
+    """全市场收盘快照入库"""
+
+    def __init__(
+        self,
+        spot_fetcher: Callable[[], pd.DataFrame] = fetch_spot,
+        history_fetcher: Callable[[str, date, date], pd.DataFrame] = fetch_history,
+        fetch_executor: Optional[FetchExecutor] = None
+    ):
+        """
+        初始化快照入库
+
+        Args:
+            spot_fetcher: 获取全市场行情表的函数
+            history_fetcher: 获取个股历史日线的函数 (代码, 开始日期, 结束日期)，
+                返回 daily_data 字段的 DataFrame
+            fetch_executor: 限速执行器，默认全局执行器
+        """
+        self.spot_fetcher = spot_fetcher
+        self.history_fetcher = history_fetcher
+        self._fetch_executor = fetch_executor
+
+    @property
+    def fetch_executor(self) -> FetchExecutor:
+        """限速执行器"""
+        if self._fetch_executor is None:
+            self._fetch_executor = get_fetch_executor()
+        return self._fetch_executor
+
+    def snapshot_rows(self, spot: pd.DataFrame, trade_date: date) -> List[dict]:
+        """将全市场行情表转换为指定交易日的 daily_data 行"""
+        frame = frame_to_rows(spot, SPOT_COLUMNS)
+        frame = frame.assign(trade_date=trade_date)
+        return to_records(frame)
+
+    def sync(
+        self,
+        trade_date: Optional[date] = None,
+        stock_codes: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        以收盘快照同步当日的日线数据
+
+        行情表只有实时行情，只能同步今天且须在收盘（MARKET_CLOSE）之后运行，
+        此时行情表的最新价即收盘价；历史日期应通过个股历史日线回填。
+
+        Args:
+            trade_date: 交易日期，默认今天，不能是其他日期
+            stock_codes: 应有数据的股票，默认 stocks 表中未退市的全部股票
+
+        Returns:
+            Dict[str, Any]: 快照行数、停牌数、补齐的股票和行数、失败的股票、
+                请求次数及写库计数
+        """
+        from ..database.calendar import trading_calendar
+        from ..database.connection import db_manager
+        from ..database.crud import daily_data_crud, no_data_range_crud
+        from ..database.stock_cache import stock_metadata_cache
+
+        now = datetime.now()
+        trade_date = trade_date or now.date()
+        if trade_date != now.date():
+            return {
+                'success': False,
+                'trade_date': trade_date,
+                'error': f"行情快照只有今天的实时行情，不能用于 {trade_date}"
+            }
+        if not trading_calendar.is_trading_day(trade_date):
+            logger.info(f"{trade_date} 不是交易日，跳过快照同步")
+            return {'success': True, 'skipped': True, 'trade_date': trade_date}
+        if now.time() < MARKET_CLOSE:
+            return {
+                'success': False,
+                'trade_date': trade_date,
+                'error': f"尚未收盘（{MARKET_CLOSE:%H:%M}），行情快照不是收盘价"
+            }
+
+        logger.info(f"开始同步 {trade_date} 全市场收盘快照")
+
+        spot = self.fetch_executor.call(self.spot_fetcher)
+        if spot is None or spot.empty or '代码' not in spot.columns:
+            logger.error("全市场行情表为空，跳过快照同步")
+            return {
+                'success': False, 'trade_date': trade_date, 'error': '行情表为空', 'requests': 1
+            }
+
+        rows = self.snapshot_rows(spot, trade_date)
+        listed = set(spot['代码'].astype(str).str.zfill(6))
+
+        with db_manager.session_scope() as session:
+            if stock_codes is None:
+                stock_codes = [
+                    code for code, info in stock_metadata_cache.all(session).items()
+                    if not info['is_delisted']
+                ]
+
+        # 快照中有记录但无成交的视为停牌，不再单独请求
+        missing = sorted(set(stock_codes) - listed)
+
+        fallback_rows: List[dict] = []
+        empty: List[str] = []
+        errors: Dict[str, str] = {}
+        if missing:
+            logger.info(f"快照缺少 {len(missing)} 只股票，逐只获取补齐")
+            report = self.fetch_executor.run(
+                lambda code: self.history_fetcher(code, trade_date, trade_date), missing
+            )
+            errors = report['errors']
+            for code, df in report['results'].items():
+                if df is None or df.empty:
+                    empty.append(code)
+                    continue
+                frame = df.assign(stock_code=code)
+                records = to_records(frame[frame['trade_date'] == trade_date])
+                if not records:
+                    empty.append(code)
+                fallback_rows.extend(records)
+
+        suspended = listed - {row['stock_code'] for row in rows}
+
+        with db_manager.session_scope() as session:
+            counts = daily_data_crud.batch_upsert(session, rows + fallback_rows)
+            # 停牌和补齐请求未返回当日数据的股票，增量同步计划不再请求该日
+            no_data_range_crud.record(session, [
+                (code, trade_date, trade_date) for code in sorted(suspended | set(empty))
+            ])
+
+        result = {
+            'success': True,
+            'trade_date': trade_date,
+            'snapshot_rows': len(rows),
+            'suspended': len(suspended),
+            'fallback_stocks': len(missing),
+            'fallback_rows': len(fallback_rows),
+            'errors': errors,
+            'requests': 1 + len(missing),
+            'upsert': counts
+        }
+
+        logger.info(
+            f"快照同步完成: 快照 {result['snapshot_rows']} 行，补齐 {result['fallback_rows']} 行，"
+            f"请求 {result['requests']} 次，新增 {counts['inserted']}，更新 {counts['updated']}"
+        )
+        return result
+
+
+# 创建全局快照入库实例
+market_snapshot_loader = MarketSnapshotLoader()
@@ -0,0 +1,304 @@
+"""
+数据源接口
+所有对上游数据源的调用都经 DataSource.call(接口名, **参数) 进行，可切换为:
+    live    直接调用akshare（经响应缓存）
+    record  直接调用akshare（不经响应缓存）并将响应（含异常）和真实耗时写入本地存档
+    replay  从存档回放响应，可注入延迟和错误，不访问网络
+各模式的数据源都经 RetryingSource 按统一的重试与熔断策略调用
+"""
+
+import hashlib
+import json
+import pickle
+import random
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .cache import cached_call
+from .retry import RetryPolicy, get_retry_policy
+from ..utils.config import get_config
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ReplayMissError(LookupError):
+    """回放存档中没有对应的请求"""
+
+
+class InjectedError(ConnectionError):
+    """回放时注入的模拟网络错误"""
+
+
+class ReplayedError(Exception):
+    """回放录制时上游抛出的异常"""
+
+    def __init__(self, error_type: str, message: str):
+        super().__init__(f"{error_type}: {message}")
+        self.error_type = error_type
+
+
+def request_key(name: str, kwargs: Dict[str, Any]) -> str:
+    """计算请求键（接口名和参数的哈希）"""
+    payload = json.dumps({'name': name, 'kwargs': kwargs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DataSource(ABC):
+    """数据源基类"""
+
+    @abstractmethod
+    def call(self, name: str, **kwargs) -> Any:
+        """
+        调用数据源接口
+
+        Args:
+            name: 接口名，如 stock_zh_a_hist
+            **kwargs: 接口参数（只使用关键字参数，保证请求键稳定）
+
+        Returns:
+            Any: 接口响应
+        """
+
+    def attempt(self, name: str, **kwargs) -> Any:
+        """单次调用，不重试；调用方自行切换数据源时使用。默认与 call 相同"""
+        return self.call(name, **kwargs)
+
+
+class AkshareSource(DataSource):
+    """akshare 数据源"""
+
+    def __init__(self, cached: bool = True):
+        """
+        初始化akshare数据源
+
+        Args:
+            cached: 是否经响应缓存调用；录制时关闭，存档记录的是上游的真实响应和耗时
+        """
+        self.cached = cached
+
+    def call(self, name: str, **kwargs) -> Any:
+        import akshare as ak
+        if self.cached:
+            return cached_call(getattr(ak, name), **kwargs)
+        return getattr(ak, name)(**kwargs)
+
+
+class RetryingSource(DataSource):
+    """重试与熔断：按 RetryPolicy 调用内部数据源，每个接口独立熔断"""
+
+    def __init__(self, inner: DataSource, policy: Optional[RetryPolicy] = None):
+        """
+        初始化重试数据源
+
+        Args:
+            inner: 实际发起请求的数据源
+            policy: 重试策略，默认全局策略
+        """
+        self.inner = inner
+        self.policy = policy or get_retry_policy()
+
+    def call(self, name: str, **kwargs) -> Any:
+        return self.policy.call(name, self.inner.call, name, **kwargs)
+
+    def attempt(self, name: str, **kwargs) -> Any:
+        return self.policy.attempt(name, self.inner.call, name, **kwargs)
+
+
+class RecordingSource(DataSource):
+    """
+    录制数据源：转发到内部数据源，并将响应写入存档
+
+    内部数据源应不经响应缓存（AkshareSource(cached=False)），否则命中缓存的
+    请求会以接近零的耗时录入存档。
+
+    存档目录: {archive}/index.jsonl 每个请求一行（接口名、参数、耗时、是否异常），
+    {archive}/responses/{键}.bin 为 zlib 压缩的 pickle 响应。
+    """
+
+    def __init__(self, inner: DataSource, archive: Union[str, Path]):
+        """
+        初始化录制数据源
+
+        Args:
+            inner: 实际发起请求的数据源
+            archive: 存档目录
+        """
+        self.inner = inner
+        self.archive = Path(archive)
+        (self.archive / 'responses').mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def call(self, name: str, **kwargs) -> Any:
+        start = time.perf_counter()
+        error = None
+        try:
+            response = self.inner.call(name, **kwargs)
+        except Exception as e:
+            error = e
+        latency = time.perf_counter() - start
+
+        self._save(name, kwargs, latency, response if error is None else None, error)
+
+        if error is not None:
+            raise error
+        return response
+
+    def _save(
+        self,
+        name: str,
+        kwargs: Dict[str, Any],
+        latency: float,
+        response: Any,
+        error: Optional[Exception]
+    ) -> None:
+        """写入一次请求的响应和索引"""
+        key = request_key(name, kwargs)
+        payload = {
+            'response': response,
+            'error': None if error is None else (type(error).__name__, str(error))
+        }
+        with open(self.archive / 'responses' / f'{key}.bin', 'wb') as f:
+            f.write(zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)))
+
+        entry = {
+            'key': key,
+            'name': name,
+            'kwargs': kwargs,
+            'latency': latency,
+            'error': error is not None
+        }
+        with self._lock, open(self.archive / 'index.jsonl', 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+
+
+class ReplaySource(DataSource):
+    """回放数据源：从存档返回录制的响应，不访问网络"""
+
+    def __init__(
+        self,
+        archive: Union[str, Path],
+        latency: Union[str, float, None] = 'recorded',
+        latency_scale: float = 1.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        初始化回放数据源
+
+        Args:
+            archive: 存档目录
+            latency: 'recorded' 按录制耗时等待，数值为固定等待秒数，None 不等待
+            latency_scale: 等待时间的缩放系数
+            error_rate: 注入 InjectedError 的概率
+            seed: 随机数种子，用于复现注入的错误
+        """
+        self.archive = Path(archive)
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # 同一请求录制多次时以最后一次为准
+        self._index: Dict[str, dict] = {}
+        index_file = self.archive / 'index.jsonl'
+        if index_file.exists():
+            with open(index_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._index[entry['key']] = entry
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def call(self, name: str, **kwargs) -> Any:
+        key = request_key(name, kwargs)
+        entry = self._index.get(key)
+        if entry is None:
+            raise ReplayMissError(f"存档中没有请求: {name}({kwargs})")
+
+        if self.latency == 'recorded':
+            delay = entry['latency']
+        else:
+            delay = self.latency or 0.0
+        if delay:
+            time.sleep(delay * self.latency_scale)
+
+        with self._lock:
+            inject = self.error_rate > 0 and self._random.random() < self.error_rate
+        if inject:
+            raise InjectedError(f"注入错误: {name}")
+
+        with open(self.archive / 'responses' / f'{key}.bin', 'rb') as f:
+            payload = pickle.loads(zlib.decompress(f.read()))
+
+        if payload['error'] is not None:
+            raise ReplayedError(*payload['error'])
+        return payload['response']
+
+
+# 全局数据源实例，按 DataConfig.source_mode 延迟创建
+_data_source: Optional[DataSource] = None
+_data_source_lock = threading.Lock()
+
+
+def create_data_source(
+    mode: str,
+    archive: str = '',
+    latency_scale: float = 1.0,
+    error_rate: float = 0.0
+) -> DataSource:
+    """
+    按模式创建数据源，外层包装重试与熔断
+
+    Args:
+        mode: live / record / replay
+        archive: record 和 replay 模式的存档目录
+        latency_scale: replay 模式录制耗时的缩放系数
+        error_rate: replay 模式注入错误的概率
+    """
+    if mode == 'live':
+        return RetryingSource(AkshareSource())
+    if not archive:
+        raise ValueError(f"{mode} 模式需要配置存档目录（DATA_SOURCE_ARCHIVE）")
+    if mode == 'record':
+        return RetryingSource(RecordingSource(AkshareSource(cached=False), archive))
+    if mode == 'replay':
+        return RetryingSource(
+            ReplaySource(archive, latency_scale=latency_scale, error_rate=error_rate)
+        )
+    raise ValueError(f"未知的数据源模式: {mode}")
+
+
+def get_data_source() -> DataSource:
+    """获取全局数据源"""
+    global _data_source
+
+    if _data_source is None:
+        with _data_source_lock:
+            if _data_source is None:
+                config = get_config().data
+                _data_source = create_data_source(
+                    config.source_mode,
+                    config.source_archive,
+                    latency_scale=config.replay_latency_scale,
+                    error_rate=config.replay_error_rate
+                )
+                if config.source_mode != 'live':
+                    logger.info(f"数据源模式: {config.source_mode} ({config.source_archive})")
+
+    return _data_source
+
+
+def set_data_source(source: Optional[DataSource]) -> None:
+    """替换全局数据源（None 表示按配置重新创建），用于基准测试和离线运行"""
+    global _data_source
+
+    with _data_source_lock:
+        _data_source = source
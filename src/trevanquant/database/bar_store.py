@@ -0,0 +1,533 @@
+"""
+列式K线存储
+按年份分区，每个字段一个 (股票 × 自然日) 的内存映射数组，与 daily_data 保持同步
+"""
+
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Dict, Generator, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..utils.config import get_config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _lock_file(f) -> None:
+    """对打开的文件加进程间排他锁（阻塞）"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f) -> None:
+    """释放进程间排他锁"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _pid_alive(pid: int) -> bool:
+    """进程是否仍在运行；无法判断时视为在运行"""
+    if pid <= 0:
+        return False
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class BarStore:
+    """
+    列式K线存储
+
+    目录结构:
+        {root}/meta.json            股票轴（代码顺序即列号）和容量
+        {root}/{year}/{field}.npy   形状为 (容量, 366) 的数组，第二维为年内第几天
+        {root}/pending/*.json       未完成的写入：日期范围和写入进程
+        {root}/.lock                进程间写锁
+
+    每只股票在一个年份内的数据连续存放，读取单只股票或单个日期
+    都是对内存映射数组的切片，不复制数据。未交易的日期为NaN。
+
+    多个进程共用同一存储时，元数据的读改写、扩容和写入都在 .lock 文件锁内进行，
+    并在加锁后重新加载其他进程修改过的元数据。写 daily_data 前先用 begin_write
+    登记日期范围，写完列式存储后 end_write 删除；进程崩溃留下的登记即为
+    需要从 daily_data 补写的范围（stale_ranges）。
+    """
+
+    # 存储的字段，与 daily_data 列名一致
+    fields = (
+        'open_price', 'high_price', 'low_price', 'close_price',
+        'volume', 'amount', 'turnover_rate'
+    )
+
+    # 每个年份分区的日期槽位数
+    days_per_year = 366
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        stock_capacity: int = 8192,
+        dtype: np.dtype = np.float64
+    ):
+        """
+        初始化列式存储
+
+        Args:
+            root: 存储根目录
+            stock_capacity: 新建存储时的股票容量，超出时自动扩容
+            dtype: 数组类型
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._arrays: Dict[Tuple[int, str], np.memmap] = {}
+        self._active_writes: Set[str] = set()
+
+        self._meta_stamp = self._stat_meta()
+        meta = self._load_meta()
+        self.capacity: int = meta.get('capacity', stock_capacity)
+        self.stock_codes: List[str] = meta.get('stock_codes', [])
+        if 'dtype' in meta:
+            self.dtype = np.dtype(meta['dtype'])
+        self._stock_index = {code: i for i, code in enumerate(self.stock_codes)}
+
+    @contextmanager
+    def _file_lock(self) -> Generator[None, None, None]:
+        """进程间写锁（同一线程可重入），加锁后重新加载元数据"""
+        with self._lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+
+            with open(self.root / '.lock', 'a+b') as f:
+                _lock_file(f)
+                self._lock_depth = 1
+                try:
+                    self._refresh_meta()
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    _unlock_file(f)
+
+    # ------------------------------------------------------------------
+    # 元数据
+    # ------------------------------------------------------------------
+
+    def _load_meta(self) -> dict:
+        """读取元数据"""
+        meta_file = self.root / 'meta.json'
+        if not meta_file.exists():
+            return {}
+        with open(meta_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _stat_meta(self) -> Optional[Tuple[int, int, int]]:
+        """元数据文件的 (inode, 修改时间, 大小)，用于判断是否被其他进程改写"""
+        try:
+            stat = (self.root / 'meta.json').stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _refresh_meta(self) -> None:
+        """元数据被其他进程改写时重新加载；容量变化时重新打开数组"""
+        with self._lock:
+            stamp = self._stat_meta()
+            if stamp is None or stamp == self._meta_stamp:
+                return
+
+            meta = self._load_meta()
+            self._meta_stamp = stamp
+            self.stock_codes = meta.get('stock_codes', [])
+            self._stock_index = {code: i for i, code in enumerate(self.stock_codes)}
+            if meta.get('capacity', self.capacity) != self.capacity:
+                self.capacity = meta['capacity']
+                self._arrays.clear()
+
+    def _save_meta(self) -> None:
+        """原子写入元数据（调用方持有文件锁）"""
+        meta_file = self.root / 'meta.json'
+        tmp_file = meta_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'capacity': self.capacity,
+                'dtype': self.dtype.str,
+                'stock_codes': self.stock_codes
+            }, f)
+        os.replace(tmp_file, meta_file)
+        self._meta_stamp = self._stat_meta()
+
+    def _ensure_stocks(self, stock_codes: Iterable[str]) -> None:
+        """为新股票分配列号，必要时扩容"""
+        with self._file_lock():
+            new_codes = [
+                code for code in dict.fromkeys(stock_codes) if code not in self._stock_index
+            ]
+            if not new_codes:
+                return
+
+            for code in new_codes:
+                self._stock_index[code] = len(self.stock_codes)
+                self.stock_codes.append(code)
+
+            if len(self.stock_codes) > self.capacity:
+                self._grow(max(self.capacity * 2, len(self.stock_codes)))
+
+            self._save_meta()
+
+    def _grow(self, capacity: int) -> None:
+        """扩大所有年份分区的股票容量（调用方持有文件锁）"""
+        self._arrays.clear()
+
+        for year in self.years():
+            for field in self.fields:
+                path = self._path(year, field)
+                if not path.exists():
+                    continue
+
+                old = np.load(path, mmap_mode='r')
+                tmp_path = path.with_suffix('.tmp.npy')
+                new = np.lib.format.open_memmap(
+                    tmp_path, mode='w+', dtype=self.dtype,
+                    shape=(capacity, self.days_per_year)
+                )
+                new[:old.shape[0]] = old
+                new[old.shape[0]:] = np.nan
+                new.flush()
+                del old, new
+                os.replace(tmp_path, path)
+
+        self.capacity = capacity
+
+    # ------------------------------------------------------------------
+    # 分区文件
+    # ------------------------------------------------------------------
+
+    def _path(self, year: int, field: str) -> Path:
+        """分区字段文件路径"""
+        return self.root / str(year) / f'{field}.npy'
+
+    def years(self) -> List[int]:
+        """已存在的年份分区"""
+        return sorted(
+            int(path.name) for path in self.root.iterdir()
+            if path.is_dir() and path.name.isdigit()
+        )
+
+    def _array(self, year: int, field: str, create: bool = False) -> Optional[np.memmap]:
+        """获取分区字段的内存映射数组"""
+        with self._lock:
+            if not self._lock_depth:
+                # 未持有文件锁的读取：其他进程扩容后重新打开数组
+                self._refresh_meta()
+
+            key = (year, field)
+            if key in self._arrays:
+                return self._arrays[key]
+
+            path = self._path(year, field)
+            if path.exists():
+                array = np.load(path, mmap_mode='r+')
+            elif create:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                array = np.lib.format.open_memmap(
+                    path, mode='w+', dtype=self.dtype,
+                    shape=(self.capacity, self.days_per_year)
+                )
+                array[:] = np.nan
+            else:
+                return None
+
+            self._arrays[key] = array
+            return array
+
+    @staticmethod
+    def _to_date(value: Union[date, str]) -> date:
+        """统一日期类型"""
+        return date.fromisoformat(value) if isinstance(value, str) else value
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def write(self, data_list: Sequence[dict]) -> int:
+        """
+        写入日线数据
+
+        Args:
+            data_list: 日线数据字典列表，字段与 daily_data 一致；
+                缺少的字段保持原值不变
+
+        Returns:
+            int: 写入的行数
+        """
+        if not data_list:
+            return 0
+
+        with self._file_lock():
+            self._ensure_stocks(data['stock_code'] for data in data_list)
+
+            # 按年份分组，按字段批量写入
+            by_year: Dict[int, List[dict]] = {}
+            for data in data_list:
+                trade_date = self._to_date(data['trade_date'])
+                by_year.setdefault(trade_date.year, []).append(data)
+
+            for year, rows in by_year.items():
+                year_start = date(year, 1, 1)
+                for field in self.fields:
+                    present = [data for data in rows if field in data]
+                    if not present:
+                        continue
+
+                    stock_index = np.fromiter(
+                        (self._stock_index[data['stock_code']] for data in present),
+                        dtype=np.int64, count=len(present)
+                    )
+                    day_index = np.fromiter(
+                        ((self._to_date(data['trade_date']) - year_start).days for data in present),
+                        dtype=np.int64, count=len(present)
+                    )
+                    values = np.array([data[field] for data in present], dtype=self.dtype)
+
+                    array = self._array(year, field, create=True)
+                    array[stock_index, day_index] = values
+
+            self.flush()
+
+        return len(data_list)
+
+    def flush(self) -> None:
+        """将修改写回磁盘"""
+        for array in self._arrays.values():
+            array.flush()
+
+    # ------------------------------------------------------------------
+    # 未完成写入登记
+    # ------------------------------------------------------------------
+
+    def begin_write(self, start_date: Union[date, str], end_date: Union[date, str]) -> Path:
+        """
+        登记即将写入的日期范围，应在写 daily_data 之前调用
+
+        Returns:
+            Path: 登记文件，写完列式存储后传给 end_write
+        """
+        pending = self.root / 'pending'
+        pending.mkdir(exist_ok=True)
+        path = pending / f'{os.getpid()}-{uuid.uuid4().hex}.json'
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'pid': os.getpid(),
+                'start_date': self._to_date(start_date).isoformat(),
+                'end_date': self._to_date(end_date).isoformat()
+            }, f)
+        with self._lock:
+            self._active_writes.add(path.name)
+        return path
+
+    def end_write(self, path: Path, failed: bool = False) -> None:
+        """
+        结束登记的写入
+
+        Args:
+            path: begin_write 返回的登记文件
+            failed: 列式存储写入失败时保留登记并标记为待补写
+        """
+        with self._lock:
+            self._active_writes.discard(path.name)
+
+        if not failed:
+            path.unlink(missing_ok=True)
+            return
+
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        entry['pid'] = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+
+    def stale_ranges(self) -> List[Tuple[Path, date, date]]:
+        """
+        需要从 daily_data 补写的日期范围
+
+        写入进程已退出、本进程中已失败或由本进程的前一次运行留下的登记。
+
+        Returns:
+            List[Tuple[Path, date, date]]: (登记文件, 开始日期, 结束日期)
+        """
+        pending = self.root / 'pending'
+        if not pending.exists():
+            return []
+
+        pid = os.getpid()
+        with self._lock:
+            active = set(self._active_writes)
+
+        ranges = []
+        for path in sorted(pending.glob('*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+
+            if entry['pid'] == pid:
+                stale = path.name not in active
+            else:
+                stale = not _pid_alive(entry['pid'])
+            if stale:
+                ranges.append((
+                    path,
+                    date.fromisoformat(entry['start_date']),
+                    date.fromisoformat(entry['end_date'])
+                ))
+        return ranges
+
+    # ------------------------------------------------------------------
+    # 读取
+    # ------------------------------------------------------------------
+
+    def stock_slice(self, stock_code: str, year: int, field: str) -> Optional[np.ndarray]:
+        """
+        获取单只股票在某年的字段序列（零拷贝视图）
+
+        Returns:
+            Optional[np.ndarray]: 长度366的数组，下标为年内第几天；无数据时为None
+        """
+        array = self._array(year, field)
+        index = self._stock_index.get(stock_code)
+        if index is None or array is None:
+            return None
+        return array[index]
+
+    def date_slice(self, trade_date: date, field: str) -> Optional[np.ndarray]:
+        """
+        获取某日全部股票的字段值（零拷贝视图）
+
+        Returns:
+            Optional[np.ndarray]: 按 stock_codes 顺序排列的数组；无数据时为None
+        """
+        trade_date = self._to_date(trade_date)
+        array = self._array(trade_date.year, field)
+        if array is None:
+            return None
+        day = (trade_date - date(trade_date.year, 1, 1)).days
+        return array[:len(self.stock_codes), day]
+
+    def read(
+        self,
+        stock_code: str,
+        start_date: date,
+        end_date: date,
+        fields: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        读取单只股票的日期区间数据
+
+        Args:
+            stock_code: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            fields: 字段列表，默认全部字段
+
+        Returns:
+            pd.DataFrame: 以 trade_date(datetime64) 为索引，只包含有数据的交易日
+        """
+        fields = list(fields or self.fields)
+        unknown = [name for name in fields if name not in self.fields]
+        if unknown:
+            raise ValueError(f"列式存储不包含字段: {unknown}")
+
+        start_date = self._to_date(start_date)
+        end_date = self._to_date(end_date)
+
+        dates = []
+        columns: Dict[str, List[np.ndarray]] = {name: [] for name in fields}
+
+        for year in range(start_date.year, end_date.year + 1):
+            year_start = date(year, 1, 1)
+            first = (max(start_date, year_start) - year_start).days
+            last = (min(end_date, date(year, 12, 31)) - year_start).days + 1
+
+            slices = {name: self.stock_slice(stock_code, year, name) for name in fields}
+            if all(values is None for values in slices.values()):
+                continue
+
+            block = np.vstack([
+                values[first:last] if values is not None
+                else np.full(last - first, np.nan, dtype=self.dtype)
+                for values in slices.values()
+            ])
+            traded = ~np.isnan(block).all(axis=0)
+
+            dates.append(
+                np.datetime64(year_start, 'D') + np.arange(first, last)[traded]
+            )
+            for row, name in zip(block, fields):
+                columns[name].append(row[traded])
+
+        if not dates:
+            return pd.DataFrame(
+                {name: np.array([], dtype=self.dtype) for name in fields},
+                index=pd.DatetimeIndex([], name='trade_date')
+            )
+
+        return pd.DataFrame(
+            {name: np.concatenate(parts) for name, parts in columns.items()},
+            index=pd.DatetimeIndex(np.concatenate(dates), name='trade_date')
+        )
+
+
+# 全局列式存储实例，按 DatabaseConfig.bar_store_path 延迟创建
+_bar_store: Optional[BarStore] = None
+_bar_store_lock = threading.Lock()
+
+
+def get_bar_store() -> Optional[BarStore]:
+    """
+    获取配置的列式存储
+
+    Returns:
+        Optional[BarStore]: 未配置 bar_store_path 时为None
+    """
+    global _bar_store
+
+    if _bar_store is None:
+        path = get_config().database.bar_store_path
+        if not path:
+            return None
+        with _bar_store_lock:
+            if _bar_store is None:
+                _bar_store = BarStore(path)
+
+    return _bar_store
@@ -0,0 +1,302 @@
+"""
+交易日历
+从 trading_calendar 表加载开市日，在内存中以有序数组和位图建立索引，
+交易日判断、前后交易日和区间交易日数均为 O(1)。
+日历覆盖范围之外按工作日（周一至周五）推算。
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .connection import db_manager
+from .crud import trading_calendar_crud
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TradingCalendar:
+    """
+    交易日历索引
+
+    以日历第一个开市日为起点（偏移0），维护三个数组:
+        _dates    有序的开市日序数（date.toordinal）
+        _is_open  按偏移索引的位图，当日是否开市
+        _rank     按偏移索引的累计开市日数（含当日）
+    """
+
+    # 加载失败后重试的间隔秒数
+    retry_seconds = 60
+
+    def __init__(self):
+        """初始化交易日历，首次使用时从数据库加载"""
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._retry_at = 0.0
+        self._set(np.empty(0, dtype=np.int64))
+
+    # ------------------------------------------------------------------
+    # 加载
+    # ------------------------------------------------------------------
+
+    def _set(self, ordinals: np.ndarray) -> None:
+        """根据开市日序数重建索引"""
+        self._dates = ordinals
+        if len(ordinals) == 0:
+            self._first = self._last = 0
+            self._is_open = np.zeros(0, dtype=bool)
+            self._rank = np.zeros(0, dtype=np.int64)
+            return
+
+        self._first = int(ordinals[0])
+        self._last = int(ordinals[-1])
+        is_open = np.zeros(self._last - self._first + 1, dtype=bool)
+        is_open[ordinals - self._first] = True
+        self._is_open = is_open
+        self._rank = np.cumsum(is_open, dtype=np.int64)
+
+    def set_dates(self, trade_dates: Iterable[date]) -> None:
+        """直接设置开市日（不写入数据库）"""
+        ordinals = np.unique(np.fromiter(
+            (trade_date.toordinal() for trade_date in trade_dates), dtype=np.int64
+        ))
+        with self._lock:
+            self._set(ordinals)
+            self._loaded = True
+
+    def load(self, session: Optional[Session] = None) -> int:
+        """
+        从 trading_calendar 表加载开市日
+
+        Args:
+            session: 数据库会话，默认使用只读会话
+
+        Returns:
+            int: 加载的交易日数
+        """
+        if session is None:
+            with db_manager.session_scope(readonly=True) as session:
+                trade_dates = trading_calendar_crud.get_dates(session)
+        else:
+            trade_dates = trading_calendar_crud.get_dates(session)
+
+        self.set_dates(trade_dates)
+        return len(trade_dates)
+
+    def invalidate(self) -> None:
+        """使索引失效，下次使用时重新加载"""
+        with self._lock:
+            self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        """
+        按需加载，同一时刻只有一个线程访问数据库
+
+        加载失败时沿用当前索引（初始为空，即按工作日推算），
+        retry_seconds 秒后再次尝试加载。
+        """
+        if self._loaded or time.monotonic() < self._retry_at:
+            return
+
+        with self._load_lock:
+            if self._loaded or time.monotonic() < self._retry_at:
+                return
+            try:
+                self.load()
+                self._retry_at = 0.0
+            except Exception as e:
+                self._retry_at = time.monotonic() + self.retry_seconds
+                logger.error(f"加载交易日历失败，{self.retry_seconds} 秒后重试，期间按当前索引推算: {e}")
+
+    def refresh(self) -> int:
+        """
+        从akshare获取交易日历并写入数据库
+
+        Returns:
+            int: 写入的交易日数
+        """
+        import akshare as ak
+
+        df = ak.tool_trade_date_hist_sina()
+        trade_dates = [
+            value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+            for value in df['trade_date']
+        ]
+
+        with db_manager.session_scope() as session:
+            count = trading_calendar_crud.replace_dates(session, trade_dates)
+
+        self.invalidate()
+        return count
+
+    @property
+    def coverage(self) -> Optional[tuple]:
+        """日历覆盖的日期范围 (首个开市日, 最后开市日)，为空时为None"""
+        self._ensure_loaded()
+        if len(self._dates) == 0:
+            return None
+        return date.fromordinal(self._first), date.fromordinal(self._last)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def _covers(self, ordinal: int) -> bool:
+        """日期是否在日历覆盖范围内"""
+        return len(self._dates) > 0 and self._first <= ordinal <= self._last
+
+    def _count_through(self, day: date) -> int:
+        """截至某日（含）的开市日累计数，覆盖范围外按工作日延伸"""
+        ordinal = day.toordinal()
+        if len(self._dates) == 0:
+            return int(np.busday_count(date(1970, 1, 1), day + timedelta(days=1)))
+        if ordinal < self._first:
+            return -int(np.busday_count(day + timedelta(days=1), date.fromordinal(self._first)))
+        if ordinal > self._last:
+            return int(self._rank[-1]) + int(
+                np.busday_count(date.fromordinal(self._last + 1), day + timedelta(days=1))
+            )
+        return int(self._rank[ordinal - self._first])
+
+    def is_trading_day(self, day: date) -> bool:
+        """是否为交易日"""
+        self._ensure_loaded()
+        ordinal = day.toordinal()
+        if self._covers(ordinal):
+            return bool(self._is_open[ordinal - self._first])
+        return day.weekday() < 5
+
+    def trading_days_between(self, start_date: date, end_date: date) -> int:
+        """闭区间 [start_date, end_date] 内的交易日数"""
+        self._ensure_loaded()
+        if end_date < start_date:
+            return 0
+        return self._count_through(end_date) - self._count_through(start_date - timedelta(days=1))
+
+    def nth_trading_day_back(self, day: date, n: int) -> date:
+        """
+        向前第n个交易日
+
+        Args:
+            day: 基准日期
+            n: 0 表示不晚于基准日期的最近交易日，1 表示其前一个交易日，依此类推
+
+        Returns:
+            date: 交易日
+        """
+        self._ensure_loaded()
+        if n < 0:
+            raise ValueError("n 不能为负数")
+
+        ordinal = day.toordinal()
+
+        # 基准日期晚于日历：先按工作日回退到日历末尾
+        if len(self._dates) and ordinal > self._last:
+            tail = int(np.busday_count(date.fromordinal(self._last + 1), day + timedelta(days=1)))
+            if n < tail:
+                return self._busday_back(day, n)
+            n -= tail
+            ordinal = self._last
+
+        if not self._covers(ordinal):
+            return self._busday_back(date.fromordinal(ordinal), n)
+
+        position = int(self._rank[ordinal - self._first]) - 1 - n
+        if position >= 0:
+            return date.fromordinal(int(self._dates[position]))
+
+        # 早于日历开始：从首个开市日之前按工作日继续回退
+        return self._busday_back(date.fromordinal(self._first - 1), -position - 1)
+
+    @staticmethod
+    def _busday_back(day: date, n: int) -> date:
+        """按工作日推算向前第n个交易日"""
+        result = np.busday_offset(np.datetime64(day, 'D'), -n, roll='backward')
+        return result.astype(object)
+
+    def prev_trading_day(self, day: date) -> date:
+        """严格早于某日的上一个交易日"""
+        return self.nth_trading_day_back(day - timedelta(days=1), 0)
+
+    def next_trading_day(self, day: date) -> date:
+        """严格晚于某日的下一个交易日"""
+        self._ensure_loaded()
+        ordinal = day.toordinal() + 1
+        if self._covers(ordinal):
+            position = int(self._rank[ordinal - self._first]) - int(self._is_open[ordinal - self._first])
+            return date.fromordinal(int(self._dates[position]))
+
+        result = np.busday_offset(
+            np.datetime64(date.fromordinal(ordinal), 'D'), 0, roll='forward'
+        ).astype(object)
+
+        # 早于日历开始时，推算结果不能越过首个开市日
+        if len(self._dates) and ordinal < self._first and result.toordinal() >= self._first:
+            return date.fromordinal(self._first)
+        return result
+
+    def days_back_start(self, days_back: int, end_date: Optional[date] = None) -> date:
+        """
+        将“最近N个交易日”换算为开始日期
+
+        Args:
+            days_back: 交易日数（至少为1）
+            end_date: 结束日期，默认今天
+
+        Returns:
+            date: 使 [开始日期, end_date] 恰好包含 days_back 个交易日的开始日期
+        """
+        end_date = end_date or date.today()
+        return self.nth_trading_day_back(end_date, max(days_back, 1) - 1)
+
+    def calendar_days_back(self, days_back: int, end_date: Optional[date] = None) -> int:
+        """
+        将“最近N个交易日”换算为自然日天数，供仍以自然日计的 days_back 参数使用
+
+        Args:
+            days_back: 交易日数（至少为1）
+            end_date: 结束日期，默认今天
+
+        Returns:
+            int: 覆盖这些交易日所需的自然日天数（含结束日期）
+        """
+        end_date = end_date or date.today()
+        return (end_date - self.days_back_start(days_back, end_date)).days + 1
+
+    def trading_days(self, start_date: date, end_date: date) -> List[date]:
+        """闭区间内的全部交易日，按日期升序"""
+        self._ensure_loaded()
+        start, end = start_date.toordinal(), end_date.toordinal()
+        if end < start:
+            return []
+
+        if len(self._dates) == 0:
+            return self._busdays(start, end)
+
+        inside = self._dates[(self._dates >= start) & (self._dates <= end)]
+        return (
+            self._busdays(start, min(end, self._first - 1))
+            + [date.fromordinal(int(ordinal)) for ordinal in inside]
+            + self._busdays(max(start, self._last + 1), end)
+        )
+
+    @staticmethod
+    def _busdays(start: int, end: int) -> List[date]:
+        """序数闭区间内的工作日"""
+        if end < start:
+            return []
+        days = np.arange(
+            np.datetime64(date.fromordinal(start), 'D'),
+            np.datetime64(date.fromordinal(end), 'D') + 1
+        )
+        return days[np.is_busday(days)].astype(object).tolist()
+
+
+# 创建全局交易日历实例
+trading_calendar = TradingCalendar()
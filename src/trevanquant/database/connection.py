@@ -4,80 +4,487 @@
 """
 
 import os
+import threading
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Generator
+from typing import Any, Dict, Generator, List, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Connection, Engine, URL, make_url
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
 
-from .models import Base
+from .models import Base, SCHEMA_VERSION
+from .partitions import PartitionManager
+from ..utils.config import get_config
+
+
+# SQLite PRAGMA 配置方案，通过 DatabaseConfig.pragma_profile 选择
+PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    # SQLite默认设置
+    "default": {},
+    # 常规运行：WAL日志 + NORMAL同步，适中的页缓存和内存映射
+    "serving": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,  # 64MB
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456,  # 256MB
+    },
+}
+
+# 大批量导入时的PRAGMA设置
+BULK_LOAD_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "cache_size": -1048576,  # 1GB
+    "temp_store": "MEMORY",
+    "mmap_size": 1073741824,  # 1GB
+}
+
+# 只读连接上不能（也无需）设置的PRAGMA
+WRITE_ONLY_PRAGMAS = ("journal_mode", "synchronous")
+
+# 批量导入时删除并重建二级索引的表
+BULK_LOAD_TABLES = ("daily_data", "technical_indicators", "indicator_daily")
+
+# 只保存可丢弃的临时状态的表，结构变化时直接重建
+TRANSIENT_TABLES = ("sync_checkpoints",)
 
 
 class DatabaseManager:
     """数据库管理器"""
 
-    def __init__(self, database_url: str = None):
+    def __init__(
+        self,
+        database_url: str = None,
+        pragma_profile: Optional[str] = None,
+        read_pool_size: Optional[int] = None,
+        partition_dir: Optional[str] = None
+    ):
         """
-        初始化数据库连接
+        初始化数据库管理器
+
+        引擎、会话工厂和表结构检查均延迟到首次使用时进行，
+        导入本模块不会打开数据库。
 
         Args:
-            database_url: 数据库连接URL，默认使用SQLite
+            database_url: 数据库连接URL，默认取 DatabaseConfig.url；
+                SQLite 相对路径按项目根目录解析
+            pragma_profile: SQLite PRAGMA配置方案，见 PRAGMA_PROFILES，
+                默认取 DatabaseConfig.pragma_profile
+            read_pool_size: 只读连接池大小。大于0时启用连接池模式：
+                一个写连接加N个以 mode=ro 打开的只读连接（WAL模式），
+                默认取 DatabaseConfig.read_pool_size
+            partition_dir: 年份分区目录，为空时不启用分区，
+                默认取 DatabaseConfig.partition_dir
         """
-        if database_url is None:
-            # 默认使用项目根目录下的database.db
-            project_root = Path(__file__).parent.parent.parent.parent.parent
-            db_path = project_root / "database.db"
-            database_url = f"sqlite:///{db_path}"
+        if pragma_profile is not None and pragma_profile not in PRAGMA_PROFILES:
+            raise ValueError(f"未知的PRAGMA配置方案: {pragma_profile}")
+
+        self._database_url = self._resolve_url(database_url) if database_url else None
+        self._pragma_profile = pragma_profile
+        self._read_pool_size = read_pool_size
+        self._partition_dir = partition_dir
+        self._init_lock = threading.RLock()
+        self._initialized = False
+
+        self._engine: Optional[Engine] = None
+        self._session_factory: Optional[sessionmaker] = None
+        self._read_engine: Optional[Engine] = None
+        self._read_session_factory: Optional[sessionmaker] = None
+        self._isolated_session_factory: Optional[sessionmaker] = None
+        self._partitions: Optional[PartitionManager] = None
+
+        # 各线程当前打开的写会话，嵌套的 session_scope 复用同一会话
+        self._local = threading.local()
+
+    @staticmethod
+    def _resolve_url(database_url: str) -> str:
+        """SQLite 相对路径按项目根目录解析，与工作目录无关"""
+        url = make_url(database_url)
+        database = url.database
+        if (
+            url.get_backend_name() != "sqlite"
+            or not database
+            or database == ":memory:"
+            or database.startswith("file:")
+            or Path(database).is_absolute()
+        ):
+            return database_url
+
+        project_root = Path(__file__).parent.parent.parent.parent.parent
+        return url.set(database=str(project_root / database)).render_as_string(hide_password=False)
 
-        self.database_url = database_url
+    @property
+    def database_url(self) -> str:
+        """数据库连接URL，未指定时在首次使用时读取 DatabaseConfig.url"""
+        if self._database_url is None:
+            self._database_url = self._resolve_url(get_config().database.url)
+        return self._database_url
 
-        # 创建引擎
-        self.engine = create_engine(
-            database_url,
+    @property
+    def is_sqlite(self) -> bool:
+        """是否为SQLite数据库"""
+        return make_url(self.database_url).get_backend_name() == "sqlite"
+
+    def _ensure_initialized(self) -> None:
+        """首次使用时创建引擎并检查表结构"""
+        if self._initialized:
+            return
+
+        with self._init_lock:
+            if self._initialized:
+                return
+            self._initialize()
+            self._initialized = True
+
+    def _initialize(self) -> None:
+        """创建引擎、会话工厂，并按版本戳检查表结构"""
+        if None in (self._pragma_profile, self._read_pool_size, self._partition_dir):
+            database_config = get_config().database
+            if self._pragma_profile is None:
+                self._pragma_profile = database_config.pragma_profile
+            if self._read_pool_size is None:
+                self._read_pool_size = database_config.read_pool_size
+            if self._partition_dir is None:
+                self._partition_dir = database_config.partition_dir
+
+        if self._pragma_profile not in PRAGMA_PROFILES:
+            raise ValueError(f"未知的PRAGMA配置方案: {self._pragma_profile}")
+
+        # 连接池模式仅适用于文件型SQLite数据库
+        self.read_pool_size = self._read_pool_size if self._is_file_database() else 0
+
+        self.pragmas = dict(PRAGMA_PROFILES[self._pragma_profile])
+        if self.read_pool_size:
+            # 只读连接与写连接并发需要WAL
+            self.pragmas["journal_mode"] = "WAL"
+
+        # 创建写引擎：连接池模式下仅一个写连接，各线程轮流使用
+        if self.read_pool_size:
+            pool_options = {"poolclass": QueuePool, "pool_size": 1, "max_overflow": 0}
+        else:
+            pool_options = {"poolclass": StaticPool}
+
+        self._engine = create_engine(
+            self.database_url,
             # SQLite配置
-            poolclass=StaticPool,
             connect_args={
                 "check_same_thread": False,  # SQLite多线程支持
                 "timeout": 30,  # 30秒超时
             },
             echo=False,  # 设置为True可以查看SQL语句
+            **pool_options,
         )
 
-        # 创建会话工厂
-        self.SessionLocal = sessionmaker(
+        # 每个新连接建立时应用PRAGMA配置
+        if self.is_sqlite:
+            self._listen_pragmas(self._engine, self.pragmas)
+
+        # 年份分区仅适用于文件型SQLite数据库
+        if self._partition_dir and self._is_file_database():
+            self._partitions = PartitionManager(self._partition_dir)
+
+        # 创建会话工厂，分区管理器通过 session.info 提供给CRUD
+        self._session_factory = sessionmaker(
             autocommit=False,
             autoflush=False,
-            bind=self.engine
+            bind=self._engine,
+            info={"partitions": self._partitions}
+        )
+
+        # 表结构版本与模型一致时跳过建表
+        if self._schema_version() != SCHEMA_VERSION:
+            self._create_schema()
+
+        # 只读引擎需要数据库文件已存在，因此在建表之后创建
+        self._read_session_factory = self._session_factory
+        if self.read_pool_size:
+            self._read_engine = self._create_read_engine()
+            self._read_session_factory = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=self._read_engine,
+                info={"partitions": self._partitions}
+            )
+
+    @property
+    def engine(self) -> Engine:
+        """写引擎"""
+        self._ensure_initialized()
+        return self._engine
+
+    @property
+    def read_engine(self) -> Optional[Engine]:
+        """只读引擎，未启用连接池时为None"""
+        self._ensure_initialized()
+        return self._read_engine
+
+    @property
+    def SessionLocal(self) -> sessionmaker:
+        """写会话工厂"""
+        self._ensure_initialized()
+        return self._session_factory
+
+    @property
+    def ReadSessionLocal(self) -> sessionmaker:
+        """只读会话工厂，未启用连接池时与写会话工厂相同"""
+        self._ensure_initialized()
+        return self._read_session_factory
+
+    @property
+    def partitions(self) -> Optional[PartitionManager]:
+        """年份分区管理器，未启用分区时为None"""
+        self._ensure_initialized()
+        return self._partitions
+
+    def _is_file_database(self) -> bool:
+        """是否为文件型SQLite数据库"""
+        database = make_url(self.database_url).database
+        return self.is_sqlite and bool(database) and database != ":memory:"
+
+    def _create_read_engine(self) -> Engine:
+        """创建只读连接池引擎（mode=ro URI）"""
+        db_path = Path(make_url(self.database_url).database).resolve()
+        read_url = URL.create(
+            "sqlite",
+            database=f"file:{db_path.as_posix()}",
+            query={"mode": "ro", "uri": "true"},
         )
 
-        # 创建所有表
-        self.create_tables()
+        engine = create_engine(
+            read_url,
+            poolclass=QueuePool,
+            pool_size=self.read_pool_size,
+            max_overflow=0,
+            connect_args={
+                "check_same_thread": False,
+                "timeout": 30,
+            },
+            echo=False,
+        )
+
+        read_pragmas = {
+            name: value for name, value in self.pragmas.items()
+            if name not in WRITE_ONLY_PRAGMAS
+        }
+        self._listen_pragmas(engine, read_pragmas)
+        return engine
+
+    @staticmethod
+    def _listen_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+        """注册连接事件，新建连接时应用PRAGMA配置"""
+        def on_connect(dbapi_connection, connection_record) -> None:
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+            finally:
+                cursor.close()
+
+        event.listen(engine, "connect", on_connect)
+
+    @staticmethod
+    def _set_pragmas(conn: Connection, pragmas: Dict[str, Any]) -> None:
+        """在指定连接上设置PRAGMA"""
+        for name, value in pragmas.items():
+            conn.exec_driver_sql(f"PRAGMA {name}={value}")
+
+    @staticmethod
+    def _get_pragmas(conn: Connection, names) -> Dict[str, Any]:
+        """读取指定连接上的PRAGMA当前值"""
+        return {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in names
+        }
+
+    @contextmanager
+    def bulk_load(self, tables: Optional[List[str]] = None) -> Generator[None, None, None]:
+        """
+        大批量导入的上下文管理器
+
+        进入时切换到导入用PRAGMA并删除指定表的二级索引，
+        退出时重建索引、执行ANALYZE并恢复原有PRAGMA。
+        唯一约束（如uq_stock_date）保留，以便upsert正常工作。
+
+        Args:
+            tables: 需要删除二级索引的表名，默认 BULK_LOAD_TABLES
+
+        Example:
+            with db_manager.bulk_load():
+                daily_data_crud.batch_upsert(session, rows)
+        """
+        if not self.is_sqlite:
+            yield
+            return
+
+        table_names = tables or BULK_LOAD_TABLES
+        indexes = [
+            index
+            for name in table_names
+            for index in Base.metadata.tables[name].indexes
+        ]
+
+        with self._write_connection() as conn:
+            previous = self._get_pragmas(conn, BULK_LOAD_PRAGMAS)
+            self._set_pragmas(conn, BULK_LOAD_PRAGMAS)
+
+        try:
+            with self._write_connection() as conn:
+                for index in indexes:
+                    index.drop(bind=conn, checkfirst=True)
+
+            try:
+                yield
+            finally:
+                with self._write_connection() as conn:
+                    for index in indexes:
+                        index.create(bind=conn, checkfirst=True)
+                    conn.exec_driver_sql("ANALYZE")
+        finally:
+            # 重建索引失败时也要恢复PRAGMA，避免连接一直处于 synchronous=OFF
+            with self._write_connection() as conn:
+                self._set_pragmas(conn, previous)
+
+    @contextmanager
+    def _write_connection(self) -> Generator[Connection, None, None]:
+        """
+        获取写连接，退出时提交
+
+        当前线程已打开写会话时先提交该会话再复用其连接：连接池模式下只有一个写连接，
+        另行获取会一直等到超时；部分PRAGMA不能在事务中修改。
+        """
+        session = getattr(self._local, "session", None)
+        if session is not None:
+            session.commit()
+            yield session.connection()
+            session.commit()
+            return
+
+        with self.engine.connect() as conn:
+            yield conn
+            conn.commit()
+
+    def _schema_version(self) -> int:
+        """读取数据库中记录的表结构版本（SQLite user_version）"""
+        if not self.is_sqlite:
+            return 0
+        with self._engine.connect() as conn:
+            return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+    def _stamp_schema_version(self, version: int) -> None:
+        """记录表结构版本"""
+        if not self.is_sqlite:
+            return
+        with self._engine.connect() as conn:
+            conn.exec_driver_sql(f"PRAGMA user_version={version}")
+            conn.commit()
+
+    def _create_schema(self) -> None:
+        """创建所有表并记录表结构版本，列与模型不一致的临时状态表先删除"""
+        inspector = inspect(self._engine)
+        for name in TRANSIENT_TABLES:
+            table = Base.metadata.tables[name]
+            if not inspector.has_table(name):
+                continue
+            columns = {column["name"] for column in inspector.get_columns(name)}
+            if columns != {column.name for column in table.columns}:
+                table.drop(bind=self._engine)
+
+        Base.metadata.create_all(bind=self._engine)
+        self._stamp_schema_version(SCHEMA_VERSION)
 
     def create_tables(self) -> None:
         """创建所有数据库表"""
-        Base.metadata.create_all(bind=self.engine)
+        self._ensure_initialized()
+        self._create_schema()
 
     def drop_tables(self) -> None:
         """删除所有数据库表（谨慎使用）"""
         Base.metadata.drop_all(bind=self.engine)
+        self._stamp_schema_version(0)
+
+    def get_session(self, readonly: bool = False) -> Session:
+        """
+        获取数据库会话
 
-    def get_session(self) -> Session:
-        """获取数据库会话"""
+        Args:
+            readonly: 是否从只读连接池获取（未启用连接池时使用写连接）
+        """
+        if readonly:
+            return self.ReadSessionLocal()
         return self.SessionLocal()
 
     @contextmanager
-    def session_scope(self) -> Generator[Session, None, None]:
+    def session_scope(self, readonly: bool = False) -> Generator[Session, None, None]:
         """
         提供数据库会话的上下文管理器
 
+        Args:
+            readonly: 是否使用只读会话，只读会话可与写操作并发读取
+
         Example:
             with db.session_scope() as session:
                 # 数据库操作
                 pass
+
+            with db.session_scope(readonly=True) as session:
+                # 只读查询
+                pass
+
+        同一线程内嵌套的写会话复用外层会话，不会另占写连接。
         """
-        session = self.get_session()
+        if not readonly:
+            current = getattr(self._local, "session", None)
+            if current is not None:
+                # 嵌套的写会话：复用外层会话，由外层提交或回滚
+                yield current
+                return
+
+        session = self.get_session(readonly=readonly)
+        if not readonly:
+            self._local.session = session
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            if not readonly:
+                self._local.session = None
+            session.close()
+
+    @contextmanager
+    def isolated_session(self) -> Generator[Session, None, None]:
+        """
+        独立连接上的写会话
+
+        不复用当前线程的会话，也不与其他线程共用写连接，提交只影响本会话写入的内容。
+        用于在其他事务进行中旁路记录日志；写锁被占用时按SQLite忙等待超时等待。
+        内存数据库只有一个连接，退回普通写会话。
+        """
+        self._ensure_initialized()
+        if not self._is_file_database():
+            with self.session_scope() as session:
+                yield session
+            return
+
+        with self._init_lock:
+            if self._isolated_session_factory is None:
+                engine = create_engine(
+                    self.database_url,
+                    poolclass=NullPool,
+                    connect_args={"check_same_thread": False, "timeout": 30},
+                    echo=False,
+                )
+                self._listen_pragmas(engine, self.pragmas)
+                self._isolated_session_factory = sessionmaker(
+                    autocommit=False, autoflush=False, bind=engine
+                )
+
+        session = self._isolated_session_factory()
         try:
             yield session
             session.commit()
@@ -3,24 +3,49 @@
 提供基础的数据库增删改查操作
 """
 
+from contextlib import contextmanager
 from datetime import datetime, date
-from typing import List, Optional, Type, TypeVar, Generic
+from typing import (
+    Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Generic, Union
+)
+import numpy as np
+import pandas as pd
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy import (
+    Integer, String, and_, or_, desc, asc, func, insert, select, type_coerce, case, true,
+    tuple_, literal, update, bindparam
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from .models import (
-    Stock, DailyData, TechnicalIndicator,
-    MarketIndex, AnalysisResult, DataUpdateLog
+    Stock, StockKey, DailyData, DailyDataCompact, TechnicalIndicator, IndicatorDaily,
+    MarketIndex, MarketDailyStats, TradingCalendar, AnalysisResult, DataUpdateLog,
+    SyncCheckpoint, NoDataRange, INDICATOR_EAV_COLUMNS, TRADE_DAY_EPOCH, BREADTH_CHANGE_BUCKETS
 )
 from .connection import db_manager
+from .bar_store import BarStore, get_bar_store
+from .stock_cache import StockMetadataCache, stock_metadata_cache
 
 # 泛型类型变量
 T = TypeVar('T')
 
 
+def to_trade_day(trade_date: date) -> int:
+    """日期转换为交易日序号"""
+    return (trade_date - TRADE_DAY_EPOCH).days
+
+
+def from_trade_day(trade_day: int) -> date:
+    """交易日序号转换为日期"""
+    return date.fromordinal(TRADE_DAY_EPOCH.toordinal() + trade_day)
+
+
 class BaseCRUD(Generic[T]):
     """基础CRUD操作类"""
 
+    # upsert 使用的冲突列（唯一约束或主键）
+    conflict_columns: tuple = ()
+
     def __init__(self, model: Type[T]):
         """
         初始化CRUD操作类
@@ -47,22 +72,135 @@ class BaseCRUD(Generic[T]):
         session.refresh(db_obj)
         return db_obj
 
-    def create_batch(self, session: Session, objects_data: List[dict]) -> List[T]:
+    def create_batch(
+        self,
+        session: Session,
+        objects_data: List[dict],
+        bulk: bool = False,
+        chunk_size: int = 1000
+    ) -> Union[List[T], int]:
         """
         批量创建记录
 
         Args:
             session: 数据库会话
             objects_data: 要创建的数据字典列表
+            bulk: 是否使用Core批量插入（不创建ORM对象，只返回行数）
+            chunk_size: 批量插入时每个事务写入的行数
 
         Returns:
-            List[T]: 创建的记录对象列表
+            Union[List[T], int]: 创建的记录对象列表，bulk模式下为插入行数
         """
+        if bulk:
+            return self.bulk_insert(session, objects_data, chunk_size)
+
         db_objects = [self.model(**obj_data) for obj_data in objects_data]
         session.add_all(db_objects)
         session.commit()
         return db_objects
 
+    def bulk_insert(
+        self,
+        session: Session,
+        objects_data: List[dict],
+        chunk_size: int = 1000
+    ) -> int:
+        """
+        使用SQLAlchemy Core批量插入记录
+
+        数据字典直接以 executemany 方式发送，不经过ORM对象和identity map，
+        每个块一个事务。
+
+        Args:
+            session: 数据库会话
+            objects_data: 要插入的数据字典列表
+            chunk_size: 每个事务写入的行数
+
+        Returns:
+            int: 插入的行数
+        """
+        stmt = insert(self.model.__table__)
+        total = 0
+
+        for start in range(0, len(objects_data), chunk_size):
+            chunk = objects_data[start:start + chunk_size]
+            try:
+                for group in self._group_by_columns(chunk).values():
+                    session.execute(stmt, group)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            total += len(chunk)
+
+        return total
+
+    @staticmethod
+    def _group_by_columns(objects_data: List[dict]) -> Dict[tuple, List[dict]]:
+        """按字段集合分组，保证每次 executemany 的参数结构一致"""
+        groups: Dict[tuple, List[dict]] = {}
+        for obj_data in objects_data:
+            groups.setdefault(tuple(sorted(obj_data)), []).append(obj_data)
+        return groups
+
+    def _upsert_statement(self, columns: tuple):
+        """构造 ON CONFLICT DO UPDATE 语句，仅在数值变化时更新"""
+        table = self.model.__table__
+        stmt = sqlite_insert(table)
+
+        update_columns = [
+            name for name in columns
+            if name not in self.conflict_columns and name not in ('id', 'created_at')
+        ]
+        if not update_columns:
+            return stmt.on_conflict_do_nothing(index_elements=self.conflict_columns)
+
+        return stmt.on_conflict_do_update(
+            index_elements=self.conflict_columns,
+            set_={name: stmt.excluded[name] for name in update_columns},
+            where=or_(*[
+                table.c[name].is_distinct_from(stmt.excluded[name])
+                for name in update_columns
+            ])
+        )
+
+    def partition_tables(
+        self,
+        session: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Iterator:
+        """
+        依次给出主表和日期范围涉及的年份分区表，未启用分区时只有主表
+
+        分区在迭代到时才附加，应在取下一张表之前执行完对当前表的查询。
+
+        Args:
+            session: 数据库会话
+            start_date: 开始日期
+            end_date: 结束日期
+        """
+        partitions = session.info.get('partitions')
+        table = self.model.__table__
+        if partitions is None:
+            return iter([table])
+        return partitions.tables(session.connection(), table.name, start_date, end_date)
+
+    def _archived_years(self, session: Session) -> set:
+        """已归档到年份分区的年份"""
+        partitions = session.info.get('partitions')
+        return set(partitions.years()) if partitions is not None else set()
+
+    def _has_partitions(
+        self,
+        session: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> bool:
+        """日期范围是否涉及年份分区"""
+        partitions = session.info.get('partitions')
+        return partitions is not None and bool(partitions.years_between(start_date, end_date))
+
     def get(self, session: Session, id: int) -> Optional[T]:
         """
         根据ID获取记录
@@ -124,6 +262,113 @@ class BaseCRUD(Generic[T]):
 
         return query.offset(skip).limit(limit).all()
 
+    def _keyset_columns(self, order_by: Union[str, Sequence[str], None]) -> list:
+        """排序列，末尾补充主键列保证排序唯一"""
+        if order_by is None:
+            names = []
+        elif isinstance(order_by, str):
+            names = [order_by]
+        else:
+            names = list(order_by)
+
+        for column in self.model.__table__.primary_key.columns:
+            if column.name not in names:
+                names.append(column.name)
+
+        return [getattr(self.model, name) for name in names]
+
+    @staticmethod
+    def _as_criteria(filters) -> list:
+        """将过滤条件统一为列表"""
+        if filters is None:
+            return []
+        if isinstance(filters, (list, tuple)):
+            return list(filters)
+        return [filters]
+
+    def get_page(
+        self,
+        session: Session,
+        after: Optional[tuple] = None,
+        limit: int = 100,
+        order_by: Union[str, Sequence[str], None] = None,
+        descending: bool = False,
+        filters=None
+    ) -> Tuple[List[T], Optional[tuple]]:
+        """
+        键集（seek）分页获取记录
+
+        以上一页最后一行的排序键作为游标，通过 WHERE (k1, k2, ...) > (...)
+        定位下一页，耗时与页码无关。排序列应有索引，例如 daily_data 的
+        ('stock_code', 'trade_date')。
+
+        Args:
+            session: 数据库会话
+            after: 上一页返回的游标，None表示第一页
+            limit: 每页记录数
+            order_by: 排序字段或字段列表，自动追加主键保证唯一
+            descending: 是否降序
+            filters: 过滤条件（表达式或表达式列表）
+
+        Returns:
+            Tuple[List[T], Optional[tuple]]: 本页记录和下一页游标（没有下一页时为None）
+
+        Example:
+            cursor = None
+            while True:
+                rows, cursor = daily_data_crud.get_page(
+                    session, cursor, order_by=('stock_code', 'trade_date')
+                )
+                ...
+                if cursor is None:
+                    break
+        """
+        columns = self._keyset_columns(order_by)
+        query = session.query(self.model).filter(*self._as_criteria(filters))
+
+        if after is not None:
+            key = tuple_(*columns)
+            query = query.filter(key < tuple_(*after) if descending else key > tuple_(*after))
+
+        query = query.order_by(*[desc(c) if descending else asc(c) for c in columns])
+        items = query.limit(limit).all()
+
+        if len(items) < limit:
+            return items, None
+
+        last = items[-1]
+        return items, tuple(getattr(last, column.key) for column in columns)
+
+    def iter_batches(
+        self,
+        session: Session,
+        filters=None,
+        batch_size: int = 1000,
+        order_by: Union[str, Sequence[str], None] = None
+    ) -> Iterator[List[T]]:
+        """
+        流式分批遍历记录
+
+        使用 yield_per 从游标逐批读取，不一次性加载全部结果；
+        每批处理完后释放引用即可保持内存恒定。
+
+        Args:
+            session: 数据库会话
+            filters: 过滤条件（表达式或表达式列表）
+            batch_size: 每批记录数
+            order_by: 排序字段或字段列表，默认不排序
+
+        Yields:
+            List[T]: 一批记录对象
+        """
+        stmt = select(self.model).where(*self._as_criteria(filters))
+        if order_by is not None:
+            stmt = stmt.order_by(*self._keyset_columns(order_by))
+
+        result = session.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.scalars().partitions():
+            yield partition
+
     def update(
         self,
         session: Session,
@@ -182,7 +427,48 @@ class BaseCRUD(Generic[T]):
 
 
 class StockCRUD(BaseCRUD[Stock]):
-    """股票信息CRUD操作"""
+    """股票信息CRUD操作，写入后使股票信息缓存失效"""
+
+    def __init__(self, model: Type[Stock], cache: StockMetadataCache):
+        """
+        初始化股票信息CRUD
+
+        Args:
+            model: 数据库模型类
+            cache: 股票信息缓存
+        """
+        super().__init__(model)
+        self.cache = cache
+
+    def create(self, session: Session, obj_data: dict) -> Stock:
+        """创建股票信息"""
+        stock = super().create(session, obj_data)
+        self.cache.invalidate()
+        return stock
+
+    def bulk_insert(self, session: Session, objects_data: List[dict], chunk_size: int = 1000) -> int:
+        """批量插入股票信息"""
+        count = super().bulk_insert(session, objects_data, chunk_size)
+        self.cache.invalidate()
+        return count
+
+    def create_batch(self, session: Session, objects_data: List[dict], bulk: bool = False, chunk_size: int = 1000):
+        """批量创建股票信息"""
+        result = super().create_batch(session, objects_data, bulk, chunk_size)
+        self.cache.invalidate()
+        return result
+
+    def update(self, session: Session, db_obj: Stock, obj_data: dict) -> Stock:
+        """更新股票信息"""
+        stock = super().update(session, db_obj, obj_data)
+        self.cache.invalidate()
+        return stock
+
+    def delete(self, session: Session, db_obj: Stock) -> Stock:
+        """删除股票信息"""
+        stock = super().delete(session, db_obj)
+        self.cache.invalidate()
+        return stock
 
     def get_by_code(self, session: Session, code: str) -> Optional[Stock]:
         """根据股票代码获取股票信息"""
@@ -213,6 +499,144 @@ class StockCRUD(BaseCRUD[Stock]):
 class DailyDataCRUD(BaseCRUD[DailyData]):
     """日线数据CRUD操作"""
 
+    def __init__(
+        self,
+        model: Type[DailyData],
+        bar_store: Optional[BarStore] = None,
+        stats_crud: Optional['MarketDailyStatsCRUD'] = None
+    ):
+        """
+        初始化日线数据CRUD
+
+        Args:
+            model: 数据库模型类
+            bar_store: 列式K线存储，默认按 DatabaseConfig.bar_store_path 获取
+            stats_crud: 市场每日统计CRUD，批量写入时按行的新旧数值增量更新统计
+        """
+        super().__init__(model)
+        self._bar_store = bar_store
+        self.stats_crud = stats_crud
+
+    @property
+    def bar_store(self) -> Optional[BarStore]:
+        """列式K线存储，未配置时为None"""
+        return self._bar_store or get_bar_store()
+
+    @bar_store.setter
+    def bar_store(self, bar_store: Optional[BarStore]) -> None:
+        self._bar_store = bar_store
+
+    # ------------------------------------------------------------------
+    # 写入：市场统计和列式存储随 daily_data 一起更新
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _derived_update(self, session: Session, trade_dates: Sequence[date]):
+        """
+        逐行写入 daily_data 时同步市场统计和列式存储
+
+        写库前登记列式存储的日期范围；写库后写入调用方收集的列式存储行，
+        再重新统计涉及的交易日。列式存储写入失败时登记保留为待补写。
+
+        Args:
+            session: 数据库会话
+            trade_dates: 写入涉及的交易日期
+
+        Yields:
+            List[dict]: 调用方在其中追加要写入列式存储的行
+        """
+        trade_dates = set(trade_dates)
+        bar_store = self.bar_store
+        journal = None
+        if bar_store is not None and trade_dates:
+            journal = bar_store.begin_write(min(trade_dates), max(trade_dates))
+
+        bar_rows: List[dict] = []
+        try:
+            yield bar_rows
+        except BaseException:
+            if journal is not None:
+                bar_store.end_write(journal)
+            raise
+
+        if journal is not None:
+            try:
+                bar_store.write(bar_rows)
+            except Exception:
+                bar_store.end_write(journal, failed=True)
+                raise
+            bar_store.end_write(journal)
+
+        if self.stats_crud is not None and trade_dates:
+            self.stats_crud.refresh(session, trade_dates)
+
+    def _bar_row(self, stock_code: str, trade_date: date, record: Optional[DailyData] = None) -> dict:
+        """列式存储的一行，record 为空时清除该格"""
+        fields = self.bar_store.fields if self.bar_store is not None else ()
+        return {
+            'stock_code': stock_code,
+            'trade_date': trade_date,
+            **{name: getattr(record, name) if record is not None else None for name in fields}
+        }
+
+    def create(self, session: Session, obj_data: dict) -> DailyData:
+        """创建日线数据，同步更新市场统计和列式存储"""
+        with self._derived_update(session, [obj_data['trade_date']]) as bar_rows:
+            record = super().create(session, obj_data)
+            bar_rows.append(self._bar_row(record.stock_code, record.trade_date, record))
+        return record
+
+    def create_batch(
+        self,
+        session: Session,
+        objects_data: List[dict],
+        bulk: bool = False,
+        chunk_size: int = 1000
+    ) -> Union[List[DailyData], int]:
+        """批量创建日线数据，同步更新市场统计和列式存储；bulk模式经 batch_upsert 写入"""
+        if bulk:
+            return self.bulk_insert(session, objects_data, chunk_size)
+
+        trade_dates = [obj_data['trade_date'] for obj_data in objects_data]
+        with self._derived_update(session, trade_dates) as bar_rows:
+            records = super().create_batch(session, objects_data)
+            bar_rows.extend(
+                self._bar_row(record.stock_code, record.trade_date, record) for record in records
+            )
+        return records
+
+    def bulk_insert(self, session: Session, objects_data: List[dict], chunk_size: int = 1000) -> int:
+        """
+        批量写入日线数据
+
+        经 batch_upsert 写入，市场统计和列式存储随之更新；已存在的行按新值更新。
+
+        Returns:
+            int: 写入的行数（不含已归档年份中跳过的行）
+        """
+        counts = self.batch_upsert(session, objects_data, chunk_size)
+        return counts['inserted'] + counts['updated'] + counts['unchanged']
+
+    def update(self, session: Session, db_obj: DailyData, obj_data: dict) -> DailyData:
+        """更新日线数据，同步更新市场统计和列式存储"""
+        old_key = (db_obj.stock_code, db_obj.trade_date)
+        new_date = obj_data.get('trade_date', db_obj.trade_date)
+
+        with self._derived_update(session, [old_key[1], new_date]) as bar_rows:
+            record = super().update(session, db_obj, obj_data)
+            if (record.stock_code, record.trade_date) != old_key:
+                bar_rows.append(self._bar_row(*old_key))
+            bar_rows.append(self._bar_row(record.stock_code, record.trade_date, record))
+        return record
+
+    def delete(self, session: Session, db_obj: DailyData) -> DailyData:
+        """删除日线数据，同步更新市场统计并清除列式存储中的该格"""
+        key = (db_obj.stock_code, db_obj.trade_date)
+        with self._derived_update(session, [key[1]]) as bar_rows:
+            record = super().delete(session, db_obj)
+            bar_rows.append(self._bar_row(*key))
+        return record
+
     def get_by_stock_and_date(
         self,
         session: Session,
@@ -235,7 +659,25 @@ class DailyDataCRUD(BaseCRUD[DailyData]):
         end_date: Optional[date] = None,
         limit: int = None
     ) -> List[DailyData]:
-        """根据股票代码获取日线数据"""
+        """根据股票代码获取日线数据，启用年份分区时只合并日期范围涉及的分区"""
+        if self._has_partitions(session, start_date, end_date):
+            records = []
+            for table in self.partition_tables(session, start_date, end_date):
+                stmt = select(table).where(table.c.stock_code == stock_code)
+                if start_date:
+                    stmt = stmt.where(table.c.trade_date >= start_date)
+                if end_date:
+                    stmt = stmt.where(table.c.trade_date <= end_date)
+                stmt = stmt.order_by(desc(table.c.trade_date))
+                if limit:
+                    stmt = stmt.limit(limit)
+                records += session.execute(
+                    select(self.model).from_statement(stmt)
+                ).scalars().all()
+
+            records.sort(key=lambda record: record.trade_date, reverse=True)
+            return records[:limit] if limit else records
+
         query = session.query(self.model).filter(self.model.stock_code == stock_code)
 
         if start_date:
@@ -250,28 +692,680 @@ class DailyDataCRUD(BaseCRUD[DailyData]):
 
         return query.all()
 
+    # get_frame 可选择的数值字段
+    frame_columns = (
+        'open_price', 'high_price', 'low_price', 'close_price', 'volume',
+        'amount', 'change_amount', 'change_percent', 'turnover_rate'
+    )
+
+    def get_frame(
+        self,
+        session: Session,
+        stock_codes: Union[str, Sequence[str]],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        columns: Optional[Sequence[str]] = None,
+        from_bar_store: bool = False
+    ) -> pd.DataFrame:
+        """
+        以DataFrame形式获取日线数据
+
+        使用Core SELECT直接从游标读取，按列构造NumPy数组，不创建ORM对象。
+
+        Args:
+            session: 数据库会话
+            stock_codes: 股票代码或股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            columns: 数值字段列表，默认 frame_columns 全部字段
+            from_bar_store: 是否从列式K线存储读取（仅支持 BarStore.fields）
+
+        Returns:
+            pd.DataFrame: 以 trade_date(datetime64) 为索引，包含 stock_code
+                和所选字段，按 stock_code、trade_date 升序排列
+        """
+        if isinstance(stock_codes, str):
+            stock_codes = [stock_codes]
+
+        if from_bar_store:
+            return self._get_frame_from_bar_store(stock_codes, start_date, end_date, columns)
+
+        columns = list(columns or self.frame_columns)
+
+        unknown = [name for name in columns if name not in self.frame_columns]
+        if unknown:
+            raise ValueError(f"不支持的字段: {unknown}")
+
+        rows = []
+        sources = 0
+        for table in self.partition_tables(session, start_date, end_date):
+            # 日期按原始字符串读取，避免逐行转换为date对象
+            stmt = select(
+                table.c.stock_code,
+                type_coerce(table.c.trade_date, String),
+                *[table.c[name] for name in columns]
+            ).where(table.c.stock_code.in_(stock_codes))
+
+            if start_date:
+                stmt = stmt.where(table.c.trade_date >= start_date)
+            if end_date:
+                stmt = stmt.where(table.c.trade_date <= end_date)
+
+            stmt = stmt.order_by(table.c.stock_code, table.c.trade_date)
+            rows += session.execute(stmt).fetchall()
+            sources += 1
+
+        if sources > 1:
+            # 合并主库与分区的结果
+            rows.sort(key=lambda row: (row[0], row[1]))
+
+        values = list(zip(*rows)) if rows else [()] * (len(columns) + 2)
+
+        frame = pd.DataFrame(
+            {
+                'stock_code': np.array(values[0], dtype=object),
+                **{
+                    name: np.array(values[i + 2], dtype=np.float64)
+                    for i, name in enumerate(columns)
+                }
+            },
+            index=pd.DatetimeIndex(
+                np.array(values[1], dtype='datetime64[D]'), name='trade_date'
+            )
+        )
+        return frame
+
+    def _get_frame_from_bar_store(
+        self,
+        stock_codes: Sequence[str],
+        start_date: Optional[date],
+        end_date: Optional[date],
+        columns: Optional[Sequence[str]]
+    ) -> pd.DataFrame:
+        """从列式K线存储读取日线数据，结果结构与 get_frame 相同"""
+        bar_store = self.bar_store
+        if bar_store is None:
+            raise ValueError("未配置列式K线存储")
+
+        columns = list(columns or bar_store.fields)
+        years = bar_store.years()
+        if years:
+            start_date = start_date or date(years[0], 1, 1)
+            end_date = end_date or date(years[-1], 12, 31)
+
+        frames = []
+        for stock_code in sorted(stock_codes):
+            if not years:
+                break
+            frame = bar_store.read(stock_code, start_date, end_date, columns)
+            frame.insert(0, 'stock_code', stock_code)
+            frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame(
+                {name: [] for name in ['stock_code'] + columns},
+                index=pd.DatetimeIndex([], name='trade_date')
+            )
+        return pd.concat(frames)
+
+    def sync_bar_store(
+        self,
+        session: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        fetch_size: int = 100_000
+    ) -> int:
+        """
+        将 daily_data 中的数据写入列式K线存储
+
+        用于首次启用列式存储时回填历史数据；之后 batch_upsert 会自动同步。
+        不指定日期范围的全量回填同时清除所有待补写的登记。
+
+        Args:
+            session: 数据库会话
+            start_date: 开始日期
+            end_date: 结束日期
+            fetch_size: 每次从游标读取的行数
+
+        Returns:
+            int: 写入的行数
+        """
+        bar_store = self.bar_store
+        if bar_store is None:
+            raise ValueError("未配置列式K线存储")
+
+        full_sync = start_date is None and end_date is None
+        stale = bar_store.stale_ranges() if full_sync else []
+
+        table = self.model.__table__
+        names = ['stock_code', 'trade_date', *bar_store.fields]
+        stmt = select(
+            table.c.stock_code,
+            type_coerce(table.c.trade_date, String),
+            *[table.c[name] for name in bar_store.fields]
+        )
+        if start_date:
+            stmt = stmt.where(table.c.trade_date >= start_date)
+        if end_date:
+            stmt = stmt.where(table.c.trade_date <= end_date)
+
+        total = 0
+        result = session.execute(stmt.order_by(table.c.trade_date))
+        while True:
+            rows = result.fetchmany(fetch_size)
+            if not rows:
+                break
+            total += bar_store.write([dict(zip(names, row)) for row in rows])
+
+        for path, _, _ in stale:
+            bar_store.end_write(path)
+
+        return total
+
+    def repair_bar_store(self, session: Session) -> int:
+        """
+        从 daily_data 补写列式存储中未完成写入的日期范围
+
+        写入进程在提交 daily_data 之后、写完列式存储之前崩溃时会留下这样的范围。
+
+        Returns:
+            int: 补写的行数
+        """
+        bar_store = self.bar_store
+        if bar_store is None:
+            return 0
+
+        total = 0
+        for path, start_date, end_date in bar_store.stale_ranges():
+            total += self.sync_bar_store(session, start_date, end_date)
+            bar_store.end_write(path)
+        return total
+
+    def get_close_prices(
+        self,
+        session: Session,
+        stock_codes: Sequence[str],
+        trade_date: date
+    ) -> Dict[str, float]:
+        """一次查询获取多只股票在指定交易日的收盘价"""
+        if not stock_codes:
+            return {}
+
+        rows = session.query(self.model.stock_code, self.model.close_price).filter(
+            and_(
+                self.model.trade_date == trade_date,
+                self.model.stock_code.in_(set(stock_codes))
+            )
+        ).all()
+        return {row.stock_code: row.close_price for row in rows}
+
     def get_latest_date(self, session: Session, stock_code: str) -> Optional[date]:
-        """获取股票最新交易日期"""
+        """获取股票最新交易日期，主库没有数据时从最近的年份分区开始查找"""
         result = session.query(self.model.trade_date).filter(
             self.model.stock_code == stock_code
         ).order_by(desc(self.model.trade_date)).first()
 
-        return result.trade_date if result else None
+        if result:
+            return result.trade_date
+
+        partitions = session.info.get('partitions')
+        if partitions is None:
+            return None
+
+        for year in reversed(partitions.years()):
+            partitions.attach(session.connection(), [year])
+            table = partitions.table(self.model.__tablename__, year)
+            latest = session.execute(
+                select(func.max(table.c.trade_date)).where(table.c.stock_code == stock_code)
+            ).scalar()
+            if latest:
+                return latest
+
+        return None
+
+    def get_coverage(
+        self,
+        session: Session,
+        stock_codes: Optional[Sequence[str]] = None
+    ) -> Dict[str, Tuple[date, date, int]]:
+        """
+        一次分组查询获取每只股票已存储的日期范围
 
-    def batch_upsert(self, session: Session, data_list: List[dict]) -> List[DailyData]:
-        """批量插入或更新日线数据"""
-        result = []
+        Args:
+            session: 数据库会话
+            stock_codes: 限定股票代码，默认全部
+
+        Returns:
+            Dict[str, Tuple[date, date, int]]: 代码到 (最早日期, 最新日期, 行数) 的映射
+        """
+        coverage: Dict[str, Tuple[date, date, int]] = {}
+        for table in self.partition_tables(session):
+            stmt = select(
+                table.c.stock_code,
+                func.min(table.c.trade_date).label('first_date'),
+                func.max(table.c.trade_date).label('last_date'),
+                func.count().label('rows')
+            )
+            if stock_codes is not None:
+                stmt = stmt.where(table.c.stock_code.in_(stock_codes))
+
+            for row in session.execute(stmt.group_by(table.c.stock_code)):
+                first, last = row.first_date, row.last_date
+                if row.stock_code in coverage:
+                    known_first, known_last, known_rows = coverage[row.stock_code]
+                    coverage[row.stock_code] = (
+                        min(first, known_first), max(last, known_last), known_rows + row.rows
+                    )
+                else:
+                    coverage[row.stock_code] = (first, last, row.rows)
+
+        return coverage
+
+    def get_trade_dates(
+        self,
+        session: Session,
+        stock_codes: Sequence[str]
+    ) -> Dict[str, List[date]]:
+        """一次查询获取多只股票已存储的交易日期，按日期升序"""
+        if not stock_codes:
+            return {}
+
+        dates: Dict[str, List[date]] = {}
+        sources = 0
+        for table in self.partition_tables(session):
+            rows = session.execute(
+                select(table.c.stock_code, table.c.trade_date)
+                .where(table.c.stock_code.in_(stock_codes))
+                .order_by(table.c.stock_code, table.c.trade_date)
+            )
+            for row in rows:
+                dates.setdefault(row.stock_code, []).append(row.trade_date)
+            sources += 1
+
+        if sources > 1:
+            for values in dates.values():
+                values.sort()
+        return dates
+
+    # 唯一约束 uq_stock_date 对应的冲突列
+    conflict_columns = ('stock_code', 'trade_date')
+
+    def batch_upsert(
+        self,
+        session: Session,
+        data_list: List[dict],
+        chunk_size: int = 500,
+        refresh_stats: bool = True
+    ) -> Dict[str, int]:
+        """
+        批量插入或更新日线数据
+
+        按块执行 INSERT ... ON CONFLICT(stock_code, trade_date) DO UPDATE，
+        每块一个事务；数值未变化的行不会被重写。市场涨跌统计在同一事务中
+        按行的新旧数值增量更新，不再重新聚合整个交易日。已归档到年份分区的
+        年份只读，这些年份的行不写入，计入 archived。
+
+        Args:
+            session: 数据库会话
+            data_list: 日线数据字典列表
+            chunk_size: 每个事务写入的行数
+            refresh_stats: 是否更新市场每日统计；整段历史回填时可关闭，
+                完成后调用 MarketDailyStatsCRUD.rebuild
+
+        Returns:
+            Dict[str, int]: inserted/updated/unchanged/archived 计数
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'archived': 0}
+
+        # 同一批次内的重复键以最后一条为准
+        rows = list({
+            (data['stock_code'], data['trade_date']): data for data in data_list
+        }.values())
+
+        # 主库的唯一约束管不到分区中的行，写入已归档年份会产生重复
+        archived_years = self._archived_years(session)
+        if archived_years:
+            kept = [data for data in rows if data['trade_date'].year not in archived_years]
+            counts['archived'] = len(rows) - len(kept)
+            rows = kept
+
+        # 先补写此前中断的列式存储写入
+        bar_store = self.bar_store
+        if bar_store is not None and bar_store.stale_ranges():
+            self.repair_bar_store(session)
+
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+
+            # 写 daily_data 之前登记日期范围，写完列式存储后删除
+            journal = None
+            if bar_store is not None:
+                chunk_dates = [data['trade_date'] for data in chunk]
+                journal = bar_store.begin_write(min(chunk_dates), max(chunk_dates))
+
+            try:
+                stored = self._load_existing(session, chunk)
+                existing = len(stored)
+
+                affected = 0
+                for columns, group in self._group_by_columns(chunk).items():
+                    result = session.execute(self._upsert_statement(columns), group)
+                    affected += result.rowcount
+
+                if refresh_stats and self.stats_crud is not None and affected:
+                    self.stats_crud.apply_changes(session, self._stat_changes(chunk, stored))
+
+                session.commit()
+            except Exception:
+                session.rollback()
+                if journal is not None:
+                    bar_store.end_write(journal)
+                raise
+
+            # 同步列式K线存储
+            if bar_store is not None:
+                try:
+                    bar_store.write(chunk)
+                except Exception:
+                    bar_store.end_write(journal, failed=True)
+                    raise
+                bar_store.end_write(journal)
+
+            inserted = len(chunk) - existing
+            updated = affected - inserted
+            counts['inserted'] += inserted
+            counts['updated'] += updated
+            counts['unchanged'] += existing - updated
+
+        return counts
+
+    def _load_existing(self, session: Session, chunk: List[dict]) -> Dict[Tuple[str, date], tuple]:
+        """
+        读取块内已存在于数据库的行参与市场统计的字段
+
+        Returns:
+            Dict[Tuple[str, date], tuple]: (stock_code, trade_date) 到
+                MarketDailyStatsCRUD.source_columns 取值的映射
+        """
+        keys = {(data['stock_code'], data['trade_date']) for data in chunk}
+        codes = {code for code, _ in keys}
+        dates = [trade_date for _, trade_date in keys]
+
+        columns = [getattr(self.model, name) for name in MarketDailyStatsCRUD.source_columns]
+        stored = session.query(self.model.stock_code, self.model.trade_date, *columns).filter(
+            and_(
+                self.model.stock_code.in_(codes),
+                self.model.trade_date >= min(dates),
+                self.model.trade_date <= max(dates)
+            )
+        ).all()
+
+        return {
+            (row[0], row[1]): tuple(row[2:])
+            for row in stored if (row[0], row[1]) in keys
+        }
+
+    @staticmethod
+    def _stat_changes(
+        chunk: List[dict],
+        stored: Dict[Tuple[str, date], tuple]
+    ) -> List[Tuple[date, Optional[tuple], tuple]]:
+        """块内每行写入前后参与市场统计的字段，未给出的字段保持原值"""
+        changes = []
+        for data in chunk:
+            old = stored.get((data['stock_code'], data['trade_date']))
+            new = tuple(
+                data[name] if name in data else (old[i] if old else None)
+                for i, name in enumerate(MarketDailyStatsCRUD.source_columns)
+            )
+            if new != old:
+                changes.append((data['trade_date'], old, new))
+        return changes
+
+
+class StockKeyCRUD(BaseCRUD[StockKey]):
+    """股票代码整数映射CRUD操作，带进程内缓存"""
+
+    def __init__(self, model: Type[StockKey]):
+        super().__init__(model)
+        self._ids: Dict[str, int] = {}
+        self._codes: Dict[int, str] = {}
+
+    def _remember(self, rows) -> None:
+        """缓存映射关系"""
+        for stock_id, code in rows:
+            self._ids[code] = stock_id
+            self._codes[stock_id] = code
+
+    def get_ids(
+        self,
+        session: Session,
+        codes: Sequence[str],
+        create: bool = False
+    ) -> Dict[str, int]:
+        """
+        获取股票代码对应的 stock_id
+
+        Args:
+            session: 数据库会话
+            codes: 股票代码列表
+            create: 是否为尚未登记的代码分配新ID
+
+        Returns:
+            Dict[str, int]: 代码到ID的映射，未登记且不创建的代码不包含在内
+        """
+        missing = {code for code in codes if code not in self._ids}
+        if missing:
+            table = self.model.__table__
+            if create:
+                session.execute(
+                    sqlite_insert(table).on_conflict_do_nothing(index_elements=['code']),
+                    [{'code': code} for code in sorted(missing)]
+                )
+                session.commit()
+            self._remember(session.execute(
+                select(table.c.stock_id, table.c.code).where(table.c.code.in_(missing))
+            ))
+
+        return {code: self._ids[code] for code in codes if code in self._ids}
+
+    def get_codes(self, session: Session, stock_ids: Sequence[int]) -> Dict[int, str]:
+        """获取 stock_id 对应的股票代码"""
+        missing = {stock_id for stock_id in stock_ids if stock_id not in self._codes}
+        if missing:
+            table = self.model.__table__
+            self._remember(session.execute(
+                select(table.c.stock_id, table.c.code).where(table.c.stock_id.in_(missing))
+            ))
+
+        return {stock_id: self._codes[stock_id] for stock_id in stock_ids if stock_id in self._codes}
+
+    def sync_from_stocks(self, session: Session) -> int:
+        """为 stocks 和 daily_data 中出现的全部股票代码登记ID"""
+        table = self.model.__table__
+        codes = select(Stock.__table__.c.code).union(
+            select(DailyData.__table__.c.stock_code)
+        )
+        result = session.execute(
+            sqlite_insert(table).from_select(
+                ['code'], select(codes.subquery().c[0]).where(true())
+            ).on_conflict_do_nothing(index_elements=['code'])
+        )
+        session.commit()
+        return result.rowcount
+
+
+class CompactDailyDataCRUD(BaseCRUD[DailyDataCompact]):
+    """紧凑日线数据CRUD操作，对外仍使用股票代码和日期"""
+
+    conflict_columns = ('stock_id', 'trade_day')
+
+    def __init__(self, model: Type[DailyDataCompact], stock_keys: StockKeyCRUD):
+        """
+        初始化紧凑日线数据CRUD
+
+        Args:
+            model: 数据库模型类
+            stock_keys: 股票代码映射CRUD
+        """
+        super().__init__(model)
+        self.stock_keys = stock_keys
+
+    def batch_upsert(
+        self,
+        session: Session,
+        data_list: List[dict],
+        chunk_size: int = 1000
+    ) -> int:
+        """
+        批量插入或更新日线数据
+
+        Args:
+            session: 数据库会话
+            data_list: 与 daily_data 结构相同的字典列表（stock_code、trade_date）
+            chunk_size: 每个事务写入的行数
+
+        Returns:
+            int: 新增或变化的行数
+        """
+        stock_ids = self.stock_keys.get_ids(
+            session, {data['stock_code'] for data in data_list}, create=True
+        )
+        value_columns = set(self.model.__table__.columns.keys())
+
+        rows = []
         for data in data_list:
-            existing = self.get_by_stock_and_date(
-                session, data['stock_code'], data['trade_date']
+            row = {name: value for name, value in data.items() if name in value_columns}
+            row['stock_id'] = stock_ids[data['stock_code']]
+            row['trade_day'] = to_trade_day(data['trade_date'])
+            rows.append(row)
+
+        affected = 0
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            try:
+                for columns, group in self._group_by_columns(chunk).items():
+                    result = session.execute(self._upsert_statement(columns), group)
+                    affected += result.rowcount
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+        return affected
+
+    def get_frame(
+        self,
+        session: Session,
+        stock_codes: Union[str, Sequence[str]],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        以DataFrame形式获取日线数据，结果结构与 DailyDataCRUD.get_frame 相同
+
+        Args:
+            session: 数据库会话
+            stock_codes: 股票代码或股票代码列表
+            start_date: 开始日期
+            end_date: 结束日期
+            columns: 数值字段列表，默认 DailyDataCRUD.frame_columns
+
+        Returns:
+            pd.DataFrame: 以 trade_date(datetime64) 为索引，按 stock_code、trade_date 升序
+        """
+        if isinstance(stock_codes, str):
+            stock_codes = [stock_codes]
+        columns = list(columns or DailyDataCRUD.frame_columns)
+
+        unknown = [name for name in columns if name not in DailyDataCRUD.frame_columns]
+        if unknown:
+            raise ValueError(f"不支持的字段: {unknown}")
+
+        stock_ids = self.stock_keys.get_ids(session, stock_codes)
+        table = self.model.__table__
+        stmt = select(
+            table.c.stock_id, table.c.trade_day, *[table.c[name] for name in columns]
+        ).where(table.c.stock_id.in_(stock_ids.values()))
+
+        if start_date:
+            stmt = stmt.where(table.c.trade_day >= to_trade_day(start_date))
+        if end_date:
+            stmt = stmt.where(table.c.trade_day <= to_trade_day(end_date))
+
+        rows = session.execute(stmt.order_by(table.c.stock_id, table.c.trade_day)).fetchall()
+        values = list(zip(*rows)) if rows else [()] * (len(columns) + 2)
+
+        # stock_id 向量化还原为股票代码
+        code_lookup = np.empty(max(stock_ids.values(), default=0) + 1, dtype=object)
+        for code, stock_id in stock_ids.items():
+            code_lookup[stock_id] = code
+
+        epoch = np.datetime64(TRADE_DAY_EPOCH, 'D')
+        frame = pd.DataFrame(
+            {
+                'stock_code': code_lookup[np.array(values[0], dtype=np.int64)],
+                **{
+                    name: np.array(values[i + 2], dtype=np.float64)
+                    for i, name in enumerate(columns)
+                }
+            },
+            index=pd.DatetimeIndex(
+                epoch + np.array(values[1], dtype=np.int64), name='trade_date'
             )
-            if existing:
-                updated = self.update(session, existing, data)
-                result.append(updated)
-            else:
-                created = self.create(session, data)
-                result.append(created)
-        return result
+        )
+        return frame.sort_values('stock_code', kind='stable')
+
+    def get_latest_date(self, session: Session, stock_code: str) -> Optional[date]:
+        """获取股票最新交易日期"""
+        stock_ids = self.stock_keys.get_ids(session, [stock_code])
+        if not stock_ids:
+            return None
+
+        trade_day = session.query(func.max(self.model.trade_day)).filter(
+            self.model.stock_id == stock_ids[stock_code]
+        ).scalar()
+        return from_trade_day(trade_day) if trade_day is not None else None
+
+    def migrate_from_daily_data(self, session: Session) -> int:
+        """
+        将 daily_data 中的数据复制到紧凑表
+
+        在数据库内通过 INSERT ... SELECT 完成股票代码和日期的转换。
+
+        Returns:
+            int: 新增或变化的行数
+        """
+        self.stock_keys.sync_from_stocks(session)
+
+        source = DailyData.__table__
+        keys = StockKey.__table__
+        target = self.model.__table__
+        value_columns = list(DailyDataCRUD.frame_columns)
+
+        trade_day = func.cast(
+            func.julianday(source.c.trade_date) - func.julianday(TRADE_DAY_EPOCH.isoformat()),
+            Integer
+        )
+        pivot_select = select(
+            keys.c.stock_id, trade_day, *[source.c[name] for name in value_columns]
+        ).join_from(source, keys, keys.c.code == source.c.stock_code).where(true())
+
+        stmt = sqlite_insert(target).from_select(
+            ['stock_id', 'trade_day', *value_columns], pivot_select
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=self.conflict_columns,
+            set_={name: stmt.excluded[name] for name in value_columns}
+        )
+
+        try:
+            migrated = session.execute(stmt).rowcount
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return migrated
 
 
 class TechnicalIndicatorCRUD(BaseCRUD[TechnicalIndicator]):
@@ -285,7 +1379,25 @@ class TechnicalIndicatorCRUD(BaseCRUD[TechnicalIndicator]):
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
     ) -> List[TechnicalIndicator]:
-        """根据股票代码和指标类型获取技术指标数据"""
+        """根据股票代码和指标类型获取技术指标数据，启用年份分区时合并相关分区"""
+        if self._has_partitions(session, start_date, end_date):
+            records = []
+            for table in self.partition_tables(session, start_date, end_date):
+                stmt = select(table).where(
+                    table.c.stock_code == stock_code,
+                    table.c.indicator_type == indicator_type
+                )
+                if start_date:
+                    stmt = stmt.where(table.c.trade_date >= start_date)
+                if end_date:
+                    stmt = stmt.where(table.c.trade_date <= end_date)
+                records += session.execute(
+                    select(self.model).from_statement(stmt)
+                ).scalars().all()
+
+            records.sort(key=lambda record: record.trade_date, reverse=True)
+            return records
+
         query = session.query(self.model).filter(
             and_(
                 self.model.stock_code == stock_code,
@@ -319,6 +1431,170 @@ class TechnicalIndicatorCRUD(BaseCRUD[TechnicalIndicator]):
         return count
 
 
+class IndicatorDailyCRUD(BaseCRUD[IndicatorDaily]):
+    """技术指标宽表CRUD操作"""
+
+    conflict_columns = ('stock_code', 'trade_date')
+
+    @property
+    def indicator_columns(self) -> List[str]:
+        """宽表中的指标列"""
+        return [
+            column.name for column in self.model.__table__.columns
+            if column.name not in self.conflict_columns
+        ]
+
+    def batch_upsert(
+        self,
+        session: Session,
+        data_list: List[dict],
+        chunk_size: int = 1000
+    ) -> int:
+        """
+        批量写入指标，已有行只更新传入的指标列
+
+        Args:
+            session: 数据库会话
+            data_list: 包含 stock_code、trade_date 和指标列的字典列表
+            chunk_size: 每个事务写入的行数
+
+        Returns:
+            int: 新增或变化的行数
+        """
+        affected = 0
+        for start in range(0, len(data_list), chunk_size):
+            chunk = data_list[start:start + chunk_size]
+            try:
+                for columns, group in self._group_by_columns(chunk).items():
+                    result = session.execute(self._upsert_statement(columns), group)
+                    affected += result.rowcount
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+        return affected
+
+    def get_arrays(
+        self,
+        session: Session,
+        stock_code: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        获取按交易日对齐的指标数组
+
+        Args:
+            session: 数据库会话
+            stock_code: 股票代码
+            start_date: 开始日期
+            end_date: 结束日期
+            columns: 指标列，默认全部
+
+        Returns:
+            Dict[str, np.ndarray]: 'trade_date'(datetime64[D]) 及各指标列的
+                float64数组，长度一致，按交易日升序，缺失值为NaN
+        """
+        columns = list(columns or self.indicator_columns)
+        unknown = [name for name in columns if name not in self.indicator_columns]
+        if unknown:
+            raise ValueError(f"不支持的指标列: {unknown}")
+
+        table = self.model.__table__
+        stmt = select(
+            type_coerce(table.c.trade_date, String),
+            *[table.c[name] for name in columns]
+        ).where(table.c.stock_code == stock_code)
+
+        if start_date:
+            stmt = stmt.where(table.c.trade_date >= start_date)
+        if end_date:
+            stmt = stmt.where(table.c.trade_date <= end_date)
+
+        rows = session.execute(stmt.order_by(table.c.trade_date)).fetchall()
+        values = list(zip(*rows)) if rows else [()] * (len(columns) + 1)
+
+        arrays = {'trade_date': np.array(values[0], dtype='datetime64[D]')}
+        for i, name in enumerate(columns):
+            arrays[name] = np.array(values[i + 1], dtype=np.float64)
+        return arrays
+
+    def migrate_from_eav(
+        self,
+        session: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        delete_source: bool = False
+    ) -> Dict[str, int]:
+        """
+        将 technical_indicators（EAV）中的数据迁移到宽表
+
+        在数据库内用一条 INSERT ... SELECT ... GROUP BY 完成行列转换，
+        映射关系见 models.INDICATOR_EAV_COLUMNS，未映射的指标保留在原表。
+
+        Args:
+            session: 数据库会话
+            start_date: 开始日期
+            end_date: 结束日期
+            delete_source: 迁移后是否删除原表中已映射的行
+
+        Returns:
+            Dict[str, int]: migrated(写入宽表的行数)、deleted(删除的EAV行数)
+        """
+        source = TechnicalIndicator.__table__
+        target = self.model.__table__
+        columns = sorted(set(INDICATOR_EAV_COLUMNS.values()))
+
+        def pivot(column: str):
+            keys = [key for key, name in INDICATOR_EAV_COLUMNS.items() if name == column]
+            matched = or_(*[
+                and_(source.c.indicator_type == indicator_type,
+                     source.c.indicator_param == indicator_param)
+                for indicator_type, indicator_param in keys
+            ])
+            return func.max(case((matched, source.c.value)))
+
+        mapped = or_(*[
+            and_(source.c.indicator_type == indicator_type,
+                 source.c.indicator_param == indicator_param)
+            for indicator_type, indicator_param in INDICATOR_EAV_COLUMNS
+        ])
+        conditions = [mapped]
+        if start_date:
+            conditions.append(source.c.trade_date >= start_date)
+        if end_date:
+            conditions.append(source.c.trade_date <= end_date)
+
+        # SQLite 要求 INSERT ... SELECT 形式的 upsert 带 WHERE 子句
+        pivot_select = select(
+            source.c.stock_code, source.c.trade_date, *[pivot(name) for name in columns]
+        ).where(true(), *conditions).group_by(source.c.stock_code, source.c.trade_date)
+
+        stmt = sqlite_insert(target).from_select(
+            ['stock_code', 'trade_date', *columns], pivot_select
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=self.conflict_columns,
+            set_={
+                name: func.coalesce(stmt.excluded[name], target.c[name])
+                for name in columns
+            }
+        )
+
+        try:
+            migrated = session.execute(stmt).rowcount
+            deleted = 0
+            if delete_source:
+                deleted = session.execute(source.delete().where(*conditions)).rowcount
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return {'migrated': migrated, 'deleted': deleted}
+
+
 class MarketIndexCRUD(BaseCRUD[MarketIndex]):
     """市场指数CRUD操作"""
 
@@ -343,6 +1619,346 @@ class MarketIndexCRUD(BaseCRUD[MarketIndex]):
         ).order_by(desc(self.model.trade_date)).first()
 
 
+class MarketDailyStatsCRUD(BaseCRUD[MarketDailyStats]):
+    """市场每日涨跌统计CRUD操作"""
+
+    # 涨跌停判定阈值（涨跌幅百分比）
+    limit_threshold = 9.8
+
+    # 大幅下跌判定阈值（涨跌幅百分比）
+    big_drop_threshold = -5
+
+    # 统计字段（不含交易日期和更新时间）
+    stat_columns = (
+        'total_stocks', 'up_count', 'down_count', 'flat_count',
+        'limit_up', 'limit_down', 'big_down_count',
+        'total_amount', 'advancing_volume',
+    ) + tuple(BREADTH_CHANGE_BUCKETS)
+
+    # 统计所依据的 daily_data 字段
+    source_columns = ('change_percent', 'amount', 'volume')
+
+    def contribution(
+        self,
+        change: Optional[float],
+        amount: Optional[float],
+        volume: Optional[float]
+    ) -> Dict[str, float]:
+        """单只股票单日对各统计字段的贡献，判定规则与 _aggregate 一致（NULL 不满足任何比较）"""
+        def above(threshold):
+            return change is not None and change > threshold
+
+        def below(threshold):
+            return change is not None and change < threshold
+
+        values = {
+            'total_stocks': 1,
+            'up_count': int(above(0)),
+            'down_count': int(below(0)),
+            'flat_count': int(change is None or change == 0),
+            'limit_up': int(change is not None and change >= self.limit_threshold),
+            'limit_down': int(change is not None and change <= -self.limit_threshold),
+            'big_down_count': int(below(self.big_drop_threshold)),
+            'total_amount': amount or 0,
+            'advancing_volume': (volume or 0) if above(0) else 0,
+        }
+        for name, (low, high) in BREADTH_CHANGE_BUCKETS.items():
+            if high is not None and high <= 0:
+                inside = below(high) and (low is None or change >= low)
+            else:
+                inside = above(low) and (high is None or change <= high)
+            values[name] = int(inside)
+        return values
+
+    def apply_changes(
+        self,
+        session: Session,
+        changes: Sequence[Tuple[date, Optional[tuple], tuple]]
+    ) -> int:
+        """
+        按 daily_data 行的新旧数值增量更新统计，不提交事务
+
+        统计表中已有的交易日加上新旧贡献之差；还没有统计的交易日
+        直接聚合当日的 daily_data（须在行写入之后调用）。
+
+        Args:
+            session: 数据库会话
+            changes: (交易日期, 原值或None, 新值) 列表，值按 source_columns 排列
+
+        Returns:
+            int: 更新的统计行数
+        """
+        if not changes:
+            return 0
+
+        deltas: Dict[date, Dict[str, float]] = {}
+        for trade_date, old, new in changes:
+            delta = deltas.setdefault(trade_date, dict.fromkeys(self.stat_columns, 0))
+            for name, value in self.contribution(*new).items():
+                delta[name] += value
+            if old is not None:
+                for name, value in self.contribution(*old).items():
+                    delta[name] -= value
+
+        table = self.model.__table__
+        known = set(session.execute(
+            select(table.c.trade_date).where(table.c.trade_date.in_(list(deltas)))
+        ).scalars())
+
+        count = 0
+        params = [
+            dict({f'd_{name}': value for name, value in delta.items()}, b_trade_date=trade_date)
+            for trade_date, delta in deltas.items()
+            if trade_date in known and any(delta.values())
+        ]
+        if params:
+            stmt = update(table).where(
+                table.c.trade_date == bindparam('b_trade_date')
+            ).values(dict(
+                {name: table.c[name] + bindparam(f'd_{name}') for name in self.stat_columns},
+                updated_at=datetime.now()
+            ))
+            count += session.execute(stmt, params).rowcount
+
+        missing = sorted(set(deltas) - known)
+        if missing:
+            source = DailyData.__table__
+            count += self._write_aggregate(session, source, source.c.trade_date.in_(missing))
+
+        return count
+
+    def _aggregate(self, table, *conditions):
+        """按交易日对 daily_data（主表或年份分区表）做一次 SUM(CASE ...) 聚合"""
+        change = table.c.change_percent
+
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+        buckets = []
+        for name, (low, high) in BREADTH_CHANGE_BUCKETS.items():
+            if high is not None and high <= 0:
+                bounds = [change < high] + ([change >= low] if low is not None else [])
+            else:
+                bounds = [change > low] + ([change <= high] if high is not None else [])
+            buckets.append(count_if(and_(*bounds)).label(name))
+
+        return select(
+            table.c.trade_date,
+            func.count().label('total_stocks'),
+            count_if(change > 0).label('up_count'),
+            count_if(change < 0).label('down_count'),
+            count_if(func.coalesce(change, 0) == 0).label('flat_count'),
+            count_if(change >= self.limit_threshold).label('limit_up'),
+            count_if(change <= -self.limit_threshold).label('limit_down'),
+            count_if(change < self.big_drop_threshold).label('big_down_count'),
+            func.coalesce(func.sum(table.c.amount), 0).label('total_amount'),
+            func.coalesce(
+                func.sum(case((change > 0, table.c.volume), else_=0)), 0
+            ).label('advancing_volume'),
+            *buckets
+        ).where(*conditions).group_by(table.c.trade_date)
+
+    def _write_aggregate(self, session: Session, table, *conditions) -> int:
+        """将聚合结果写入统计表，已存在的交易日覆盖更新"""
+        aggregate = self._aggregate(table, *conditions)
+        aggregate = aggregate.add_columns(literal(datetime.now()).label('updated_at'))
+
+        columns = ['trade_date', *self.stat_columns, 'updated_at']
+        stmt = sqlite_insert(self.model).from_select(columns, aggregate)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['trade_date'],
+            set_={name: stmt.excluded[name] for name in columns[1:]}
+        )
+        return session.execute(stmt).rowcount
+
+    def refresh(self, session: Session, trade_dates: Sequence[date], chunk_size: int = 500) -> int:
+        """
+        重新统计指定交易日
+
+        每个交易日只聚合当日的 daily_data（走 idx_daily_trade_date），
+        用于校正增量维护的统计。
+
+        Args:
+            session: 数据库会话
+            trade_dates: 交易日期列表
+            chunk_size: 每条语句包含的交易日数
+
+        Returns:
+            int: 写入的统计行数
+        """
+        trade_dates = sorted(set(trade_dates))
+        table = DailyData.__table__
+
+        count = 0
+        try:
+            for start in range(0, len(trade_dates), chunk_size):
+                chunk = trade_dates[start:start + chunk_size]
+                count += self._write_aggregate(session, table, table.c.trade_date.in_(chunk))
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return count
+
+    def rebuild(
+        self,
+        session: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> int:
+        """
+        按 daily_data 重建日期范围内的统计（用于关闭增量维护的批量回填之后）
+
+        已归档的年份逐个分区聚合。
+
+        Args:
+            session: 数据库会话
+            start_date: 开始日期，默认不限
+            end_date: 结束日期，默认不限
+
+        Returns:
+            int: 写入的统计行数
+        """
+        stale = []
+        if start_date:
+            stale.append(self.model.trade_date >= start_date)
+        if end_date:
+            stale.append(self.model.trade_date <= end_date)
+
+        partitions = session.info.get('partitions')
+        years = partitions.years_between(start_date, end_date) if partitions is not None else []
+
+        try:
+            session.query(self.model).filter(*stale).delete(synchronize_session=False)
+            table = DailyData.__table__
+            count = self._write_aggregate(
+                session, table, *self._date_conditions(table, start_date, end_date)
+            )
+            session.commit()
+
+            # SQLite 不允许在事务中附加分区，每个分区单独提交
+            for year in years:
+                partitions.attach(session.connection(), [year])
+                table = partitions.table(DailyData.__tablename__, year)
+                count += self._write_aggregate(
+                    session, table, *self._date_conditions(table, start_date, end_date)
+                )
+                session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return count
+
+    @staticmethod
+    def _date_conditions(table, start_date: Optional[date], end_date: Optional[date]) -> list:
+        """表上的日期范围条件"""
+        conditions = [true()]
+        if start_date:
+            conditions.append(table.c.trade_date >= start_date)
+        if end_date:
+            conditions.append(table.c.trade_date <= end_date)
+        return conditions
+
+    def compute(self, session: Session, trade_date: date) -> Dict[str, Any]:
+        """直接从 daily_data 聚合单个交易日的统计，不写入统计表"""
+        table = DailyData.__table__
+        partitions = session.info.get('partitions')
+        if partitions is not None and trade_date.year in partitions.years():
+            partitions.attach(session.connection(), [trade_date.year])
+            table = partitions.table(table.name, trade_date.year)
+        row = session.execute(self._aggregate(table, table.c.trade_date == trade_date)).first()
+        if row is None:
+            return {name: 0 for name in self.stat_columns}
+        return {name: row._mapping[name] for name in self.stat_columns}
+
+    def get_breadth(self, session: Session, trade_date: date) -> Dict[str, Any]:
+        """
+        获取单个交易日的涨跌统计
+
+        优先读取统计表，没有记录时回退到对 daily_data 的聚合查询。
+
+        Returns:
+            Dict[str, Any]: stat_columns 中的全部字段
+        """
+        stats = self.get_by_date(session, trade_date)
+        if stats is None:
+            return self.compute(session, trade_date)
+        return {name: getattr(stats, name) for name in self.stat_columns}
+
+    def get_by_date(self, session: Session, trade_date: date) -> Optional[MarketDailyStats]:
+        """根据交易日期获取统计"""
+        return session.get(self.model, trade_date)
+
+    def get_range(
+        self,
+        session: Session,
+        start_date: date,
+        end_date: date
+    ) -> List[MarketDailyStats]:
+        """获取日期范围内的统计，按交易日期升序"""
+        return session.query(self.model).filter(
+            and_(
+                self.model.trade_date >= start_date,
+                self.model.trade_date <= end_date
+            )
+        ).order_by(self.model.trade_date).all()
+
+
+class TradingCalendarCRUD(BaseCRUD[TradingCalendar]):
+    """交易日历CRUD操作"""
+
+    def get_dates(
+        self,
+        session: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[date]:
+        """获取日期范围内的交易日，按日期升序"""
+        query = session.query(self.model.trade_date)
+        if start_date:
+            query = query.filter(self.model.trade_date >= start_date)
+        if end_date:
+            query = query.filter(self.model.trade_date <= end_date)
+        return [row.trade_date for row in query.order_by(self.model.trade_date)]
+
+    def replace_dates(self, session: Session, trade_dates: Sequence[date]) -> int:
+        """
+        以给定交易日覆盖其日期范围内的日历
+
+        范围内不在列表中的日期（如临时休市）会被删除，范围外的记录保持不变。
+
+        Args:
+            session: 数据库会话
+            trade_dates: 交易日列表
+
+        Returns:
+            int: 写入后范围内的交易日数
+        """
+        trade_dates = sorted(set(trade_dates))
+        if not trade_dates:
+            return 0
+
+        try:
+            session.query(self.model).filter(
+                and_(
+                    self.model.trade_date >= trade_dates[0],
+                    self.model.trade_date <= trade_dates[-1]
+                )
+            ).delete(synchronize_session=False)
+            session.execute(
+                insert(self.model.__table__),
+                [{'trade_date': trade_date} for trade_date in trade_dates]
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return len(trade_dates)
+
+
 class AnalysisResultCRUD(BaseCRUD[AnalysisResult]):
     """分析结果CRUD操作"""
 
@@ -413,10 +2029,150 @@ class DataUpdateLogCRUD(BaseCRUD[DataUpdateLog]):
         return self.create(session, log_data)
 
 
+class SyncCheckpointCRUD(BaseCRUD[SyncCheckpoint]):
+    """同步检查点CRUD操作"""
+
+    def get_completed(self, session: Session, run_id: int, run_key: str = '') -> set:
+        """获取同步任务在指定参数下已完成的 (阶段, 股票代码) 集合"""
+        rows = session.query(self.model.phase, self.model.stock_code).filter(
+            self.model.run_id == run_id,
+            self.model.run_key == run_key
+        )
+        return {(row.phase, row.stock_code) for row in rows}
+
+    def get_run_keys(self, session: Session, run_id: int) -> set:
+        """获取同步任务检查点中出现的参数标识"""
+        rows = session.query(self.model.run_key).filter(
+            self.model.run_id == run_id
+        ).distinct()
+        return {row.run_key for row in rows}
+
+    def mark_completed(
+        self,
+        session: Session,
+        run_id: int,
+        units: Sequence[Tuple[str, str]],
+        run_key: str = ''
+    ) -> int:
+        """
+        批量记录已完成的工作单元，一个事务提交
+
+        Args:
+            session: 数据库会话
+            run_id: 同步任务ID
+            units: (阶段, 股票代码) 列表
+            run_key: 同步参数标识
+
+        Returns:
+            int: 新记录的单元数
+        """
+        if not units:
+            return 0
+
+        now = datetime.now()
+        try:
+            result = session.execute(
+                sqlite_insert(self.model.__table__).on_conflict_do_nothing(),
+                [
+                    {
+                        'run_id': run_id, 'phase': phase, 'stock_code': code,
+                        'run_key': run_key, 'completed_at': now
+                    }
+                    for phase, code in units
+                ]
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return result.rowcount
+
+    def clear(self, session: Session, run_id: int) -> int:
+        """删除同步任务的全部检查点"""
+        count = session.query(self.model).filter(
+            self.model.run_id == run_id
+        ).delete(synchronize_session=False)
+        session.commit()
+        return count
+
+
+class NoDataRangeCRUD(BaseCRUD[NoDataRange]):
+    """无数据区间CRUD操作"""
+
+    def record(
+        self,
+        session: Session,
+        ranges: Sequence[Tuple[str, date, date]]
+    ) -> int:
+        """
+        批量记录无数据区间，同一股票同一开始日期的记录以较长的区间为准
+
+        Args:
+            session: 数据库会话
+            ranges: (股票代码, 开始日期, 结束日期) 列表
+
+        Returns:
+            int: 写入的记录数
+        """
+        if not ranges:
+            return 0
+
+        table = self.model.__table__
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['stock_code', 'start_date'],
+            set_={
+                'end_date': func.max(table.c.end_date, stmt.excluded.end_date),
+                'recorded_at': stmt.excluded.recorded_at
+            }
+        )
+
+        now = datetime.now()
+        try:
+            result = session.execute(stmt, [
+                {'stock_code': code, 'start_date': start, 'end_date': end, 'recorded_at': now}
+                for code, start, end in ranges
+            ])
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+        return result.rowcount
+
+    def get_ranges(
+        self,
+        session: Session,
+        stock_codes: Sequence[str]
+    ) -> Dict[str, List[Tuple[date, date]]]:
+        """获取股票的无数据区间，按开始日期升序"""
+        if not stock_codes:
+            return {}
+
+        rows = session.query(
+            self.model.stock_code, self.model.start_date, self.model.end_date
+        ).filter(
+            self.model.stock_code.in_(stock_codes)
+        ).order_by(self.model.stock_code, self.model.start_date)
+
+        ranges: Dict[str, List[Tuple[date, date]]] = {}
+        for row in rows:
+            ranges.setdefault(row.stock_code, []).append((row.start_date, row.end_date))
+        return ranges
+
+
 # 创建CRUD实例
-stock_crud = StockCRUD(Stock)
-daily_data_crud = DailyDataCRUD(DailyData)
+stock_crud = StockCRUD(Stock, stock_metadata_cache)
+market_stats_crud = MarketDailyStatsCRUD(MarketDailyStats)
+daily_data_crud = DailyDataCRUD(DailyData, stats_crud=market_stats_crud)
+stock_key_crud = StockKeyCRUD(StockKey)
+daily_data_compact_crud = CompactDailyDataCRUD(DailyDataCompact, stock_key_crud)
 indicator_crud = TechnicalIndicatorCRUD(TechnicalIndicator)
+indicator_daily_crud = IndicatorDailyCRUD(IndicatorDaily)
 market_index_crud = MarketIndexCRUD(MarketIndex)
+trading_calendar_crud = TradingCalendarCRUD(TradingCalendar)
 analysis_result_crud = AnalysisResultCRUD(AnalysisResult)
-update_log_crud = DataUpdateLogCRUD(DataUpdateLog)
\ No newline at end of file
+update_log_crud = DataUpdateLogCRUD(DataUpdateLog)
+sync_checkpoint_crud = SyncCheckpointCRUD(SyncCheckpoint)
+no_data_range_crud = NoDataRangeCRUD(NoDataRange)
@@ -76,6 +76,93 @@ def check_database():
             print(f"  {table_name}: {count} 条记录")
 
 
+def sync_bar_store(repair_only: bool = False):
+    """将日线数据回填到列式K线存储，repair_only 时只补写中断写入留下的日期范围"""
+    from trevanquant.database.crud import daily_data_crud
+
+    if daily_data_crud.bar_store is None:
+        print("未配置列式K线存储（DATABASE_BAR_STORE_PATH）")
+        return
+
+    if repair_only:
+        print("正在补写列式K线存储...")
+        with db_manager.session_scope(readonly=True) as session:
+            count = daily_data_crud.repair_bar_store(session)
+        print(f"✓ 列式K线存储补写完成: {count} 条记录")
+        return
+
+    print("正在回填列式K线存储...")
+
+    with db_manager.session_scope(readonly=True) as session:
+        count = daily_data_crud.sync_bar_store(session)
+
+    print(f"✓ 列式K线存储回填完成: {count} 条记录")
+
+
+def migrate_indicators(delete_source: bool = False):
+    """将技术指标从EAV表迁移到宽表"""
+    from trevanquant.database.crud import indicator_daily_crud
+
+    print("正在迁移技术指标到宽表...")
+
+    with db_manager.session_scope() as session:
+        result = indicator_daily_crud.migrate_from_eav(session, delete_source=delete_source)
+
+    print(f"✓ 技术指标迁移完成: 写入 {result['migrated']} 行，删除 {result['deleted']} 条EAV记录")
+
+
+def migrate_compact():
+    """将日线数据复制到紧凑表（整数 stock_id 和交易日序号）"""
+    from trevanquant.database.crud import daily_data_compact_crud
+
+    print("正在迁移日线数据到紧凑表...")
+
+    with db_manager.session_scope() as session:
+        count = daily_data_compact_crud.migrate_from_daily_data(session)
+
+    print(f"✓ 紧凑表迁移完成: {count} 条记录")
+
+
+def rebuild_market_stats():
+    """按 daily_data 重建市场每日涨跌统计"""
+    from trevanquant.database.crud import market_stats_crud
+
+    print("正在重建市场每日统计...")
+
+    with db_manager.session_scope() as session:
+        count = market_stats_crud.rebuild(session)
+
+    print(f"✓ 市场每日统计重建完成: {count} 个交易日")
+
+
+def update_trading_calendar():
+    """从akshare获取交易日历并写入数据库"""
+    from trevanquant.database.calendar import trading_calendar
+
+    print("正在更新交易日历...")
+
+    count = trading_calendar.refresh()
+
+    print(f"✓ 交易日历更新完成: {count} 个交易日，覆盖 {trading_calendar.coverage}")
+
+
+def archive_year(year: int):
+    """将指定年份的数据迁移到只读年份分区"""
+    partitions = db_manager.partitions
+    if partitions is None:
+        print("未配置年份分区（DATABASE_PARTITION_DIR）")
+        return
+
+    print(f"正在归档 {year} 年数据...")
+
+    with db_manager.engine.connect() as conn:
+        counts = partitions.archive_year(conn, year)
+
+    for table_name, count in counts.items():
+        print(f"  {table_name}: {count} 条记录")
+    print(f"✓ {year} 年数据已归档到 {partitions.path(year)}")
+
+
 def create_sample_stock():
     """创建示例股票数据（用于测试）"""
     print("正在创建示例股票数据...")
@@ -136,6 +223,13 @@ def main():
         print("  python migrations.py reset     - 重置数据库")
         print("  python migrations.py check     - 检查数据库状态")
         print("  python migrations.py sample    - 创建示例数据")
+        print("  python migrations.py bars      - 回填列式K线存储")
+        print("  python migrations.py bars --repair - 补写中断写入遗留的列式存储范围")
+        print("  python migrations.py indicators [--delete-source] - 迁移技术指标到宽表")
+        print("  python migrations.py compact   - 迁移日线数据到紧凑表")
+        print("  python migrations.py stats     - 重建市场每日统计")
+        print("  python migrations.py calendar  - 更新交易日历")
+        print("  python migrations.py archive <year> - 归档指定年份到分区")
         return
 
     command = sys.argv[1]
@@ -148,6 +242,18 @@ def main():
         check_database()
     elif command == 'sample':
         create_sample_stock()
+    elif command == 'bars':
+        sync_bar_store(repair_only='--repair' in sys.argv[2:])
+    elif command == 'indicators':
+        migrate_indicators(delete_source='--delete-source' in sys.argv[2:])
+    elif command == 'compact':
+        migrate_compact()
+    elif command == 'stats':
+        rebuild_market_stats()
+    elif command == 'calendar':
+        update_trading_calendar()
+    elif command == 'archive' and len(sys.argv) > 2:
+        archive_year(int(sys.argv[2]))
     else:
         print(f"未知命令: {command}")
 
@@ -14,6 +14,9 @@ from sqlalchemy.orm import Mapped, mapped_column
 
 Base = declarative_base()
 
+# 表结构版本，修改模型后递增，首次连接时据此决定是否执行建表
+SCHEMA_VERSION = 8
+
 
 class Stock(Base):
     """股票基础信息表"""
@@ -107,6 +110,65 @@ class DailyData(Base):
     )
 
 
+class StockKey(Base):
+    """股票代码整数映射表，为紧凑表提供 stock_id"""
+    __tablename__ = "stock_keys"
+
+    # 股票整数ID
+    stock_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    # 股票代码
+    code: Mapped[str] = mapped_column(String(10), nullable=False, unique=True)
+
+
+# 交易日序号起点，序号为相对该日的天数（A股开市前，序号均为正数）
+TRADE_DAY_EPOCH = date(1990, 1, 1)
+
+
+class DailyDataCompact(Base):
+    """紧凑日线数据表：以整数 stock_id 和交易日序号为主键"""
+    __tablename__ = "daily_data_compact"
+
+    # 股票整数ID，对应 stock_keys.stock_id
+    stock_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # 交易日序号，相对 TRADE_DAY_EPOCH 的天数
+    trade_day: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # 开盘价
+    open_price: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # 最高价
+    high_price: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # 最低价
+    low_price: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # 收盘价
+    close_price: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # 成交量
+    volume: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # 成交额
+    amount: Mapped[Optional[float]] = mapped_column(Float)
+
+    # 涨跌额
+    change_amount: Mapped[Optional[float]] = mapped_column(Float)
+
+    # 涨跌幅
+    change_percent: Mapped[Optional[float]] = mapped_column(Float)
+
+    # 换手率
+    turnover_rate: Mapped[Optional[float]] = mapped_column(Float)
+
+    # 主键即聚簇索引（WITHOUT ROWID）
+    __table_args__ = (
+        Index('idx_daily_compact_trade_day', 'trade_day'),
+        {'sqlite_with_rowid': False},
+    )
+
+
 class TechnicalIndicator(Base):
     """技术指标表"""
     __tablename__ = "technical_indicators"
@@ -142,6 +204,64 @@ class TechnicalIndicator(Base):
     )
 
 
+class IndicatorDaily(Base):
+    """技术指标宽表：每只股票每个交易日一行，每个指标序列一列"""
+    __tablename__ = "indicator_daily"
+
+    # 股票代码
+    stock_code: Mapped[str] = mapped_column(String(10), primary_key=True)
+
+    # 交易日期
+    trade_date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    # 均线
+    ma5: Mapped[Optional[float]] = mapped_column(Float)
+    ma10: Mapped[Optional[float]] = mapped_column(Float)
+    ma20: Mapped[Optional[float]] = mapped_column(Float)
+
+    # MACD
+    macd_dif: Mapped[Optional[float]] = mapped_column(Float)
+    macd_dea: Mapped[Optional[float]] = mapped_column(Float)
+    macd_hist: Mapped[Optional[float]] = mapped_column(Float)
+
+    # KDJ
+    kdj_k: Mapped[Optional[float]] = mapped_column(Float)
+    kdj_d: Mapped[Optional[float]] = mapped_column(Float)
+    kdj_j: Mapped[Optional[float]] = mapped_column(Float)
+
+    # 布林带
+    boll_upper: Mapped[Optional[float]] = mapped_column(Float)
+    boll_mid: Mapped[Optional[float]] = mapped_column(Float)
+    boll_lower: Mapped[Optional[float]] = mapped_column(Float)
+
+    # RSI
+    rsi: Mapped[Optional[float]] = mapped_column(Float)
+
+    # 主键即聚簇索引（WITHOUT ROWID），不再存储自增ID
+    __table_args__ = (
+        Index('idx_indicator_daily_trade_date', 'trade_date'),
+        {'sqlite_with_rowid': False},
+    )
+
+
+# technical_indicators 中 (indicator_type, indicator_param) 到宽表列的映射
+INDICATOR_EAV_COLUMNS = {
+    ('MA', 'MA5'): 'ma5',
+    ('MA', 'MA10'): 'ma10',
+    ('MA', 'MA20'): 'ma20',
+    ('MACD', 'DIF'): 'macd_dif',
+    ('MACD', 'DEA'): 'macd_dea',
+    ('MACD', 'MACD'): 'macd_hist',
+    ('KDJ', 'K'): 'kdj_k',
+    ('KDJ', 'D'): 'kdj_d',
+    ('KDJ', 'J'): 'kdj_j',
+    ('BOLL', 'UPPER'): 'boll_upper',
+    ('BOLL', 'MID'): 'boll_mid',
+    ('BOLL', 'LOWER'): 'boll_lower',
+    ('RSI', 'RSI14'): 'rsi',
+}
+
+
 class MarketIndex(Base):
     """市场指数表"""
     __tablename__ = "market_indices"
@@ -193,6 +313,70 @@ class MarketIndex(Base):
     )
 
 
+class MarketDailyStats(Base):
+    """市场每日涨跌统计表，日线数据写入时按交易日增量维护"""
+    __tablename__ = "market_daily_stats"
+
+    # 交易日期
+    trade_date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    # 有数据的股票数
+    total_stocks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # 上涨、下跌、平盘家数
+    up_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    down_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    flat_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # 涨停、跌停家数
+    limit_up: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    limit_down: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # 跌幅超过5%的家数
+    big_down_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # 总成交额
+    total_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+    # 上涨股票的成交量合计
+    advancing_volume: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+    # 涨跌幅分布（家数），区间见 BREADTH_CHANGE_BUCKETS
+    change_down_7: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    change_down_5: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    change_down_3: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    change_down_0: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    change_up_0: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    change_up_3: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    change_up_5: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    change_up_7: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # 更新时间
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+
+# 涨跌幅分布区间 (下限, 上限)：下跌区间为 [下限, 上限)，上涨区间为 (下限, 上限]，
+# None 表示不设限；涨跌幅为0的股票只计入平盘
+BREADTH_CHANGE_BUCKETS = {
+    'change_down_7': (None, -7),
+    'change_down_5': (-7, -5),
+    'change_down_3': (-5, -3),
+    'change_down_0': (-3, 0),
+    'change_up_0': (0, 3),
+    'change_up_3': (3, 5),
+    'change_up_5': (5, 7),
+    'change_up_7': (7, None),
+}
+
+
+class TradingCalendar(Base):
+    """交易日历表：只记录开市日，覆盖范围内未记录的日期为休市日"""
+    __tablename__ = "trading_calendar"
+
+    # 交易日期
+    trade_date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+
 class AnalysisResult(Base):
     """分析结果表（为策略预留）"""
     __tablename__ = "analysis_results"
@@ -270,4 +454,49 @@ class DataUpdateLog(Base):
     __table_args__ = (
         Index('idx_update_log_type_time', 'data_type', 'start_time'),
         Index('idx_update_log_status', 'status'),
-    )
\ No newline at end of file
+    )
+
+
+class SyncCheckpoint(Base):
+    """同步检查点表：记录一次同步中已完成的 (阶段, 股票) 工作单元"""
+    __tablename__ = "sync_checkpoints"
+
+    # 所属同步任务，对应 data_update_logs.id
+    run_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # 同步阶段：daily_data, indicators等
+    phase: Mapped[str] = mapped_column(String(30), primary_key=True)
+
+    # 股票代码
+    stock_code: Mapped[str] = mapped_column(String(10), primary_key=True)
+
+    # 同步参数标识（如截止日期和回溯天数），参数不同的任务不互相恢复
+    run_key: Mapped[str] = mapped_column(String(100), nullable=False, default='')
+
+    # 完成时间
+    completed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        {'sqlite_with_rowid': False},
+    )
+
+
+class NoDataRange(Base):
+    """无数据区间表：停牌或请求后确认没有日线数据的日期区间，增量同步不再请求"""
+    __tablename__ = "no_data_ranges"
+
+    # 股票代码
+    stock_code: Mapped[str] = mapped_column(String(10), primary_key=True)
+
+    # 开始日期
+    start_date: Mapped[date] = mapped_column(Date, primary_key=True)
+
+    # 结束日期（含）
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    # 记录时间
+    recorded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        {'sqlite_with_rowid': False},
+    )
@@ -0,0 +1,236 @@
+"""
+全市场面板数据
+将日线数据按 (交易日 × 股票) 对齐为连续数组，供横截面分析使用
+"""
+
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import String, select, type_coerce
+from sqlalchemy.orm import Session
+
+from .crud import daily_data_crud
+
+
+class MarketPanel:
+    """全市场面板：每个字段一个形状为 (交易日数, 股票数) 的数组，停牌处为NaN"""
+
+    def __init__(
+        self,
+        dates: np.ndarray,
+        stock_codes: np.ndarray,
+        fields: Dict[str, np.ndarray]
+    ):
+        """
+        初始化面板
+
+        Args:
+            dates: 交易日轴，datetime64[D] 升序
+            stock_codes: 股票轴，股票代码升序
+            fields: 字段名到 (dates, stocks) 数组的映射
+        """
+        self.dates = dates
+        self.stock_codes = stock_codes
+        self.fields = fields
+
+    @property
+    def shape(self) -> tuple:
+        """面板形状 (交易日数, 股票数)"""
+        return (len(self.dates), len(self.stock_codes))
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """获取字段数组"""
+        return self.fields[field]
+
+    def to_frame(self, field: str) -> pd.DataFrame:
+        """将单个字段转换为以交易日为索引、股票代码为列的DataFrame（不复制数据）"""
+        return pd.DataFrame(
+            self.fields[field],
+            index=pd.DatetimeIndex(self.dates, name='trade_date'),
+            columns=pd.Index(self.stock_codes, name='stock_code'),
+            copy=False
+        )
+
+    def save(self, directory: Union[str, Path]) -> None:
+        """
+        保存为 .npy 文件，供其他进程以内存映射方式打开
+
+        Args:
+            directory: 保存目录
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        np.save(directory / 'dates.npy', self.dates)
+        np.save(directory / 'stock_codes.npy', self.stock_codes)
+        for name, values in self.fields.items():
+            np.save(directory / f'{name}.npy', values)
+
+    @classmethod
+    def open(cls, directory: Union[str, Path], mode: str = 'r') -> 'MarketPanel':
+        """
+        以内存映射方式打开已保存的面板
+
+        Args:
+            directory: 面板目录
+            mode: np.load 的 mmap_mode，默认只读
+
+        Returns:
+            MarketPanel: 字段数组为 numpy.memmap 的面板
+        """
+        directory = Path(directory)
+        dates = np.load(directory / 'dates.npy')
+        stock_codes = np.load(directory / 'stock_codes.npy')
+
+        fields = {
+            path.stem: np.load(path, mmap_mode=mode)
+            for path in sorted(directory.glob('*.npy'))
+            if path.stem not in ('dates', 'stock_codes')
+        }
+        return cls(dates, stock_codes, fields)
+
+
+class MarketPanelLoader:
+    """从 daily_data 加载全市场面板"""
+
+    # 默认加载的OHLCV字段
+    default_fields = ('open_price', 'high_price', 'low_price', 'close_price', 'volume')
+
+    def __init__(self, fetch_size: int = 100_000):
+        """
+        初始化加载器
+
+        Args:
+            fetch_size: 每次从游标读取的行数
+        """
+        self.fetch_size = fetch_size
+
+    def load(
+        self,
+        session: Session,
+        start_date: date,
+        end_date: date,
+        fields: Optional[Sequence[str]] = None,
+        stock_codes: Optional[Sequence[str]] = None,
+        dtype: np.dtype = np.float64,
+        mmap_dir: Optional[Union[str, Path]] = None
+    ) -> MarketPanel:
+        """
+        按日期范围加载面板
+
+        先通过索引确定交易日轴和股票轴，再按 trade_date 顺序扫描一次
+        daily_data（及日期范围涉及的年份分区），将数值直接写入预分配的数组。
+
+        Args:
+            session: 数据库会话
+            start_date: 开始日期
+            end_date: 结束日期
+            fields: 字段列表，默认 default_fields
+            stock_codes: 限定股票代码，默认区间内出现过的全部股票
+            dtype: 数组类型，np.float64 或 np.float32
+            mmap_dir: 指定时数组直接创建为该目录下的内存映射 .npy 文件
+
+        Returns:
+            MarketPanel: 面板数据
+        """
+        fields = list(fields or self.default_fields)
+        unknown = [name for name in fields if name not in daily_data_crud.frame_columns]
+        if unknown:
+            raise ValueError(f"不支持的字段: {unknown}")
+
+        def conditions(table):
+            result = [table.c.trade_date >= start_date, table.c.trade_date <= end_date]
+            if stock_codes is not None:
+                result.append(table.c.stock_code.in_(stock_codes))
+            return result
+
+        # 坐标轴：主库和已归档年份分区合并，均为升序，便于 searchsorted 定位
+        dates, codes = set(), set()
+        for table in daily_data_crud.partition_tables(session, start_date, end_date):
+            trade_date = type_coerce(table.c.trade_date, String)
+            dates.update(session.execute(
+                select(trade_date).where(*conditions(table)).distinct()
+            ).scalars())
+            if stock_codes is None:
+                codes.update(session.execute(
+                    select(table.c.stock_code).where(*conditions(table)).distinct()
+                ).scalars())
+
+        date_axis = np.array(sorted(dates), dtype='U10')
+        if stock_codes is None:
+            code_axis = np.array(sorted(codes), dtype='U10')
+        else:
+            code_axis = np.unique(np.array(stock_codes, dtype='U10'))
+
+        shape = (len(date_axis), len(code_axis))
+        arrays = self._allocate(fields, shape, dtype, mmap_dir)
+
+        for table in daily_data_crud.partition_tables(session, start_date, end_date):
+            stmt = select(
+                type_coerce(table.c.trade_date, String), table.c.stock_code,
+                *[table.c[name] for name in fields]
+            ).where(*conditions(table)).order_by(table.c.trade_date, table.c.stock_code)
+            self._scan(session.execute(stmt), date_axis, code_axis, fields, arrays, dtype)
+
+        panel = MarketPanel(date_axis.astype('datetime64[D]'), code_axis, arrays)
+
+        if mmap_dir is not None:
+            directory = Path(mmap_dir)
+            np.save(directory / 'dates.npy', panel.dates)
+            np.save(directory / 'stock_codes.npy', panel.stock_codes)
+            for values in arrays.values():
+                values.flush()
+
+        return panel
+
+    def _scan(
+        self,
+        result,
+        date_axis: np.ndarray,
+        code_axis: np.ndarray,
+        fields: List[str],
+        arrays: Dict[str, np.ndarray],
+        dtype: np.dtype
+    ) -> None:
+        """分批读取查询结果，按坐标轴写入字段数组"""
+        while True:
+            rows = result.fetchmany(self.fetch_size)
+            if not rows:
+                break
+
+            columns = list(zip(*rows))
+            date_index = np.searchsorted(date_axis, np.array(columns[0], dtype='U10'))
+            code_index = np.searchsorted(code_axis, np.array(columns[1], dtype='U10'))
+
+            for i, name in enumerate(fields):
+                arrays[name][date_index, code_index] = np.array(columns[i + 2], dtype=dtype)
+
+    @staticmethod
+    def _allocate(
+        fields: List[str],
+        shape: tuple,
+        dtype: np.dtype,
+        mmap_dir: Optional[Union[str, Path]]
+    ) -> Dict[str, np.ndarray]:
+        """分配以NaN填充的字段数组，可选直接创建在磁盘上"""
+        if mmap_dir is None:
+            return {name: np.full(shape, np.nan, dtype=dtype) for name in fields}
+
+        directory = Path(mmap_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        arrays = {}
+        for name in fields:
+            values = np.lib.format.open_memmap(
+                directory / f'{name}.npy', mode='w+', dtype=dtype, shape=shape
+            )
+            values[:] = np.nan
+            arrays[name] = values
+        return arrays
+
+
+# 创建全局面板加载器实例
+market_panel_loader = MarketPanelLoader()
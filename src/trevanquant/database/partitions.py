@@ -0,0 +1,214 @@
+"""
+按年分区的历史数据库
+已结束年份的 daily_data 和 technical_indicators 迁移到独立的SQLite文件，
+查询时按日期范围逐个附加（ATTACH）涉及的分区并分别查询；已归档的年份不再写入
+"""
+
+import os
+import stat
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import MetaData, Table, create_engine, select
+from sqlalchemy.engine import Connection
+
+from .models import Base
+
+# 参与分区的表
+PARTITIONED_TABLES = ("daily_data", "technical_indicators")
+
+
+class PartitionManager:
+    """年份分区管理器"""
+
+    def __init__(self, directory: Union[str, Path], max_attached: int = 8):
+        """
+        初始化分区管理器
+
+        Args:
+            directory: 分区文件目录，每年一个 {year}.db
+            max_attached: 单个连接同时附加的分区数上限（SQLite默认最多10个）
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_attached = max_attached
+
+        self._lock = threading.Lock()
+        self._tables: Dict[Tuple[str, int], Table] = {}
+
+    @staticmethod
+    def alias(year: int) -> str:
+        """分区在连接中的附加别名"""
+        return f"p{year}"
+
+    def path(self, year: int) -> Path:
+        """分区文件路径"""
+        return self.directory / f"{year}.db"
+
+    def years(self) -> List[int]:
+        """已存在的分区年份"""
+        return sorted(
+            int(path.stem) for path in self.directory.glob("*.db")
+            if path.stem.isdigit()
+        )
+
+    def years_between(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> List[int]:
+        """日期范围涉及的分区年份"""
+        return [
+            year for year in self.years()
+            if (start_date is None or year >= start_date.year)
+            and (end_date is None or year <= end_date.year)
+        ]
+
+    def is_readonly(self, year: int) -> bool:
+        """分区文件是否已设为只读"""
+        return not os.stat(self.path(year)).st_mode & stat.S_IWUSR
+
+    def table(self, name: str, year: int) -> Table:
+        """分区中的表对象（schema 为附加别名）"""
+        key = (name, year)
+        with self._lock:
+            if key not in self._tables:
+                self._tables[key] = Base.metadata.tables[name].to_metadata(
+                    MetaData(), schema=self.alias(year)
+                )
+            return self._tables[key]
+
+    # ------------------------------------------------------------------
+    # 附加与查询
+    # ------------------------------------------------------------------
+
+    def attach(self, connection: Connection, years: Sequence[int]) -> None:
+        """
+        确保指定年份的分区已附加到当前连接
+
+        附加状态记录在底层DBAPI连接上，连接池复用连接时无需重复附加；
+        超过上限时分离本次不需要的分区。
+        """
+        info = connection.connection.info
+        attached: List[int] = info.setdefault("attached_partitions", [])
+
+        for year in years:
+            if year in attached:
+                continue
+
+            while len(attached) >= self.max_attached:
+                victim = next((y for y in attached if y not in years), None)
+                if victim is None:
+                    raise ValueError(f"查询涉及的分区超过上限 {self.max_attached}")
+                connection.exec_driver_sql(f"DETACH DATABASE {self.alias(victim)}")
+                attached.remove(victim)
+
+            connection.exec_driver_sql(
+                f"ATTACH DATABASE ? AS {self.alias(year)}", (str(self.path(year)),)
+            )
+            attached.append(year)
+
+    def tables(
+        self,
+        connection: Connection,
+        name: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Iterator[Table]:
+        """
+        依次给出主库表和日期范围涉及的各分区表
+
+        每次只附加即将查询的一个分区，涉及的年份再多也不会超过附加上限。
+        分区在迭代到时才附加，调用方应在取下一张表之前执行完对当前表的查询。
+
+        Args:
+            connection: 主库连接
+            name: 表名
+            start_date: 开始日期
+            end_date: 结束日期
+        """
+        yield Base.metadata.tables[name]
+        for year in self.years_between(start_date, end_date):
+            self.attach(connection, [year])
+            yield self.table(name, year)
+
+    # ------------------------------------------------------------------
+    # 归档
+    # ------------------------------------------------------------------
+
+    def create_partition(self, year: int) -> Path:
+        """创建分区文件及表结构"""
+        path = self.path(year)
+        engine = create_engine(f"sqlite:///{path}")
+        try:
+            Base.metadata.create_all(
+                engine, tables=[Base.metadata.tables[name] for name in PARTITIONED_TABLES]
+            )
+        finally:
+            engine.dispose()
+        return path
+
+    def archive_year(
+        self,
+        connection: Connection,
+        year: int,
+        readonly: bool = True
+    ) -> Dict[str, int]:
+        """
+        将主库中某年的数据迁移到分区文件
+
+        迁移后对分区执行 VACUUM 和 ANALYZE，并可设为只读，
+        此后该年份只由操作系统页缓存独立缓存，不再参与主库的维护操作。
+
+        Args:
+            connection: 主库连接（不能处于事务中）
+            year: 年份
+            readonly: 迁移完成后是否将分区文件设为只读
+
+        Returns:
+            Dict[str, int]: 每张表迁移的行数
+        """
+        if self.path(year).exists() and self.is_readonly(year):
+            raise ValueError(f"分区 {year} 已设为只读")
+
+        self.create_partition(year)
+        self.attach(connection, [year])
+
+        start, end = date(year, 1, 1), date(year, 12, 31)
+        counts = {}
+        for name in PARTITIONED_TABLES:
+            source = Base.metadata.tables[name]
+            target = self.table(name, year)
+            in_year = source.c.trade_date.between(start, end)
+
+            counts[name] = connection.execute(
+                target.insert().from_select(
+                    [column.name for column in source.columns],
+                    select(source).where(in_year)
+                )
+            ).rowcount
+            connection.execute(source.delete().where(in_year))
+        connection.commit()
+
+        # 分离后整理分区文件
+        connection.exec_driver_sql(f"DETACH DATABASE {self.alias(year)}")
+        connection.connection.info.get("attached_partitions", []).remove(year)
+        self.compact(year)
+
+        if readonly:
+            mode = os.stat(self.path(year)).st_mode
+            os.chmod(self.path(year), mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+        return counts
+
+    def compact(self, year: int) -> None:
+        """对分区文件执行 VACUUM 和 ANALYZE"""
+        engine = create_engine(f"sqlite:///{self.path(year)}")
+        try:
+            with engine.connect() as conn:
+                conn.exec_driver_sql("VACUUM")
+                conn.exec_driver_sql("ANALYZE")
+        finally:
+            engine.dispose()
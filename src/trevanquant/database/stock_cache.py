@@ -0,0 +1,66 @@
+"""
+股票基础信息缓存
+一次查询加载全部股票的名称、市场、行业和ST/退市标记，供各模块按代码查找
+"""
+
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import Stock
+
+
+class StockMetadataCache:
+    """进程内股票基础信息缓存，stocks 表写入后失效"""
+
+    # 缓存的字段
+    fields = ('code', 'name', 'market', 'industry', 'is_st', 'is_delisted')
+
+    def __init__(self):
+        """初始化缓存"""
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _load(self, session: Session) -> Dict[str, Dict[str, Any]]:
+        """按需加载全部股票信息"""
+        data = self._data
+        if data is not None:
+            return data
+
+        with self._lock:
+            if self._data is None:
+                table = Stock.__table__
+                rows = session.execute(
+                    select(*[table.c[name] for name in self.fields])
+                ).all()
+                self._data = {row.code: dict(row._mapping) for row in rows}
+            return self._data
+
+    def invalidate(self) -> None:
+        """使缓存失效，下次访问时重新加载"""
+        with self._lock:
+            self._data = None
+
+    def all(self, session: Session) -> Dict[str, Dict[str, Any]]:
+        """获取全部股票信息"""
+        return self._load(session)
+
+    def get(self, session: Session, code: str) -> Optional[Dict[str, Any]]:
+        """获取单只股票信息"""
+        return self._load(session).get(code)
+
+    def get_many(self, session: Session, codes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取股票信息，未登记的代码不包含在结果中"""
+        data = self._load(session)
+        return {code: data[code] for code in codes if code in data}
+
+    def get_name(self, session: Session, code: str) -> str:
+        """获取股票名称，未登记时返回代码本身"""
+        info = self.get(session, code)
+        return info['name'] if info else code
+
+
+# 创建全局股票信息缓存实例
+stock_metadata_cache = StockMetadataCache()
@@ -9,10 +9,11 @@ from pathlib import Path
 
 from .email_service import email_service
 from ..database.crud import (
-    daily_data_crud, stock_crud, market_index_crud,
+    daily_data_crud, stock_crud, market_index_crud, market_stats_crud,
     indicator_crud, analysis_result_crud
 )
 from ..database.connection import db_manager
+from ..database.stock_cache import stock_metadata_cache
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -41,8 +42,11 @@ class ReportGenerator:
         logger.info(f"开始生成 {report_date} 的每日报告")
 
         try:
+            # 市场涨跌统计，供市场概况和风险提示共用
+            breadth = self._get_market_breadth(report_date)
+
             # 1. 获取市场概况
-            market_summary = self._get_market_summary(report_date)
+            market_summary = self._get_market_summary(report_date, breadth)
 
             # 2. 获取热门股票
             hot_stocks = self._get_hot_stocks(report_date)
@@ -51,7 +55,7 @@ class ReportGenerator:
             technical_signals = self._get_technical_signals(report_date)
 
             # 4. 获取风险提示
-            risk_alerts = self._get_risk_alerts(report_date)
+            risk_alerts = self._get_risk_alerts(report_date, breadth)
 
             # 5. 获取数据更新状态
             data_status = self._get_data_status()
@@ -112,10 +116,39 @@ class ReportGenerator:
             'error': email_result.get('error')
         }
 
-    def _get_market_summary(self, report_date: date) -> Dict[str, Any]:
+    def _get_market_breadth(self, report_date: date) -> Dict[str, Any]:
+        """
+        获取市场涨跌统计
+
+        读取 market_daily_stats 中当日的一行，没有记录时回退到
+        对 daily_data 的一次聚合查询。
+
+        Args:
+            report_date: 报告日期
+
+        Returns:
+            Dict[str, Any]: 股票总数、涨跌平家数、涨跌停家数、
+                大幅下跌家数、总成交额和涨跌幅分布；查询失败时为空字典
+        """
+        try:
+            with db_manager.session_scope(readonly=True) as session:
+                return market_stats_crud.get_breadth(session, report_date)
+
+        except Exception as e:
+            logger.error(f"获取市场涨跌统计失败: {e}")
+            return {}
+
+    def _get_market_summary(
+        self,
+        report_date: date,
+        breadth: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """获取市场概况"""
+        if breadth is None:
+            breadth = self._get_market_breadth(report_date)
+
         try:
-            with db_manager.session_scope() as session:
+            with db_manager.session_scope(readonly=True) as session:
                 # 获取主要指数
                 major_indices = ['000001', '399001', '399006']  # 上证指数、深证成指、创业板指
                 indices = []
@@ -140,27 +173,14 @@ class ReportGenerator:
                             'amount': index_data.amount
                         })
 
-                # 获取市场统计数据
-                daily_stats = session.query(daily_data_crud.model).filter(
-                    daily_data_crud.model.trade_date == report_date
-                ).all()
-
-                up_count = len([d for d in daily_stats if d.change_percent and d.change_percent > 0])
-                down_count = len([d for d in daily_stats if d.change_percent and d.change_percent < 0])
-                flat_count = len([d for d in daily_stats if not d.change_percent or d.change_percent == 0])
-                limit_up = len([d for d in daily_stats if d.change_percent and d.change_percent >= 9.8])
-                limit_down = len([d for d in daily_stats if d.change_percent and d.change_percent <= -9.8])
-
-                total_stocks = len(daily_stats)
-
                 return {
                     'indices': indices,
-                    'total_stocks': total_stocks,
-                    'up_count': up_count,
-                    'down_count': down_count,
-                    'flat_count': flat_count,
-                    'limit_up': limit_up,
-                    'limit_down': limit_down
+                    'total_stocks': breadth.get('total_stocks', 0),
+                    'up_count': breadth.get('up_count', 0),
+                    'down_count': breadth.get('down_count', 0),
+                    'flat_count': breadth.get('flat_count', 0),
+                    'limit_up': breadth.get('limit_up', 0),
+                    'limit_down': breadth.get('limit_down', 0)
                 }
 
         except Exception as e:
@@ -170,7 +190,7 @@ class ReportGenerator:
     def _get_hot_stocks(self, report_date: date, limit: int = 10) -> List[Dict[str, Any]]:
         """获取热门股票（按成交额排序）"""
         try:
-            with db_manager.session_scope() as session:
+            with db_manager.session_scope(readonly=True) as session:
                 # 按成交额排序获取热门股票
                 hot_stocks = session.query(daily_data_crud.model).filter(
                     daily_data_crud.model.trade_date == report_date
@@ -181,13 +201,9 @@ class ReportGenerator:
                     if not stock_data.amount or stock_data.amount <= 0:
                         continue
 
-                    # 获取股票名称
-                    stock_info = stock_crud.get_by_code(session, stock_data.stock_code)
-                    stock_name = stock_info.name if stock_info else stock_data.stock_code
-
                     result.append({
                         'code': stock_data.stock_code,
-                        'name': stock_name,
+                        'name': stock_metadata_cache.get_name(session, stock_data.stock_code),
                         'close_price': stock_data.close_price,
                         'change_percent': stock_data.change_percent or 0,
                         'amount': stock_data.amount
@@ -208,26 +224,23 @@ class ReportGenerator:
                 'hold': []
             }
 
-            with db_manager.session_scope() as session:
+            with db_manager.session_scope(readonly=True) as session:
                 # 获取分析结果
                 analysis_results = analysis_result_crud.get_buy_signals(
                     session, report_date, min_confidence=0.6
                 )
 
-                for result in analysis_results:
-                    # 获取股票信息
-                    stock_info = stock_crud.get_by_code(session, result.stock_code)
-                    stock_name = stock_info.name if stock_info else result.stock_code
+                # 一次查询获取所有信号股票的当前价格
+                close_prices = daily_data_crud.get_close_prices(
+                    session, [result.stock_code for result in analysis_results], report_date
+                )
 
-                    # 获取当前价格
-                    current_data = daily_data_crud.get_by_stock_and_date(
-                        session, result.stock_code, report_date
-                    )
-                    current_price = current_data.close_price if current_data else 0
+                for result in analysis_results:
+                    current_price = close_prices.get(result.stock_code) or 0
 
                     signal_data = {
                         'code': result.stock_code,
-                        'name': stock_name,
+                        'name': stock_metadata_cache.get_name(session, result.stock_code),
                         'signal_reason': result.reason or f'{result.strategy_name}策略信号',
                         'confidence': result.confidence,
                         'current_price': current_price,
@@ -253,44 +266,46 @@ class ReportGenerator:
             logger.error(f"获取技术信号失败: {e}")
             return {'buy': [], 'sell': [], 'hold': []}
 
-    def _get_risk_alerts(self, report_date: date) -> List[Dict[str, Any]]:
+    def _get_risk_alerts(
+        self,
+        report_date: date,
+        breadth: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """获取风险提示"""
         alerts = []
 
-        try:
-            with db_manager.session_scope() as session:
-                # 检查异常数据
-                daily_stats = session.query(daily_data_crud.model).filter(
-                    daily_data_crud.model.trade_date == report_date
-                ).all()
+        if breadth is None:
+            breadth = self._get_market_breadth(report_date)
 
-                # 计算跌幅分布
-                down_stocks = [d for d in daily_stats if d.change_percent and d.change_percent < -5]
-                if len(down_stocks) > 100:
-                    alerts.append({
-                        'level': 'warning',
-                        'title': '市场风险提示',
-                        'message': f'今日有 {len(down_stocks)} 只股票跌幅超过5%，市场情绪较为悲观，建议注意控制风险。'
-                    })
+        try:
+            with db_manager.session_scope(readonly=True) as session:
+                # 没有当日统计时不做涨跌分布和成交额判断
+                if breadth:
+                    # 计算跌幅分布
+                    big_down_count = breadth.get('big_down_count') or 0
+                    if big_down_count > 100:
+                        alerts.append({
+                            'level': 'warning',
+                            'title': '市场风险提示',
+                            'message': f'今日有 {big_down_count} 只股票跌幅超过5%，市场情绪较为悲观，建议注意控制风险。'
+                        })
 
-                # 检查成交额异常
-                total_amount = sum([d.amount for d in daily_stats if d.amount])
-                if total_amount < 5000_000_000:  # 5000亿
-                    alerts.append({
-                        'level': 'warning',
-                        'title': '成交量提示',
-                        'message': f'今日市场总成交额 {total_amount/100000000:.1f} 亿元，较平时偏低，市场活跃度下降。'
-                    })
+                    # 检查成交额异常
+                    total_amount = breadth.get('total_amount')
+                    if total_amount is not None and total_amount < 5000_000_000:  # 5000亿
+                        alerts.append({
+                            'level': 'warning',
+                            'title': '成交量提示',
+                            'message': f'今日市场总成交额 {total_amount/100000000:.1f} 亿元，较平时偏低，市场活跃度下降。'
+                        })
 
                 # 检查ST股票数量
-                st_stocks = session.query(stock_crud.model).filter(
-                    stock_crud.model.is_st == True,
-                    stock_crud.model.is_delisted == False
-                ).count()
-
-                total_stocks = session.query(stock_crud.model).filter(
-                    stock_crud.model.is_delisted == False
-                ).count()
+                listed = [
+                    info for info in stock_metadata_cache.all(session).values()
+                    if not info['is_delisted']
+                ]
+                st_stocks = len([info for info in listed if info['is_st']])
+                total_stocks = len(listed)
 
                 if st_stocks > 0:
                     alerts.append({
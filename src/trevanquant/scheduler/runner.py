@@ -143,6 +143,22 @@ class Application:
             logger.error(f"获取状态信息失败: {e}")
 
 
+    def show_sync_plan(self) -> None:
+        """显示增量同步计划（只读，不发起请求）"""
+        try:
+            from ..data.planner import sync_planner
+
+            plan = sync_planner.plan()
+
+            logger.info("增量同步计划")
+            logger.info("=" * 40)
+            for line in sync_planner.describe(plan):
+                logger.info(line)
+
+        except Exception as e:
+            logger.error(f"生成同步计划失败: {e}")
+
+
 def main():
     """主函数"""
     import argparse
@@ -150,7 +166,7 @@ def main():
     parser = argparse.ArgumentParser(description='TrevanQuant 量化复盘系统')
     parser.add_argument(
         'command',
-        choices=['start', 'run', 'status'],
+        choices=['start', 'run', 'status', 'plan'],
         help='运行命令'
     )
     parser.add_argument(
@@ -200,6 +216,10 @@ def main():
             # 显示系统状态
             app.show_status()
 
+        elif args.command == 'plan':
+            # 显示增量同步计划
+            app.show_sync_plan()
+
     except KeyboardInterrupt:
         logger.info("用户中断程序")
     except Exception as e:
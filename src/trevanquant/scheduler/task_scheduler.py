@@ -9,8 +9,6 @@ from datetime import datetime, time as dt_time, timedelta
 from typing import Dict, Any, Callable, Optional
 from pathlib import Path
 
-from ..data.sync import data_sync_manager
-from ..report.generator import report_generator
 from ..utils.logger import get_logger
 from ..utils.config import get_config
 
@@ -79,6 +77,9 @@ class TaskScheduler:
         # 股票列表更新任务 - 每周日20:00
         schedule.every().sunday.at("20:00").do(self._stock_list_update_task)
 
+        # 交易日历更新任务 - 每周日19:30
+        schedule.every().sunday.at("19:30").do(self._trading_calendar_update_task)
+
         # 技术指标计算任务 - 每小时（交易时间）
         for hour in range(9, 16):  # 9:00 - 15:00
             schedule.every().day.at(f"{hour:02d}:00").do(self._technical_indicators_task)
@@ -113,7 +114,22 @@ class TaskScheduler:
             logger.info("今天不是交易日，跳过数据同步")
             return
 
+        # 先以收盘快照一次性写入当日全市场日线，后续增量同步无需逐只请求当日数据
+        try:
+            from ..data.snapshot import market_snapshot_loader
+
+            snapshot = market_snapshot_loader.sync()
+            if snapshot['success']:
+                logger.info(f"收盘快照同步完成: 请求 {snapshot.get('requests', 0)} 次")
+            else:
+                logger.error(f"收盘快照同步失败: {snapshot['error']}")
+
+        except Exception as e:
+            logger.error(f"收盘快照同步异常: {e}")
+
         try:
+            from ..data.sync import data_sync_manager
+
             # 执行完整数据同步
             result = data_sync_manager.full_sync()
 
@@ -134,6 +150,8 @@ class TaskScheduler:
             return
 
         try:
+            from ..report.generator import report_generator
+
             # 生成并发送报告
             result = report_generator.send_daily_report()
 
@@ -150,6 +168,8 @@ class TaskScheduler:
         logger.info("开始执行股票列表更新任务")
 
         try:
+            from ..data.sync import data_sync_manager
+
             result = data_sync_manager.sync_stock_list()
 
             if result['success']:
@@ -160,6 +180,19 @@ class TaskScheduler:
         except Exception as e:
             logger.error(f"股票列表更新任务异常: {e}")
 
+    def _trading_calendar_update_task(self) -> None:
+        """交易日历更新任务"""
+        logger.info("开始执行交易日历更新任务")
+
+        try:
+            from ..database.calendar import trading_calendar
+
+            count = trading_calendar.refresh()
+            logger.info(f"交易日历更新完成: {count} 个交易日")
+
+        except Exception as e:
+            logger.error(f"交易日历更新任务异常: {e}")
+
     def _technical_indicators_task(self) -> None:
         """技术指标计算任务"""
         logger.info("开始执行技术指标计算任务")
@@ -169,8 +202,13 @@ class TaskScheduler:
             return
 
         try:
-            # 计算最近5天的技术指标
-            result = data_sync_manager.sync_technical_indicators(days_back=5)
+            from ..data.sync import data_sync_manager
+            from ..database.calendar import trading_calendar
+
+            # 计算最近5个交易日的技术指标（节假日不计入）
+            result = data_sync_manager.sync_technical_indicators(
+                days_back=trading_calendar.calendar_days_back(5)
+            )
 
             if result['success']:
                 logger.info(f"技术指标计算完成: {result}")
@@ -220,18 +258,11 @@ class TaskScheduler:
             logger.error(f"健康检查失败: {e}")
 
     def _is_trading_day(self) -> bool:
-        """判断今天是否为交易日"""
+        """判断今天是否为交易日（按交易日历，日历未覆盖时只排除周末）"""
         try:
-            today = datetime.now().date()
-
-            # 检查是否为周末
-            if today.weekday() >= 5:  # 周六、周日
-                return False
-
-            # 这里可以添加更复杂的交易日判断逻辑
-            # 比如查询节假日数据等
+            from ..database.calendar import trading_calendar
 
-            return True
+            return trading_calendar.is_trading_day(datetime.now().date())
 
         except Exception as e:
             logger.error(f"判断交易日失败: {e}")
@@ -284,6 +315,7 @@ class TaskScheduler:
                 'daily_data_sync': self._daily_data_sync_task,
                 'daily_report': self._daily_report_task,
                 'stock_list_update': self._stock_list_update_task,
+                'trading_calendar_update': self._trading_calendar_update_task,
                 'technical_indicators': self._technical_indicators_task,
                 'data_cleanup': self._data_cleanup_task,
                 'health_check': self._health_check_task,
@@ -13,6 +13,14 @@ class DatabaseConfig(BaseModel):
     """数据库配置"""
     url: str = Field(default="sqlite:///database.db")
     echo: bool = Field(default=False)
+    # SQLite PRAGMA配置方案：default, serving（WAL，需显式启用）
+    pragma_profile: str = Field(default="default")
+    # 只读连接池大小，0表示所有线程共用一个连接
+    read_pool_size: int = Field(default=0)
+    # 列式K线存储目录，为空时不启用
+    bar_store_path: str = Field(default="")
+    # 年份分区目录，为空时不启用分区
+    partition_dir: str = Field(default="")
 
 
 class EmailConfig(BaseModel):
@@ -30,6 +38,19 @@ class DataConfig(BaseModel):
     max_retries: int = Field(default=3)
     timeout: int = Field(default=30)
     batch_size: int = Field(default=100)
+    max_workers: int = Field(default=8)
+    requests_per_second: float = Field(default=0.0)
+    request_burst: int = Field(default=5)
+    cache_dir: str = Field(default="")
+    cache_max_mb: int = Field(default=1024)
+    source_mode: str = Field(default="live")
+    source_archive: str = Field(default="")
+    replay_latency_scale: float = Field(default=1.0)
+    replay_error_rate: float = Field(default=0.0)
+    history_providers: str = Field(default="eastmoney,sina")
+    hedge_quantile: float = Field(default=95.0)
+    circuit_error_rate: float = Field(default=0.5)
+    circuit_open_seconds: float = Field(default=30.0)
 
 
 class AppConfig(BaseModel):
@@ -53,14 +74,25 @@ class ConfigManager:
             config_file: 配置文件路径
         """
         self.project_root = Path(__file__).parent.parent.parent.parent
-        self.env_file = config_file or self.project_root / ".env"
+        self.env_file = Path(config_file) if config_file else self.project_root / ".env"
 
-        # 加载环境变量
-        if self.env_file.exists():
-            load_dotenv(self.env_file)
+        # 配置在首次访问时加载
+        self._config: Optional[AppConfig] = None
 
-        # 加载配置
-        self.config = self._load_config()
+    @property
+    def config(self) -> AppConfig:
+        """配置对象，首次访问时读取.env和环境变量"""
+        if self._config is None:
+            # 加载环境变量
+            if self.env_file.exists():
+                load_dotenv(self.env_file)
+
+            self._config = self._load_config()
+        return self._config
+
+    @config.setter
+    def config(self, value: AppConfig) -> None:
+        self._config = value
 
     def _load_config(self) -> AppConfig:
         """加载配置"""
@@ -68,7 +100,11 @@ class ConfigManager:
         config_dict = {
             "database": {
                 "url": os.getenv("DATABASE_URL", "sqlite:///database.db"),
-                "echo": os.getenv("DATABASE_ECHO", "false").lower() == "true"
+                "echo": os.getenv("DATABASE_ECHO", "false").lower() == "true",
+                "pragma_profile": os.getenv("DATABASE_PRAGMA_PROFILE", "default"),
+                "read_pool_size": int(os.getenv("DATABASE_READ_POOL_SIZE", "0")),
+                "bar_store_path": os.getenv("DATABASE_BAR_STORE_PATH", ""),
+                "partition_dir": os.getenv("DATABASE_PARTITION_DIR", "")
             },
             "email": {
                 "smtp_server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
@@ -81,7 +117,20 @@ class ConfigManager:
                 "request_delay": float(os.getenv("REQUEST_DELAY", "1.0")),
                 "max_retries": int(os.getenv("MAX_RETRIES", "3")),
                 "timeout": int(os.getenv("TIMEOUT", "30")),
-                "batch_size": int(os.getenv("BATCH_SIZE", "100"))
+                "batch_size": int(os.getenv("BATCH_SIZE", "100")),
+                "max_workers": int(os.getenv("MAX_WORKERS", "8")),
+                "requests_per_second": float(os.getenv("REQUESTS_PER_SECOND", "0")),
+                "request_burst": int(os.getenv("REQUEST_BURST", "5")),
+                "cache_dir": os.getenv("DATA_CACHE_DIR", ""),
+                "cache_max_mb": int(os.getenv("DATA_CACHE_MAX_MB", "1024")),
+                "source_mode": os.getenv("DATA_SOURCE_MODE", "live"),
+                "source_archive": os.getenv("DATA_SOURCE_ARCHIVE", ""),
+                "replay_latency_scale": float(os.getenv("REPLAY_LATENCY_SCALE", "1.0")),
+                "replay_error_rate": float(os.getenv("REPLAY_ERROR_RATE", "0")),
+                "history_providers": os.getenv("HISTORY_PROVIDERS", "eastmoney,sina"),
+                "hedge_quantile": float(os.getenv("HEDGE_QUANTILE", "95")),
+                "circuit_error_rate": float(os.getenv("CIRCUIT_ERROR_RATE", "0.5")),
+                "circuit_open_seconds": float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
             },
             "debug": os.getenv("DEBUG", "false").lower() == "true",
             "log_level": os.getenv("LOG_LEVEL", "INFO")
@@ -119,6 +168,10 @@ class ConfigManager:
         # 数据库配置
         env_content.append(f"DATABASE_URL={self.config.database.url}")
         env_content.append(f"DATABASE_ECHO={str(self.config.database.echo).lower()}")
+        env_content.append(f"DATABASE_PRAGMA_PROFILE={self.config.database.pragma_profile}")
+        env_content.append(f"DATABASE_READ_POOL_SIZE={self.config.database.read_pool_size}")
+        env_content.append(f"DATABASE_BAR_STORE_PATH={self.config.database.bar_store_path}")
+        env_content.append(f"DATABASE_PARTITION_DIR={self.config.database.partition_dir}")
 
         # 邮件配置
         env_content.append(f"SMTP_SERVER={self.config.email.smtp_server}")
@@ -132,6 +185,19 @@ class ConfigManager:
         env_content.append(f"MAX_RETRIES={self.config.data.max_retries}")
         env_content.append(f"TIMEOUT={self.config.data.timeout}")
         env_content.append(f"BATCH_SIZE={self.config.data.batch_size}")
+        env_content.append(f"MAX_WORKERS={self.config.data.max_workers}")
+        env_content.append(f"REQUESTS_PER_SECOND={self.config.data.requests_per_second}")
+        env_content.append(f"REQUEST_BURST={self.config.data.request_burst}")
+        env_content.append(f"DATA_CACHE_DIR={self.config.data.cache_dir}")
+        env_content.append(f"DATA_CACHE_MAX_MB={self.config.data.cache_max_mb}")
+        env_content.append(f"DATA_SOURCE_MODE={self.config.data.source_mode}")
+        env_content.append(f"DATA_SOURCE_ARCHIVE={self.config.data.source_archive}")
+        env_content.append(f"REPLAY_LATENCY_SCALE={self.config.data.replay_latency_scale}")
+        env_content.append(f"REPLAY_ERROR_RATE={self.config.data.replay_error_rate}")
+        env_content.append(f"HISTORY_PROVIDERS={self.config.data.history_providers}")
+        env_content.append(f"HEDGE_QUANTILE={self.config.data.hedge_quantile}")
+        env_content.append(f"CIRCUIT_ERROR_RATE={self.config.data.circuit_error_rate}")
+        env_content.append(f"CIRCUIT_OPEN_SECONDS={self.config.data.circuit_open_seconds}")
 
         # 应用配置
         env_content.append(f"DEBUG={str(self.config.debug).lower()}")
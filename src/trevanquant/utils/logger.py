@@ -4,7 +4,6 @@
 """
 
 import sys
-from pathlib import Path
 from loguru import logger
 from typing import Optional
 
@@ -55,18 +54,16 @@ def setup_logger(
         colorize=True
     )
 
-    # 添加文件输出
+    # 添加文件输出，文件和目录在首条日志写入时才创建
     if log_file:
-        log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-
         logger.add(
             log_file,
             format=log_format,
             level=log_level,
             rotation="10 MB",
             retention="30 days",
-            compression="zip"
+            compression="zip",
+            delay=True
         )
 
 
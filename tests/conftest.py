@@ -0,0 +1,26 @@
+"""
+测试公共配置
+测试只使用临时目录中的数据库和存储，不读写正式数据
+"""
+
+import os
+
+# 在导入 trevanquant 之前设置，全局实例延迟读取配置时不会指向正式数据
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+os.environ['DATABASE_BAR_STORE_PATH'] = ''
+os.environ['DATABASE_PARTITION_DIR'] = ''
+os.environ['DATA_CACHE_DIR'] = ''
+
+import pytest
+
+from trevanquant.database.connection import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    """临时文件数据库"""
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}", read_pool_size=0)
+    manager.create_tables()
+    yield manager
+    manager.engine.dispose()
+
@@ -0,0 +1,106 @@
+"""
+列式K线存储的写入登记与补写
+daily_data 已提交而列式存储未写完时留下登记，repair_bar_store 按登记从 daily_data 补写
+"""
+
+import math
+from datetime import date
+
+import pytest
+
+from trevanquant.database.bar_store import BarStore
+from trevanquant.database.crud import DailyDataCRUD
+from trevanquant.database.models import DailyData
+
+
+def make_row(stock_code, trade_date, close_price):
+    return {
+        'stock_code': stock_code,
+        'trade_date': trade_date,
+        'open_price': close_price,
+        'high_price': close_price,
+        'low_price': close_price,
+        'close_price': close_price,
+        'volume': 100.0,
+    }
+
+
+def close_prices(store, stock_code):
+    frame = store.read(stock_code, date(2024, 1, 1), date(2024, 1, 31), ['close_price'])
+    return dict(zip(frame.index.date, frame['close_price']))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(tmp_path / 'bars')
+
+
+@pytest.fixture
+def daily_crud(store):
+    return DailyDataCRUD(DailyData, bar_store=store)
+
+
+def test_begin_and_end_write_leave_no_stale_range(store):
+    """正常结束的写入不留下登记，进行中的写入不算待补写"""
+    journal = store.begin_write(date(2024, 1, 2), date(2024, 1, 5))
+    assert store.stale_ranges() == []
+
+    store.end_write(journal)
+    assert store.stale_ranges() == []
+    assert not journal.exists()
+
+
+def test_failed_write_is_stale(store):
+    """写入失败的登记保留为待补写范围"""
+    journal = store.begin_write(date(2024, 1, 2), date(2024, 1, 5))
+    store.end_write(journal, failed=True)
+
+    assert [(start, end) for _, start, end in store.stale_ranges()] == [
+        (date(2024, 1, 2), date(2024, 1, 5))
+    ]
+
+
+def test_repair_rewrites_stale_range_from_daily_data(db, store, daily_crud, monkeypatch):
+    """列式存储写入失败后 daily_data 已提交，补写后两者一致且登记被清除"""
+    with db.session_scope() as session:
+        daily_crud.batch_upsert(session, [make_row('000001', date(2024, 1, 2), 10.0)])
+
+    def fail(data_list):
+        raise OSError("磁盘已满")
+
+    monkeypatch.setattr(store, 'write', fail)
+    with db.session_scope() as session:
+        with pytest.raises(OSError):
+            daily_crud.batch_upsert(session, [
+                make_row('000001', date(2024, 1, 3), 11.0),
+                make_row('000002', date(2024, 1, 4), 20.0),
+            ])
+    monkeypatch.undo()
+
+    assert [(start, end) for _, start, end in store.stale_ranges()] == [
+        (date(2024, 1, 3), date(2024, 1, 4))
+    ]
+    assert date(2024, 1, 3) not in close_prices(store, '000001')
+
+    with db.session_scope() as session:
+        assert daily_crud.repair_bar_store(session) == 2
+
+    assert store.stale_ranges() == []
+    assert close_prices(store, '000001') == {date(2024, 1, 2): 10.0, date(2024, 1, 3): 11.0}
+    assert close_prices(store, '000002') == {date(2024, 1, 4): 20.0}
+
+
+def test_delete_clears_bar_store_cell(db, store, daily_crud):
+    """删除 daily_data 行时清除列式存储中对应的格"""
+    with db.session_scope() as session:
+        daily_crud.batch_upsert(session, [
+            make_row('000001', date(2024, 1, 2), 10.0),
+            make_row('000001', date(2024, 1, 3), 11.0),
+        ])
+        record = daily_crud.get_by_stock_and_date(session, '000001', date(2024, 1, 2))
+        daily_crud.delete(session, record)
+
+    prices = close_prices(store, '000001')
+    assert prices == {date(2024, 1, 3): 11.0}
+    assert not any(math.isnan(value) for value in prices.values())
+    assert store.stale_ranges() == []
@@ -0,0 +1,76 @@
+"""
+数据源响应缓存的过期策略
+已结束的不复权历史数据永不过期；包含今天的、空响应和复权数据按较短时间过期
+"""
+
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from trevanquant.data.cache import DEFAULT_TTL, RECENT_TTL, ResponseCache
+
+
+def stock_zh_a_hist(symbol, period='daily', start_date='', end_date='', adjust=''):
+    return pd.DataFrame({'收盘': [1.0]})
+
+
+def stock_zh_a_spot_em():
+    return pd.DataFrame({'代码': ['000001']})
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(tmp_path / 'cache')
+
+
+def ttl(cache, func, value=None, **kwargs):
+    value = pd.DataFrame({'收盘': [1.0]}) if value is None else value
+    return cache.ttl_for(func, cache.normalize_args(func, (), kwargs), value)
+
+
+def test_past_unadjusted_history_never_expires(cache):
+    assert ttl(cache, stock_zh_a_hist, symbol='000001', end_date='20200131') is None
+
+
+@pytest.mark.parametrize('adjust', ['qfq', 'hfq'])
+def test_past_adjusted_history_uses_endpoint_ttl(cache, adjust):
+    """复权价格随除权除息重算，历史区间也不能永久缓存"""
+    assert ttl(cache, stock_zh_a_hist, symbol='000001', end_date='20200131', adjust=adjust) == DEFAULT_TTL
+
+
+@pytest.mark.parametrize('adjust', ['', 'qfq'])
+def test_range_including_today_is_recent(cache, adjust):
+    today = date.today().strftime('%Y%m%d')
+    assert ttl(cache, stock_zh_a_hist, symbol='000001', end_date=today, adjust=adjust) == RECENT_TTL
+
+
+def test_empty_response_is_recent(cache):
+    assert ttl(cache, stock_zh_a_hist, pd.DataFrame(), symbol='000001', end_date='20200131') == RECENT_TTL
+
+
+def test_endpoint_ttl_without_end_date(cache):
+    assert ttl(cache, stock_zh_a_spot_em) == 60
+
+
+def test_call_caches_until_expiry(cache, monkeypatch):
+    calls = []
+
+    def fetch(symbol, end_date=''):
+        calls.append(symbol)
+        return pd.DataFrame({'收盘': [len(calls)]})
+
+    yesterday = (date.today() - timedelta(days=1)).strftime('%Y%m%d')
+    first = cache.call(fetch, '000001', end_date=yesterday)
+    second = cache.call(fetch, symbol='000001', end_date=yesterday)
+    pd.testing.assert_frame_equal(first, second)
+    assert len(calls) == 1
+
+    # 包含今天的请求过期后重新获取
+    today = date.today().strftime('%Y%m%d')
+    cache.call(fetch, '000002', end_date=today)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + RECENT_TTL + 1)
+    cache.call(fetch, '000002', end_date=today)
+    assert calls == ['000001', '000002', '000002']
@@ -0,0 +1,101 @@
+"""
+交易日历
+各查询与逐日遍历的朴素实现一致；日历范围之外按工作日推算
+"""
+
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from trevanquant.database.calendar import TradingCalendar
+
+HOLIDAYS = {
+    date(2024, 1, 1), date(2024, 2, 12), date(2024, 2, 13), date(2024, 2, 14),
+    date(2024, 5, 1), date(2024, 5, 2), date(2024, 10, 1), date(2024, 10, 2), date(2024, 10, 3),
+}
+TRADING_DAYS = [
+    day for day in (date(2024, 1, 1) + timedelta(days=i) for i in range(366))
+    if day.weekday() < 5 and day not in HOLIDAYS
+]
+TRADING_DAY_SET = set(TRADING_DAYS)
+FIRST, LAST = TRADING_DAYS[0], TRADING_DAYS[-1]
+
+# 覆盖日历范围前后各两个月
+ALL_DAYS = [date(2023, 11, 1) + timedelta(days=i) for i in range(520)]
+
+
+def brute_is_trading_day(day):
+    """日历范围内查表，范围外按工作日"""
+    if FIRST <= day <= LAST:
+        return day in TRADING_DAY_SET
+    return day.weekday() < 5
+
+
+BRUTE_DAYS = [day for day in ALL_DAYS if brute_is_trading_day(day)]
+
+
+@pytest.fixture(scope='module')
+def calendar():
+    calendar = TradingCalendar()
+    calendar.set_dates(TRADING_DAYS)
+    return calendar
+
+
+def test_is_trading_day(calendar):
+    for day in ALL_DAYS:
+        assert calendar.is_trading_day(day) == brute_is_trading_day(day), day
+
+
+def test_prev_and_next_trading_day(calendar):
+    for day in ALL_DAYS[1:-1]:
+        earlier = [t for t in BRUTE_DAYS if t < day]
+        later = [t for t in BRUTE_DAYS if t > day]
+        if earlier:
+            assert calendar.prev_trading_day(day) == earlier[-1], day
+        if later:
+            assert calendar.next_trading_day(day) == later[0], day
+
+
+@pytest.mark.parametrize('n', [0, 1, 5, 30])
+def test_nth_trading_day_back(calendar, n):
+    for day in ALL_DAYS:
+        not_later = [t for t in BRUTE_DAYS if t <= day]
+        if len(not_later) > n:
+            assert calendar.nth_trading_day_back(day, n) == not_later[-1 - n], (day, n)
+
+
+def test_ranges(calendar):
+    rnd = random.Random(0)
+    for _ in range(500):
+        start, end = sorted(rnd.sample(ALL_DAYS, 2))
+        expected = [t for t in BRUTE_DAYS if start <= t <= end]
+        assert calendar.trading_days(start, end) == expected, (start, end)
+        assert calendar.trading_days_between(start, end) == len(expected), (start, end)
+
+
+def test_failed_load_is_retried_after_delay():
+    """加载失败后在 retry_seconds 内不重复尝试，之后再次加载"""
+    calendar = TradingCalendar()
+    calendar.retry_seconds = 0.05
+    attempts = []
+
+    def failing_load(session=None):
+        attempts.append('failed')
+        raise RuntimeError("数据库不可用")
+
+    calendar.load = failing_load
+    calendar.coverage
+    calendar.coverage
+    assert attempts == ['failed']
+
+    def working_load(session=None):
+        attempts.append('loaded')
+        calendar.set_dates(TRADING_DAYS)
+        return len(TRADING_DAYS)
+
+    calendar.load = working_load
+    time.sleep(0.06)
+    assert calendar.coverage == (FIRST, LAST)
+    assert attempts == ['failed', 'loaded']
@@ -0,0 +1,109 @@
+"""
+市场每日统计的增量维护
+batch_upsert 及其他 daily_data 写入路径增量更新的统计应与全量聚合一致
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from trevanquant.database.crud import DailyDataCRUD, MarketDailyStatsCRUD
+from trevanquant.database.models import DailyData, MarketDailyStats
+
+DAYS = [date(2024, 1, 1) + timedelta(days=i) for i in range(20)]
+
+
+def make_rows(stock_code, days, rnd, drop_amount=False):
+    """随机涨跌幅和成交额的日线数据，含涨跌停、平盘和空值"""
+    rows = []
+    for day in days:
+        row = {
+            'stock_code': stock_code,
+            'trade_date': day,
+            'open_price': 10.0,
+            'high_price': 10.0,
+            'low_price': 10.0,
+            'close_price': 10.0,
+            'change_percent': rnd.choice([None, 0, 9.9, -9.9, -6.0, 3.0, rnd.uniform(-11, 11)]),
+            'amount': rnd.choice([None, rnd.random() * 1e8]),
+            'volume': rnd.random() * 1e6,
+        }
+        if drop_amount:
+            del row['amount']
+        rows.append(row)
+    return rows
+
+
+def stored_stats(session, stats_crud, day):
+    """统计表中的记录（不回退到聚合查询）"""
+    stats = stats_crud.get_by_date(session, day)
+    assert stats is not None, f"{day} 没有统计记录"
+    return {name: getattr(stats, name) for name in stats_crud.stat_columns}
+
+
+def assert_matches_compute(session, stats_crud, days):
+    """统计表与直接聚合 daily_data 的结果一致"""
+    for day in days:
+        stored = stored_stats(session, stats_crud, day)
+        full = stats_crud.compute(session, day)
+        for name in stats_crud.stat_columns:
+            assert (stored[name] or 0) == pytest.approx(full[name] or 0), (day, name)
+
+
+@pytest.fixture
+def cruds():
+    stats_crud = MarketDailyStatsCRUD(MarketDailyStats)
+    daily_crud = DailyDataCRUD(DailyData, bar_store=None, stats_crud=stats_crud)
+    daily_crud.bar_store = None
+    return daily_crud, stats_crud
+
+
+def test_batch_upsert_matches_compute(db, cruds):
+    """插入、部分字段更新和重复写入后，增量统计与全量聚合一致"""
+    daily_crud, stats_crud = cruds
+    rnd = random.Random(1)
+
+    with db.session_scope() as session:
+        for i in range(12):
+            daily_crud.batch_upsert(session, make_rows(f'{i:06d}', DAYS, rnd), chunk_size=7)
+        for i in range(0, 12, 3):
+            daily_crud.batch_upsert(session, make_rows(f'{i:06d}', DAYS, rnd, drop_amount=True))
+        daily_crud.batch_upsert(session, make_rows('000001', DAYS[:5], rnd))
+
+        assert_matches_compute(session, stats_crud, DAYS)
+
+
+def test_incremental_stats_equal_rebuild(db, cruds):
+    """增量维护的统计与 rebuild 重建的结果一致"""
+    daily_crud, stats_crud = cruds
+    rnd = random.Random(2)
+
+    with db.session_scope() as session:
+        for i in range(8):
+            daily_crud.batch_upsert(session, make_rows(f'{i:06d}', DAYS, rnd))
+        daily_crud.batch_upsert(session, make_rows('000003', DAYS[5:10], rnd))
+        incremental = {day: stored_stats(session, stats_crud, day) for day in DAYS}
+
+        stats_crud.rebuild(session)
+        for day in DAYS:
+            rebuilt = stored_stats(session, stats_crud, day)
+            for name in stats_crud.stat_columns:
+                assert (incremental[day][name] or 0) == pytest.approx(rebuilt[name] or 0), (day, name)
+
+
+def test_orm_write_paths_refresh_stats(db, cruds):
+    """create、create_batch、update、delete 和 bulk_insert 同样维护统计"""
+    daily_crud, stats_crud = cruds
+    rnd = random.Random(3)
+
+    with db.session_scope() as session:
+        daily_crud.create_batch(session, make_rows('000001', DAYS, rnd))
+        record = daily_crud.create(session, make_rows('000002', DAYS[:1], rnd)[0])
+        daily_crud.create_batch(session, make_rows('000003', DAYS, rnd), bulk=True)
+        assert_matches_compute(session, stats_crud, DAYS)
+
+        daily_crud.update(session, record, {'change_percent': 9.99, 'trade_date': DAYS[3]})
+        for row in daily_crud.get_by_stock(session, '000001'):
+            daily_crud.delete(session, row)
+        assert_matches_compute(session, stats_crud, DAYS)
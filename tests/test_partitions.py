@@ -0,0 +1,116 @@
+"""
+年份分区
+归档后的年份迁移到分区文件，读取时与主库合并，写入时跳过已归档年份
+"""
+
+from datetime import date
+
+import pytest
+
+from trevanquant.database.connection import DatabaseManager
+from trevanquant.database.crud import DailyDataCRUD, MarketDailyStatsCRUD
+from trevanquant.database.models import DailyData, MarketDailyStats
+
+YEARS = range(2018, 2025)
+ARCHIVED = range(2018, 2022)
+
+
+def make_rows():
+    """两只股票每年两个交易日，收盘价编码年份和月份"""
+    return [
+        {
+            'stock_code': code,
+            'trade_date': date(year, month, 1),
+            'open_price': 1.0,
+            'high_price': 2.0,
+            'low_price': 0.5,
+            'close_price': year + month / 100,
+            'volume': 100.0,
+            'amount': 10.0,
+            'change_percent': 1.0,
+        }
+        for code in ('000001', '000002') for year in YEARS for month in (1, 6)
+    ]
+
+
+@pytest.fixture(params=[0, 2], ids=['single', 'pool'])
+def partitioned(request, tmp_path):
+    """已归档 ARCHIVED 年份的分区数据库，覆盖单连接和连接池模式"""
+    db = DatabaseManager(
+        f"sqlite:///{tmp_path / 'main.db'}",
+        read_pool_size=request.param,
+        partition_dir=str(tmp_path / 'partitions')
+    )
+    db.create_tables()
+
+    stats_crud = MarketDailyStatsCRUD(MarketDailyStats)
+    daily_crud = DailyDataCRUD(DailyData, bar_store=None, stats_crud=stats_crud)
+    daily_crud.bar_store = None
+
+    with db.session_scope() as session:
+        daily_crud.batch_upsert(session, make_rows())
+    with db.engine.connect() as connection:
+        for year in ARCHIVED:
+            db.partitions.archive_year(connection, year)
+
+    yield db, daily_crud, stats_crud
+    db.engine.dispose()
+
+
+def test_archive_moves_rows_out_of_main_table(partitioned):
+    """归档年份的数据只存在于分区文件中"""
+    db, _, _ = partitioned
+    assert db.partitions.years() == list(ARCHIVED)
+
+    with db.session_scope(readonly=True) as session:
+        years = {day.year for (day,) in session.query(DailyData.trade_date).distinct()}
+    assert years == set(YEARS) - set(ARCHIVED)
+
+
+def test_reads_union_main_table_and_partitions(partitioned):
+    """按股票和日期范围读取时合并主库和分区，结果有序"""
+    db, daily_crud, _ = partitioned
+
+    with db.session_scope(readonly=True) as session:
+        records = daily_crud.get_by_stock(session, '000001')
+        dates = [record.trade_date for record in records]
+        assert len(records) == 2 * len(YEARS)
+        assert sorted(dates) in (dates, dates[::-1])
+        assert {day.year for day in dates} == set(YEARS)
+
+        trade_dates = daily_crud.get_trade_dates(session, ['000001'])['000001']
+        assert trade_dates == sorted(trade_dates)
+        assert len(trade_dates) == 2 * len(YEARS)
+
+        coverage = daily_crud.get_coverage(session, ['000001'])['000001']
+        assert coverage[:2] == (date(YEARS[0], 1, 1), date(YEARS[-1], 6, 1))
+        assert coverage[2] == 2 * len(YEARS)
+
+
+def test_stats_cover_archived_years(partitioned):
+    """统计的聚合和重建会路由到已归档的分区"""
+    db, _, stats_crud = partitioned
+
+    with db.session_scope() as session:
+        assert stats_crud.compute(session, date(2019, 6, 1))['total_stocks'] == 2
+        stats_crud.rebuild(session)
+        assert stats_crud.get_by_date(session, date(2019, 6, 1)).total_stocks == 2
+
+
+def test_batch_upsert_skips_archived_years(partitioned):
+    """写入已归档年份的行被跳过，其他行照常写入"""
+    db, daily_crud, _ = partitioned
+    rows = make_rows()
+    archived_row = dict(rows[0], close_price=99.0)
+    current_row = dict(rows[-1], close_price=99.0)
+
+    with db.session_scope() as session:
+        counts = daily_crud.batch_upsert(session, [archived_row, current_row])
+    assert counts['archived'] == 1
+    assert counts['updated'] == 1
+
+    with db.session_scope(readonly=True) as session:
+        first = {r.trade_date: r.close_price for r in daily_crud.get_by_stock(session, '000001')}
+        second = {r.trade_date: r.close_price for r in daily_crud.get_by_stock(session, '000002')}
+    assert first[archived_row['trade_date']] == rows[0]['close_price']
+    assert second[current_row['trade_date']] == 99.0
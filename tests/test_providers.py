@@ -0,0 +1,117 @@
+"""
+多提供方对冲请求
+首选提供方超过对冲等待时间未返回时向下一个提供方发出请求，失败时立即切换
+"""
+
+import threading
+import time
+
+import pytest
+
+from trevanquant.data.providers import HedgedFetcher, Provider
+
+
+class CountingLimiter:
+    """记录取令牌次数的限速器"""
+
+    def __init__(self):
+        self.acquired = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        with self._lock:
+            self.acquired += 1
+        return 0.0
+
+
+def returning(value, delay=0.0):
+    def fetch(*args):
+        time.sleep(delay)
+        return value
+    return fetch
+
+
+def failing(delay=0.0):
+    def fetch(*args):
+        time.sleep(delay)
+        raise ConnectionError("上游错误")
+    return fetch
+
+
+def make_fetcher(*providers, **options):
+    options.setdefault('default_hedge_delay', 0.05)
+    return HedgedFetcher(list(providers), **options)
+
+
+def test_fast_primary_is_not_hedged():
+    limiter = CountingLimiter()
+    fetcher = make_fetcher(
+        Provider('primary', returning('a')), Provider('backup', returning('b')), limiter=limiter
+    )
+
+    assert fetcher.fetch('000001') == 'a'
+    assert fetcher.hedges == 0
+    assert limiter.acquired == 0
+
+
+def test_slow_primary_is_hedged():
+    """首选提供方超过对冲等待时间时发出对冲请求，取先返回的结果"""
+    limiter = CountingLimiter()
+    fetcher = make_fetcher(
+        Provider('primary', returning('a', delay=1.0)),
+        Provider('backup', returning('b')),
+        limiter=limiter
+    )
+
+    start = time.perf_counter()
+    assert fetcher.fetch('000001') == 'b'
+    assert time.perf_counter() - start < 0.5
+    assert fetcher.hedges == 1
+    assert fetcher.hedge_wins == 1
+    assert limiter.acquired == 1
+
+
+def test_failure_fails_over_immediately():
+    """首选提供方失败时不等对冲时间，立即切换"""
+    fetcher = make_fetcher(
+        Provider('primary', failing()),
+        Provider('backup', returning('b')),
+        default_hedge_delay=10
+    )
+
+    start = time.perf_counter()
+    assert fetcher.fetch('000001') == 'b'
+    assert time.perf_counter() - start < 1.0
+    assert fetcher.failovers == 1
+
+
+def test_all_providers_fail():
+    fetcher = make_fetcher(Provider('primary', failing()), Provider('backup', failing()))
+
+    with pytest.raises(ConnectionError):
+        fetcher.fetch('000001')
+
+
+def test_hedge_delay_uses_successful_latencies_only():
+    """快速失败的请求不计入对冲等待时间的分位数"""
+    provider = Provider('primary', returning('a'))
+    fetcher = make_fetcher(provider, min_samples=5, hedge_quantile=95)
+
+    for _ in range(50):
+        provider.record(0.001, error=True)
+    assert fetcher.hedge_delay(provider) == fetcher.default_hedge_delay
+
+    for _ in range(5):
+        provider.record(2.0, error=False)
+    assert fetcher.hedge_delay(provider) == pytest.approx(2.0)
+
+
+def test_error_rate_demotes_provider():
+    primary = Provider('primary', failing())
+    backup = Provider('backup', returning('b'))
+    fetcher = make_fetcher(primary, backup, min_samples=3)
+
+    for _ in range(3):
+        assert fetcher.fetch('000001') == 'b'
+    assert primary.demoted
+    assert fetcher.ranked()[0] is backup
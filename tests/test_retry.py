@@ -0,0 +1,157 @@
+"""
+重试与熔断
+可恢复的错误退避重试，不可恢复的错误立即抛出；错误率过高时熔断，冷却后探测恢复
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+import trevanquant.database.connection as connection
+from trevanquant.data.retry import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, RetryPolicy, is_retryable
+)
+from trevanquant.database.models import DataUpdateLog
+
+
+class Flaky:
+    """前 failures 次调用抛出 error，之后返回 'ok'"""
+
+    def __init__(self, failures, error=ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error(f"第 {self.calls} 次失败")
+        return 'ok'
+
+
+def make_policy(**options):
+    options.setdefault('base_delay', 0)
+    options.setdefault('record_events', False)
+    return RetryPolicy(**options)
+
+
+def test_is_retryable():
+    assert is_retryable(ConnectionError())
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(ValueError())
+    assert not is_retryable(CircuitOpenError())
+
+
+def test_retries_transient_errors():
+    policy = make_policy(max_retries=3)
+    func = Flaky(2)
+
+    assert policy.call('api', func) == 'ok'
+    assert func.calls == 3
+    assert policy.stats()['retries'] == 2
+
+
+def test_gives_up_after_max_retries():
+    policy = make_policy(max_retries=2)
+    func = Flaky(10)
+
+    with pytest.raises(ConnectionError):
+        policy.call('api', func)
+    assert func.calls == 3
+    assert policy.stats()['failures'] == 1
+
+
+def test_fatal_error_is_not_retried():
+    policy = make_policy(max_retries=3)
+    func = Flaky(1, error=ValueError)
+
+    with pytest.raises(ValueError):
+        policy.call('api', func)
+    assert func.calls == 1
+    assert policy.stats()['fatal'] == 1
+
+
+def test_attempt_does_not_retry():
+    policy = make_policy(max_retries=3)
+    func = Flaky(1)
+
+    with pytest.raises(ConnectionError):
+        policy.attempt('api', func)
+    assert func.calls == 1
+    assert policy.attempt('api', func) == 'ok'
+
+
+def test_breaker_opens_and_recovers():
+    """错误率超过阈值时熔断，冷却后放行一个探测请求，成功则恢复"""
+    breaker = CircuitBreaker('api', error_rate=0.5, window=10, min_calls=4, open_seconds=0.05)
+
+    for _ in range(3):
+        breaker.before_call()
+        assert not breaker.record_failure(ConnectionError())
+    breaker.before_call()
+    assert breaker.record_failure(ConnectionError())
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    assert breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker('api', min_calls=1, open_seconds=0.01)
+    breaker.before_call()
+    breaker.record_failure(ConnectionError())
+    time.sleep(0.02)
+
+    breaker.before_call()
+    assert breaker.record_failure(ConnectionError())
+    assert breaker.state == OPEN
+
+
+def test_open_circuit_stops_retries():
+    """熔断后不再重试，后续请求直接被拒绝而不调用上游"""
+    policy = make_policy(max_retries=50, error_rate=0.5, open_seconds=60)
+    func = Flaky(100)
+
+    with pytest.raises(ConnectionError):
+        policy.call('api', func)
+    calls = func.calls
+    assert policy.breaker('api').state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        policy.call('api', func)
+    assert func.calls == calls
+
+
+def test_circuit_events_do_not_join_caller_transaction(db, monkeypatch):
+    """熔断日志在独立连接上写入：调用方回滚不影响熔断日志，熔断日志也不提交调用方的修改"""
+    monkeypatch.setattr(connection, 'db_manager', db)
+    policy = RetryPolicy(max_retries=0, base_delay=0, open_seconds=0.05)
+
+    with pytest.raises(RuntimeError):
+        with db.session_scope() as session:
+            session.add(DataUpdateLog(data_type='caller', status='RUNNING', start_time=datetime.now()))
+            session.flush()
+            for _ in range(12):
+                with pytest.raises(ConnectionError):
+                    policy.call('api', Flaky(1))
+            raise RuntimeError("回滚调用方事务")
+
+    policy.flush_events()
+    time.sleep(0.06)
+    assert policy.call('api', Flaky(0)) == 'ok'
+    policy.flush_events()
+
+    with db.session_scope(readonly=True) as session:
+        logs = [(log.data_type, log.status) for log in session.query(DataUpdateLog)]
+    assert logs == [('circuit:api', 'SUCCESS')]